@@ -11,10 +11,19 @@ st.sidebar.success("Select a page above.")
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import numpy as np
-import openpyxl
-import plotly.graph_objects as go
+from core.fpy_summary import pivot_stage_summary, stage_sheet_names, stage_summary
+from core.lazy_import import lazy_module
+from core.plot_data import cost_curves, line_chart
+from core.profiling import sidebar_panel, stage_timer
+from core.workbook_cache import load_data
+from core.yield_curves import board_curves
+
+# Plotting libraries are imported when the first chart is drawn
+px = lazy_module("plotly.express")
+go = lazy_module("plotly.graph_objects")
+
+# Stage timings of this rerun; the sidebar waterfall shows the previous reruns
+sidebar_panel(st, "Homepage")
 
 
 # App Title
@@ -28,54 +37,20 @@ with st.expander("Upload Your <Process Mapping> File Here", expanded=True):  # C
     uploaded_file = st.file_uploader("Choose Your <Process Mapping> File", type=["xlsx", "csv", "xlsm"])
 
 if uploaded_file:
-    # Load data from the uploaded file
-    @st.cache_data
-    def load_data(file):
-        if file.name.endswith('.csv'):
-            df = pd.read_csv(file)
-            return {"csv_data": df}  # Return a dictionary with the data
-        else:
-            df = pd.read_excel(file, sheet_name=None)  # Load all sheets as a dictionary
-            return df
-
+    # Load data from the uploaded file (parsed sheets are cached on disk by file hash)
     xls_summary = load_data(uploaded_file)
+    if isinstance(xls_summary, pd.DataFrame):
+        xls_summary = {"csv_data": xls_summary}  # Return a dictionary with the data
 
     # Filter sheet names that start with 'MK', 'X', or 'SOP'
-    sheets_to_read = [sheet for sheet in xls_summary.keys() if sheet.startswith(('MK', 'X', "X1", 'SOP', "X1.1", "X1.2", "X1.3", "mk", "poc", "x", "x1.1", "x1.2", "x1.3"))]
+    sheets_to_read = stage_sheet_names(xls_summary)
 
-    # Initialize an empty list to store dataframes
-    all_data = []
+    # Step 2: Collect every sheet's metrics into one long-format table
+    # (same computation as the `python -m core.fpy_summary` batch mode)
+    summary_long = stage_summary(xls_summary, sheets_to_read)
 
-    # Step 2: Loop through the sheets and process data
-    for sheet_name in sheets_to_read:
-        # Read the data from the sheet
-        df_table = xls_summary[sheet_name]
-        
-        # Extract relevant values
-        annual_vol_nos = df_table.at[0, 'Annual Volume']
-        batch_qty = annual_vol_nos / 12
-        end_to_end_cycle_time = df_table.at[0, 'Total Cycle Time, sec'] / 60  # Convert seconds to minutes
-        available_time_per_day = 24 * 60 - (3 * 45)  # Convert hours to minutes and subtract the time
-        desired_takt_time = available_time_per_day / (batch_qty / 24)
-        desired_trough_put = ((batch_qty / 24) / available_time_per_day) * 60
-        cycle_time = df_table.at[0, 'Max Overall PCBA CT'] / 60
-        actual_trough_put = available_time_per_day / cycle_time
-
-        # Create a dictionary for the current sheet's data
-        processct_data = {
-            'Metric': ['End to End Cycle Time', 'Desired Takt Time', 'Desired Trough Put(UPH)', 'Cycle Time', 'Actual Trough Put', 'Annual Volume', 'Batch Qty'],
-            'UOM': ['Minute', 'Minute', 'Units/hour', 'Minute', 'Units/shift', 'nos', 'nos'],
-            sheet_name: [end_to_end_cycle_time, desired_takt_time, desired_trough_put, cycle_time, actual_trough_put, annual_vol_nos, batch_qty]  # Values specific to the sheet
-        }
-
-        # Convert the dictionary to a pandas DataFrame
-        df_processct = pd.DataFrame(processct_data)
-        all_data.append(df_processct)  # Add the current dataframe to the list
-
-    # Step 3: Combine all dataframes into one based on 'Metric' and 'UOM'
-    final_df = all_data[0]  # Start with the first dataframe
-    for df in all_data[1:]:
-        final_df = pd.merge(final_df, df, on=['Metric', 'UOM'], how='outer')  # Merge based on 'Metric' and 'UOM'
+    # Step 3: Pivot once into one column per sheet, keyed on 'Metric' and 'UOM'
+    final_df = pivot_stage_summary(summary_long)
 
     # Display the final combined DataFrame
     st.write("### PCB Assembly Process Cycle Time Summary")
@@ -110,7 +85,8 @@ if uploaded_file:
     df_dfm[columns_to_convert] = df_dfm[columns_to_convert].apply(pd.to_numeric, errors='coerce')
 
     # Step 2: Apply the color formatting function to the relevant columns (MK0 to SOP)
-    st.write(df_dfm.style.applymap(color_fpy, subset=columns_to_convert))
+    with stage_timer("FPY table styling"):
+        st.write(df_dfm.style.applymap(color_fpy, subset=columns_to_convert))
 
 
 # Step 4: Process Yield Prediction - Allow user input for percentages
@@ -122,17 +98,10 @@ with st.expander("Upload Your <PFMEA> File Here", expanded=True):  # Collapsible
     uploaded_file = st.file_uploader("Choose Your <PFMEA> File", type=["xlsx", "csv", "xlsm"])
 
 if uploaded_file:
-    # Load data from the uploaded file
-    @st.cache_data
-    def load_data(file):
-        if file.name.endswith('.csv'):
-            df = pd.read_csv(file)
-            return {"csv_data": df}  # Return a dictionary with the data
-        else:
-            df = pd.read_excel(file, sheet_name=None)  # Load all sheets as a dictionary
-            return df
-
+    # Load data from the uploaded file (parsed sheets are cached on disk by file hash)
     xls = load_data(uploaded_file)
+    if isinstance(xls, pd.DataFrame):
+        xls = {"csv_data": xls}  # Return a dictionary with the data
 
     # Filter sheet names that start with 'MK', 'X', or 'SOP'
     sheets_to_read = [sheet for sheet in xls.keys() if sheet.startswith(('MK', 'X', 'SOP'))]
@@ -190,7 +159,8 @@ if uploaded_file:
 
     # Step 6: Display the final table with percentages
     st.write("Filtered Data:")
-    st.dataframe(final_table.style.format({"Estimated Yield from Current p Value": "{:.2f}%"}))
+    with stage_timer("yield table styling"):
+        st.dataframe(final_table.style.format({"Estimated Yield from Current p Value": "{:.2f}%"}))
 
     # Step 7: Create a combination graph
     yield_values = final_table.loc["Estimated Yield from Current p Value"]
@@ -262,31 +232,12 @@ if uploaded_file is not None:
             solder_joint_row = edited_data.loc[edited_data["Data Points"] == "No. Solder Joints (N)"].squeeze()
             solder_joints = {board: solder_joint_row[board] for board in board_names}
 
-            # Defect rate scaling values (logarithmic range for better visualization)
-            defect_rate_scaling = np.logspace(-1, 2, 50)  # From 0.1 to 100 in logarithmic scale
-
-            # Define function to calculate yield based on defect rate scaling
-            def calculate_yield(solder_joints, defect_rate_scaling, defect_rate_per_joint):
-                overall_defect_rate = defect_rate_scaling * defect_rate_per_joint
-                yield_percentage = 100 * np.exp(-overall_defect_rate * solder_joints)
-                return yield_percentage
-
             # Get defect rate per joint from the edited_data DataFrame
             defect_rate_per_joint_row = edited_data.loc[edited_data["Data Points"] == "Defect Rate per Solder Joint (DR)"].squeeze()
             defect_rates = {board: defect_rate_per_joint_row[board] for board in board_names}
 
-            # Calculate yields for each board
-            yield_data = []
-            for board in board_names:
-                yield_percentage = calculate_yield(solder_joints[board], defect_rate_scaling, defect_rates[board])
-                yield_data.append(pd.DataFrame({
-                    "Defect Rate Scaling": defect_rate_scaling,
-                    "Yield (%)": yield_percentage,
-                    "Board": board
-                }))
-
-            # Concatenate all yield data into a single DataFrame
-            df = pd.concat(yield_data, ignore_index=True)
+            # Yield over the 0.1 .. 100 log-scaled defect rate scaling for all boards in one broadcast (LRU cached)
+            df = board_curves(board_names, [solder_joints[board] for board in board_names], [defect_rates[board] for board in board_names])
 
             # Plotting the yield vs defect rate scaling
             fig = px.line(
@@ -329,32 +280,12 @@ if uploaded_file is not None:
             solder_joint_row = edited_data.loc[edited_data["Data Points"] == "No. Solder Joints (N)"].squeeze()
             defect_rate_row = edited_data.loc[edited_data["Data Points"] == "Defect Rate per Solder Joint (DR)"].squeeze()
 
-            scaling_factors = np.linspace(0.1, 100, 50)  # Scaling factors from 0.1 to 100
+            # One curve per board over scaling factors 0.1 to 100, decimated to a fixed point budget
+            plot_df = cost_curves(board_names, solder_joint_row[board_names], defect_rate_row[board_names],
+                                  "Solder Defect Rate Scaling", log_x=True)
 
-            # Initialize a DataFrame to store results for all boards
-            plot_df = pd.DataFrame()
-
-            for board in board_names:
-                # Extract defect rate and solder joint values for the current board
-                solder_joints = solder_joint_row[board]
-                defect_rate = defect_rate_row[board]
-
-                # Calculate costs and cost percentages
-                costs = [defect_rate * solder_joints * scale for scale in scaling_factors]
-                cost_percentages = [scale * 100 for scale in scaling_factors]
-
-                # Create a temporary DataFrame for the current board
-                temp_df = pd.DataFrame({
-                    "Solder Defect Rate Scaling": scaling_factors,
-                    "Cost % Change": costs,
-                    "Board": board
-                })
-
-                # Append to the main DataFrame
-                plot_df = pd.concat([plot_df, temp_df], ignore_index=True)
-            
             # Graph 1: Cost vs Solder Def Rate (Full Scale)
-            fig1 = px.line(
+            fig1 = line_chart(
                 plot_df,
                 x="Solder Defect Rate Scaling",
                 y="Cost % Change",
@@ -365,15 +296,17 @@ if uploaded_file is not None:
                 log_x=True
             )
 
-            st.plotly_chart(fig1, use_container_width=True)
+            with stage_timer("cost chart render"):
+                st.plotly_chart(fig1, use_container_width=True)
 
 
         with col_graph3_3:
-            # Filter the DataFrame to focus on scaling factors <= 10
-            detail_df = plot_df[plot_df["Solder Defect Rate Scaling"] <= 10]
+            # Focus on scaling factors <= 10, decimated on its own so the detail keeps its resolution
+            detail_df = cost_curves(board_names, solder_joint_row[board_names], defect_rate_row[board_names],
+                                    "Solder Defect Rate Scaling", x_max=10)
 
-            # Create the line chart using Plotly Express
-            fig2 = px.line(
+            # Line chart with one trace per board
+            fig2 = line_chart(
                 detail_df,
                 x="Solder Defect Rate Scaling",
                 y="Cost % Change",
@@ -387,7 +320,8 @@ if uploaded_file is not None:
             )
 
             # Display the chart in the second column
-            st.plotly_chart(fig2, use_container_width=True)
+            with stage_timer("cost chart render"):
+                st.plotly_chart(fig2, use_container_width=True)
 
         st.write("-----------------------------------")
 
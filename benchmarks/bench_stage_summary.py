@@ -0,0 +1,79 @@
+"""Benchmark the Homepage stage summary: per-sheet outer-merge loop vs long format + one pivot.
+
+Usage:
+    python benchmarks/bench_stage_summary.py [--sheets 10 100 250 500 1000]
+
+The legacy loop re-copies the growing table on every merge (quadratic in
+the number of stage sheets); the pivot path should stay linear, i.e. a
+roughly constant time per sheet.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.fpy_summary import STAGE_METRICS, STAGE_UOMS, pivot_stage_summary, stage_metrics, stage_summary
+
+
+def synthetic_stage_sheets(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        f"MK{i}": pd.DataFrame({
+            "Annual Volume": [int(rng.integers(1000, 200000))],
+            "Total Cycle Time, sec": [rng.uniform(200, 3000)],
+            "Max Overall PCBA CT": [rng.uniform(20, 120)],
+        })
+        for i in range(count)
+    }
+
+
+def legacy_summary(sheets):
+    # The Step 2 / Step 3 loop the Homepage used before the pivot
+    all_data = []
+    for sheet_name, df_table in sheets.items():
+        all_data.append(pd.DataFrame({'Metric': STAGE_METRICS, 'UOM': STAGE_UOMS, sheet_name: stage_metrics(df_table)}))
+    final_df = all_data[0]
+    for df in all_data[1:]:
+        final_df = pd.merge(final_df, df, on=['Metric', 'UOM'], how='outer')
+    return final_df
+
+
+def pivot_summary(sheets):
+    return pivot_stage_summary(stage_summary(sheets))
+
+
+def best_of(func, sheets, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(sheets)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sheets", type=int, nargs="+", default=[10, 100, 250, 500, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'sheets':>7} {'merge s':>9} {'merge ms/sheet':>15} {'pivot s':>9} {'pivot ms/sheet':>15}")
+    for count in args.sheets:
+        sheets = synthetic_stage_sheets(count)
+        legacy = legacy_summary(sheets).set_index(['Metric', 'UOM'])
+        pivot = pivot_summary(sheets).set_index(['Metric', 'UOM'])
+        pd.testing.assert_frame_equal(legacy.loc[pivot.index], pivot, check_dtype=False)
+
+        merge_s = best_of(legacy_summary, sheets, args.repeat)
+        pivot_s = best_of(pivot_summary, sheets, args.repeat)
+        print(f"{count:>7} {merge_s:>9.3f} {merge_s / count * 1000:>15.3f} {pivot_s:>9.3f} {pivot_s / count * 1000:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
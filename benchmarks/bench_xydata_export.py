@@ -0,0 +1,83 @@
+"""Benchmark the xydata "Output" sheet export: legacy cell loop vs write-only streaming.
+
+Usage:
+    python benchmarks/bench_xydata_export.py [--sizes 1000 10000 100000]
+
+For each row count a synthetic merged xydata / feeder-master frame is written
+both ways. Wall time and the peak traced Python allocation are reported.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils.dataframe import dataframe_to_rows
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.excel_export import write_sheets
+
+
+def synthetic_xydata(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    packages = np.array([f"PKG{i:03d}" for i in range(120)])
+    package = rng.choice(packages, rows)
+    return pd.DataFrame({
+        "REFDES": [f"R{i}" for i in range(rows)],
+        "Package": package,
+        "X": rng.uniform(0, 300, rows).round(3),
+        "Y": rng.uniform(0, 200, rows).round(3),
+        "Rotation": rng.choice([0, 90, 180, 270], rows),
+        "Topbottom": rng.choice(["YES", "NO"], rows),
+        "Package_Master": np.where(rng.random(rows) < 0.97, package, None),
+        "Cycle Time_Master": np.where(rng.random(rows) < 0.97, rng.uniform(0.05, 0.6, rows), np.nan),
+    })
+
+
+def legacy_export(df3):
+    # The loop page 1 used before the streaming writer
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        writer.book.create_sheet(title="Output")
+        for r_idx, row in enumerate(dataframe_to_rows(df3, index=False, header=True), start=1):
+            for c_idx, value in enumerate(row, start=1):
+                writer.sheets["Output"].cell(row=r_idx, column=c_idx, value=value)
+    return output
+
+
+def streaming_export(df3):
+    return write_sheets({"Output": df3}, io.BytesIO())
+
+
+def measure(func, frame):
+    start = time.perf_counter()
+    func(frame)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(frame)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'legacy s':>10} {'legacy MB':>10} {'stream s':>10} {'stream MB':>10} {'speedup':>8}")
+    for rows in args.sizes:
+        frame = synthetic_xydata(rows)
+        legacy_s, legacy_mb = measure(legacy_export, frame)
+        stream_s, stream_mb = measure(streaming_export, frame)
+        print(f"{rows:>8} {legacy_s:>10.2f} {legacy_mb:>10.1f} {stream_s:>10.2f} {stream_mb:>10.1f} {legacy_s / stream_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Cold import time of every page, from ``python -X importtime``.
+
+Usage:
+    python benchmarks/import_time.py [--top 8] [--check]
+
+Each page's module-level imports are run in a fresh interpreter, the way a
+cold Streamlit instance runs them before its first paint. The report lists
+the total import time per page, its heaviest top-level packages and any of
+the ``DEFERRED`` libraries (plotting, Excel, ML) that the page still loads
+at start instead of in the section that uses them. With ``--check`` the
+script exits with status 1 when a page does. Imports that fail here (e.g.
+streamlit not installed) are listed as missing and left out of the totals.
+"""
+
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that should only load in the section that needs them
+DEFERRED = ("plotly.express", "openpyxl", "sklearn", "matplotlib", "scipy")
+
+
+def page_paths():
+    return [os.path.join(ROOT, "Homepage.py")] + sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))
+
+
+def module_level_imports(path):
+    """Source of the page's module-level import statements, in order."""
+    with open(path, encoding="utf-8") as page_file:
+        source = page_file.read()
+    return [
+        ast.get_source_segment(source, node)
+        for node in ast.parse(source).body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+
+def _probe_script(statements):
+    # Each statement on its own, so one missing package does not hide the rest
+    lines = ["import sys", "missing = []"]
+    for statement in statements:
+        lines += ["try:", f"    {statement}", "except ImportError as error:", "    missing.append(error.name or str(error))"]
+    lines.append("print('\\n'.join(sorted(set(missing))))")
+    return "\n".join(lines)
+
+
+def parse_importtime(stderr):
+    """(module, self us, cumulative us) of every line of ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(statements):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _probe_script(statements)],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    missing = [name for name in result.stdout.splitlines() if name]
+    return parse_importtime(result.stderr), missing
+
+
+def interpreter_baseline():
+    """Modules a bare interpreter imports anyway; not charged to the pages."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], capture_output=True, text=True)
+    return {name for name, _, _ in parse_importtime(result.stderr)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=8, help="heaviest top-level packages listed per page")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 when a page imports a deferred library at start")
+    args = parser.parse_args()
+
+    startup = interpreter_baseline()
+    offenders = []
+    for path in page_paths():
+        rows, missing = measure(module_level_imports(path))
+        rows = [row for row in rows if row[0] not in startup]
+        by_package = defaultdict(int)
+        for name, self_us, _ in rows:
+            by_package[name.split(".")[0]] += self_us
+        loaded = {name for name, _, _ in rows}
+        deferred = [name for name in DEFERRED if name in loaded and name not in missing]
+        if deferred:
+            offenders.append((os.path.basename(path), deferred))
+
+        total_ms = sum(by_package.values()) / 1000
+        print(f"{os.path.relpath(path, ROOT)}: {total_ms:.0f} ms, {len(rows)} modules")
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {package:<24} {self_us / 1000:>8.1f} ms")
+        print(f"    deferred libraries loaded at start: {', '.join(deferred) or 'none'}")
+        if missing:
+            print(f"    missing here (not timed): {', '.join(missing)}")
+
+    if args.check and offenders:
+        for page, deferred in offenders:
+            print(f"{page} imports {', '.join(deferred)} at start")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
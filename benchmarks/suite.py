@@ -0,0 +1,321 @@
+"""Benchmark suite: each page's compute path at several input sizes, checked against a baseline.
+
+Usage:
+    python benchmarks/suite.py                         # all cases, all sizes
+    python benchmarks/suite.py --pages Homepage 3 --sizes small medium
+    python benchmarks/suite.py --update-baseline       # record the current timings
+
+Inputs come from ``benchmarks/synthetic.py`` and are built before timing;
+only the page's own computation (the core calls, or the page code copied
+here where it has no core function) is timed, best of ``--repeat`` runs.
+Each case is run once at its small size before timing, so one-off imports
+(reported by ``benchmarks/import_time.py``) are not counted. Memoized steps
+are timed cold: their memo is cleared before every run.
+
+A case fails when it is slower than its ``benchmarks/baseline.json`` time
+by more than ``--tolerance`` (a fraction) plus ``--slack-ms``, and the
+script then exits with status 1. Timings are machine specific, so record
+the baseline on the machine that runs the check.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synthetic
+from core import alpha_fit, master_data, xydata_stream, yield_curves
+from core.alpha_fit import defect_histogram, fit_alpha
+from core.conversion_cost import variant_costs
+from core.cost_sweep import sweep_total_cost
+from core.feeder_index import FEEDER_MASTER_SHEET, FeederIndex
+from core.fpy_summary import pivot_stage_summary, stage_summary
+from core.ieee_yield import score_boards
+from core.ipc_dpmo import IpcDpmoModel
+from core.line_balancing import balance_line
+from core.line_des import simulate_line, stages_from_process_map, working_seconds
+from core.nre import nre_scenarios
+from core.pnp_batch import summarize_boards
+from core.plot_data import cost_curves, line_chart
+from core.yield_monte_carlo import fixed, percentile_table, simulate_yield
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SIZE_LABELS = ("small", "medium", "large")
+
+# (page, case name, sizes, setup); setup(size) builds the inputs and returns the callable to time
+CASES = []
+
+
+def case(page, name, sizes):
+    def register(setup):
+        CASES.append((page, name, dict(zip(SIZE_LABELS, sizes)), setup))
+        return setup
+    return register
+
+
+@case("Homepage", "stage summary (sheets)", (50, 500, 2000))
+def homepage_stage_summary(sheets):
+    workbook = synthetic.process_mapping(sheets, stages=5)
+    return lambda: pivot_stage_summary(stage_summary(workbook))
+
+
+@case("Homepage", "yield and cost charts (boards)", (10, 100, 500))
+def homepage_charts(boards):
+    board_names = [f"Board {i:04d}" for i in range(boards)]
+    sheet = synthetic.ieee_sheets(1, stages=board_names)["Board 0000"]
+    joints = sheet.loc[sheet["Data Points"] == "No. Solder Joints (N)", board_names].squeeze()
+    rates = sheet.loc[sheet["Data Points"] == "Defect Rate per Solder Joint (DR)", board_names].squeeze()
+
+    def run():
+        yield_curves._board_frame.cache_clear()
+        yield_curves.board_curves(board_names, joints, rates)
+        for x_max, log_x in ((None, True), (10, False)):
+            frame = cost_curves(board_names, joints, rates, "Solder Defect Rate Scaling", x_max=x_max, log_x=log_x)
+            line_chart(frame, x="Solder Defect Rate Scaling", y="Cost % Change", color="Board", log_x=log_x)
+    return run
+
+
+@case("1", "simulation_db load (feeder packages)", (500, 5000, 20000))
+def page1_simulation_db(packages):
+    data = io.BytesIO(synthetic.simulation_db_bytes(packages=packages))
+
+    def run():
+        master_data._memo.clear()
+        master_data.load_master_data(data)
+    return run
+
+
+@case("1", "xydata join and P&P time (placements)", (10_000, 100_000, 1_000_000))
+def page1_xydata_join(placements):
+    feeder_master = synthetic.simulation_db(packages=300)[FEEDER_MASTER_SHEET]
+    board = synthetic.xydata(placements)
+
+    def run():
+        index = FeederIndex(feeder_master)
+        codes = index.codes(board["Package"])
+        index.join(board, codes)
+        index.pnp_cycle_times(board, codes)
+    return run
+
+
+@case("1", "xydata CSV streamed in chunks (placements)", (10_000, 100_000, 1_000_000))
+def page1_xydata_stream(placements):
+    feeder_master = synthetic.simulation_db(packages=300)[FEEDER_MASTER_SHEET]
+    data = io.BytesIO(synthetic.xydata(placements).to_csv(index=False).encode("utf-8"))
+    data.name = "xydata.csv"
+
+    def run():
+        xydata_stream._memo.clear()
+        xydata_stream.placement_totals(data, FeederIndex(feeder_master))
+    return run
+
+
+@case("1", "batch P&P time, 20000 placements each (boards)", (4, 16, 64))
+def page1_pnp_batch(boards):
+    feeder_index = FeederIndex(synthetic.simulation_db(packages=300)[FEEDER_MASTER_SHEET])
+    sources = [(f"board{i}.csv", synthetic.xydata(20_000, seed=i).to_csv(index=False).encode("utf-8")) for i in range(boards)]
+    return lambda: summarize_boards(sources, feeder_index)
+
+
+@case("1", "line simulation, one week (stages)", (5, 20, 60))
+def page1_line_simulation(stages):
+    process_map = synthetic.process_mapping(1, stages)["MK0"]
+    names, cycle_times, setup_times = stages_from_process_map(process_map)
+    horizon = working_seconds(22.5, 6, 1)
+    return lambda: simulate_line(names, cycle_times, setup_times, horizon, mtbf=8 * 3600, mttr=1800, seed=42)
+
+
+@case("1", "line balancing at 150 s takt, RPW and branch and bound to 2000 loads (tasks)", (50, 200, 500))
+def page1_line_balancing(tasks):
+    names, task_times, predecessors = synthetic.line_tasks(tasks)
+    # A fixed search budget rather than the wall-clock limit, so the case times the code, not the deadline
+    return lambda: balance_line(names, task_times, 150.0, predecessors, branch_and_bound=True, node_limit=2000, time_limit=None)
+
+
+@case("2", "OCC / OMI statistics (PFMEA steps)", (1000, 100_000, 1_000_000))
+def page2_omi(steps):
+    sheet = synthetic.pfmea_sheet(steps)
+    occ_ranking_df = pd.DataFrame({
+        'OCC_Ranking': [10, 9, 8, 7, 6, 5, 4, 3, 2, 1],
+        'OCC_Incidents_Per_Item': [0.1, 0.05, 0.02, 0.01, 0.002, 0.0005, 0.0001, 0.00001, 0.000001, 0]
+    })
+
+    def run():
+        # The OMI merge and Cp / Cpk of page 2 (the regression itself needs scikit-learn)
+        edited_data = sheet.merge(occ_ranking_df, left_on='OCC', right_on='OCC_Ranking', how='left')
+        edited_data['OMI'] = 1 - edited_data['OCC_Incidents_Per_Item']
+        usl, lsl = edited_data['OMI'].max(), edited_data['OMI'].min()
+        mean, sigma = edited_data['OMI'].mean(), edited_data['OMI'].std()
+        return (usl - lsl) / (6 * sigma), min((usl - mean) / (3 * sigma), (mean - lsl) / (3 * sigma))
+    return run
+
+
+@case("3", "IEEE portfolio scoring (boards)", (10, 100, 1000))
+def page3_scoring(boards):
+    sheets = synthetic.ieee_sheets(boards)
+    return lambda: score_boards(sheets, alpha=2.0)
+
+
+@case("3", "yield Monte Carlo (trials)", (100_000, 1_000_000, 4_000_000))
+def page3_monte_carlo(trials):
+    def run():
+        result = simulate_yield(
+            [1500.0, 800.0, 400.0],
+            {"distribution": "Normal", "mean": 1e-4, "sd": 2e-5},
+            {"distribution": "Triangular", "low": 0.8, "mode": 0.9, "high": 0.97},
+            fixed(2.0),
+            trials=trials, seed=0,
+        )
+        percentile_table(result)
+    return run
+
+
+@case("3", "alpha fit (boards)", (10_000, 1_000_000, 10_000_000))
+def page3_alpha_fit(boards):
+    counts = np.random.default_rng(0).negative_binomial(2.0, 2.0 / 2.5, boards)
+
+    def run():
+        alpha_fit._memo.clear()
+        fit_alpha(*defect_histogram(counts))
+    return run
+
+
+@case("4", "IPC derived rows, all stages (packages)", (100, 1000, 10_000))
+def page4_ipc(packages):
+    sheet = synthetic.ipc_sheet(packages)
+
+    def run():
+        model = IpcDpmoModel(sheet.copy())
+        for stage in synthetic.IPC_STAGES:
+            model.set_input(stage, 'actual_fpy', 0.95)
+            model.set_input(stage, 'solder_joint', 2500.0)
+            model.set_input(stage, 'test_coverage', 0.9)
+            model.recompute(stage)
+    return run
+
+
+@case("5", "process-mapping variant costs (variants)", (10, 100, 1000))
+def page5_variants(variants):
+    mmr_ems = synthetic.simulation_db(stages=40)["MMR-EMS"]
+    sheets = synthetic.process_mapping(variants, stages=40)
+    return lambda: variant_costs(sheets, mmr_ems, 180.0, 240.0, 50000)
+
+
+@case("5", "cost sweep (points per axis)", (10, 50, 150))
+def page5_sweep(points):
+    process_map = synthetic.process_mapping(1, 40)["MK0"].merge(
+        synthetic.simulation_db(stages=40)["MMR-EMS"], left_on="Stage", right_on="Process Name")
+    nre = synthetic.simulation_db(nre_items=50)["NRE"]
+    volumes = np.linspace(1000, 500000, points)
+    lives = np.linspace(1, 10, points)
+    labour = np.linspace(100, 400, points)
+    return lambda: sweep_total_cost(
+        process_map, volumes, lives, labour, 240.0, 1500.0,
+        nre_unit_prices=nre["Unit Price (₹)"].to_numpy(dtype=float),
+        nre_life_cycles=nre["Life Cycle (Boards)"].to_numpy(dtype=float),
+    )
+
+
+@case("5", "NRE scenarios, 1000 volumes (items)", (100, 1000, 10_000))
+def page5_nre(items):
+    nre = synthetic.simulation_db(nre_items=items)["NRE"]
+    volumes = np.linspace(1000, 5_000_000, 1000)
+    return lambda: nre_scenarios(nre, volumes)
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def case_key(page, name, label):
+    return f"{page} / {name} [{label}]"
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as baseline_file:
+        return json.load(baseline_file).get("seconds", {})
+
+
+def save_baseline(path, timings):
+    baseline = {
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "seconds": {key: round(seconds, 6) for key, seconds in sorted(timings.items())},
+    }
+    with open(path, "w", encoding="utf-8") as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, ensure_ascii=False)
+        baseline_file.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="+", help="pages to run: Homepage, 1 ... 5 (default: all)")
+    parser.add_argument("--sizes", nargs="+", choices=SIZE_LABELS, default=list(SIZE_LABELS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="allowed slowdown in ms on top of the tolerance")
+    parser.add_argument("--update-baseline", action="store_true", help="write the timings of this run to the baseline")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    timings = {}
+    regressions = []
+    print(f"{'case':<62} {'size':>10} {'s':>9} {'baseline s':>11} {'ratio':>7}")
+    for page, name, sizes, setup in CASES:
+        if args.pages and page not in args.pages:
+            continue
+        # Untimed run at the small size: lazily imported libraries load here, not in a timed run
+        setup(sizes["small"])()
+        for label in args.sizes:
+            key = case_key(page, name, label)
+            seconds = best_of(setup(sizes[label]), args.repeat)
+            timings[key] = seconds
+            reference = baseline.get(key)
+            if reference is None:
+                status, ratio = "new", ""
+            else:
+                ratio = f"{seconds / reference:>6.2f}x" if reference else ""
+                limit = reference * (1 + args.tolerance) + args.slack_ms / 1000
+                status = "REGRESSED" if seconds > limit else ""
+                if status:
+                    regressions.append((key, seconds, reference))
+            reference_text = f"{reference:>11.4f}" if reference is not None else f"{'-':>11}"
+            print(f"{page + ' / ' + name:<62} {sizes[label]:>10} {seconds:>9.4f} {reference_text} {ratio:>7} {status}")
+
+    if args.update_baseline:
+        save_baseline(args.baseline, {**baseline, **timings})
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%} + {args.slack_ms:g} ms:")
+        for key, seconds, reference in regressions:
+            print(f"  {key}: {seconds:.4f} s vs {reference:.4f} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
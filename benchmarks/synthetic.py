@@ -0,0 +1,167 @@
+"""Synthetic inputs of configurable size for the benchmark suite.
+
+Each generator returns frames shaped like the sheets the pages read:
+
+- ``simulation_db``: Process_CT, SMD_Package_Feeder_Master, NRE, MMR-EMS
+  and Assumptions (``simulation_db_bytes`` writes them as an .xlsx)
+- ``xydata``: the xydata_version sheet with one row per placement
+- ``process_mapping``: stage sheets (MK0, MK1, ...) for the Homepage and page 5
+- ``line_tasks``: process-map tasks with precedence relations (page 1 line balancing)
+- ``pfmea_sheet``: a PFMEA sheet with one row per process step (page 2)
+- ``ipc_sheet``: an IPC-7912 "Package" sheet (page 4)
+- ``ieee_sheets``: IEEE "Data Points" sheets, one per board (page 3)
+
+All generators are deterministic for a given ``seed``.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from core.excel_export import write_sheets
+from core.ieee_yield import CATEGORY_ROWS, DATA_POINTS_COLUMN, DEFECT_RATE_ROW, TEST_EFFICIENCY_ROW
+from core.ipc_dpmo import END_OF_INPUT_LABEL, LABEL_COLUMN, fault_probability_column
+
+
+IPC_STAGES = ['MK0', 'MK1', 'MK2', 'MK3', 'X1', 'X1.1', 'X1.2']
+
+
+def stage_names(count):
+    return [f"Stage {i:04d}" for i in range(count)]
+
+
+def package_names(count):
+    return [f"PKG{i:04d}" for i in range(count)]
+
+
+def simulation_db(stages=40, packages=300, nre_items=50, seed=0):
+    """Master sheets of simulation_db.xlsx: ``stages`` MMR-EMS processes, ``packages`` feeder rows, ``nre_items`` NRE rows."""
+    rng = np.random.default_rng(seed)
+    names = stage_names(stages)
+    process_ct = pd.DataFrame({
+        "Shift Hr/day": [22.5] + [np.nan] * (stages - 1),
+        "Days/Week": [6] + [np.nan] * (stages - 1),
+        "Weeks/Year": [50] + [np.nan] * (stages - 1),
+        "Overall Labor Efficiency": [0.85] + [np.nan] * (stages - 1),
+        "Stage": names,
+        "Batch Set up Time": rng.uniform(300, 3600, stages).round(1),
+        "Process Cycle Time": rng.uniform(5, 120, stages).round(2),
+    })
+    feeder_master = pd.DataFrame({
+        "Package_Master": package_names(packages),
+        "Cycle Time_Master": rng.uniform(0.05, 0.6, packages).round(3),
+        "Feeder": rng.choice(["8mm", "12mm", "16mm", "Tray"], packages),
+    })
+    nre = pd.DataFrame({
+        "Item": [f"Fixture {i:03d}" for i in range(nre_items)],
+        "Unit Price (₹)": rng.uniform(5000, 500000, nre_items).round(0),
+        "Life Cycle (Boards)": rng.integers(10000, 1000000, nre_items),
+    })
+    mmr_ems = pd.DataFrame({
+        "Process Name": names,
+        "MMR": rng.uniform(0.5, 8, stages).round(3),
+    })
+    assumptions = pd.DataFrame({"Labour cost/Hr": [180.0], "Idl Cost/Hr": [240.0]})
+    return {
+        "Process_CT": process_ct,
+        "SMD_Package_Feeder_Master": feeder_master,
+        "NRE": nre,
+        "MMR-EMS": mmr_ems,
+        "Assumptions": assumptions,
+    }
+
+
+def simulation_db_bytes(stages=40, packages=300, nre_items=50, seed=0):
+    """``simulation_db`` written as .xlsx bytes."""
+    return write_sheets(simulation_db(stages, packages, nre_items, seed), io.BytesIO()).getvalue()
+
+
+def xydata(placements, packages=300, seed=0):
+    """xydata_version sheet with ``placements`` rows; about 3% of the packages have no feeder master row."""
+    rng = np.random.default_rng(seed)
+    names = np.array(package_names(packages) + [f"NEW{i:03d}" for i in range(max(1, packages // 30))])
+    return pd.DataFrame({
+        "REFDES": [f"R{i}" for i in range(placements)],
+        "Package": rng.choice(names, placements),
+        "X": rng.uniform(0, 300, placements).round(3),
+        "Y": rng.uniform(0, 200, placements).round(3),
+        "Rotation": rng.choice([0, 90, 180, 270], placements),
+        "Topbottom": rng.choice(["YES", "NO"], placements),
+    })
+
+
+def process_mapping(sheets=8, stages=40, seed=0):
+    """Process-mapping workbook: ``sheets`` stage sheets (MK0, MK1, ...) of ``stages`` rows each."""
+    rng = np.random.default_rng(seed)
+    names = stage_names(stages)
+    workbook = {}
+    for i in range(sheets):
+        frame = pd.DataFrame({
+            "Side": rng.choice(["Top", "Bottom"], stages),
+            "Stage": names,
+            "Process Cycle Time": rng.uniform(5, 120, stages).round(2),
+            "Batch Set up Time": rng.uniform(300, 3600, stages).round(1),
+            "FTE for Batch Set up": rng.integers(1, 4, stages),
+            "DL FTE": rng.uniform(0.1, 2, stages).round(2),
+            "IDL FTE": rng.uniform(0, 0.5, stages).round(2),
+        })
+        frame["Annual Volume"] = [int(rng.integers(1000, 200000))] + [np.nan] * (stages - 1)
+        frame["Total Cycle Time, sec"] = [frame["Process Cycle Time"].sum()] + [np.nan] * (stages - 1)
+        frame["Max Overall PCBA CT"] = [frame["Process Cycle Time"].max()] + [np.nan] * (stages - 1)
+        workbook[f"MK{i}"] = frame
+    return workbook
+
+
+def line_tasks(tasks, seed=0):
+    """(names, task times, predecessors) of ``tasks`` tasks; each depends on up to two of the ten before it."""
+    rng = np.random.default_rng(seed)
+    predecessors = [
+        sorted(rng.choice(np.arange(max(0, i - 10), i), size=min(i, int(rng.integers(0, 3))), replace=False).tolist())
+        for i in range(tasks)
+    ]
+    return stage_names(tasks), rng.uniform(5, 60, tasks).round(1), predecessors
+
+
+def pfmea_sheet(steps, seed=0):
+    """PFMEA sheet with ``steps`` process steps rated for severity, occurrence (OCC) and detection."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "Process step/Input": [f"Step {i:05d}" for i in range(steps)],
+        "Potential Failure Mode": rng.choice(["Open", "Short", "Missing", "Misaligned", "Tombstone"], steps),
+        "SEV": rng.integers(1, 11, steps),
+        "OCC": rng.integers(1, 11, steps),
+        "DET": rng.integers(1, 11, steps),
+    })
+    frame["RPN"] = frame["SEV"] * frame["OCC"] * frame["DET"]
+    return frame
+
+
+def ipc_sheet(packages, stages=IPC_STAGES, seed=0):
+    """IPC-7912 sheet with ``packages`` package rows, per-stage counts and fault probabilities, then the end marker."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({LABEL_COLUMN: package_names(packages)})
+    for stage in stages:
+        frame[stage] = rng.integers(0, 200, packages).astype(float)
+        frame[fault_probability_column(stage)] = rng.uniform(1e-6, 1e-3, packages)
+    end_row = pd.DataFrame({column: [np.nan] for column in frame.columns})
+    end_row[LABEL_COLUMN] = [END_OF_INPUT_LABEL]
+    return pd.concat([frame, end_row], ignore_index=True)
+
+
+def ieee_sheets(boards, stages=IPC_STAGES, seed=0):
+    """``boards`` IEEE Data Points sheets (board name -> sheet) with one column per stage."""
+    rng = np.random.default_rng(seed)
+    rows = [DEFECT_RATE_ROW, TEST_EFFICIENCY_ROW] + list(CATEGORY_ROWS.values())
+    sheets = {}
+    for i in range(boards):
+        values = {
+            DEFECT_RATE_ROW: rng.uniform(5e-6, 5e-4, len(stages)),
+            TEST_EFFICIENCY_ROW: rng.uniform(0.7, 0.99, len(stages)),
+        }
+        for row in CATEGORY_ROWS.values():
+            values[row] = rng.integers(200, 5000, len(stages)).astype(float)
+        sheet = pd.DataFrame([values[row] for row in rows], columns=list(stages))
+        sheet.insert(0, DATA_POINTS_COLUMN, rows)
+        sheets[f"Board {i:04d}"] = sheet
+    return sheets
@@ -0,0 +1 @@
+"""Streamlit-free building blocks shared by the Homepage and the pages."""
@@ -0,0 +1,234 @@
+"""Maximum-likelihood fit of the clustering parameter alpha.
+
+Defects per board are modelled as negative binomial with mean ``mu`` and
+clustering ``alpha`` (variance ``mu + mu**2 / alpha``), the model behind
+``Ycl = (1 + D / alpha) ** -alpha``. For any alpha the MLE of ``mu`` is the
+sample mean, so only alpha is searched, on its profile likelihood.
+
+The data enter only as a histogram: ``n_k`` boards with ``k`` defects, from
+an uploaded histogram or ``np.bincount`` of raw per-board counts. With
+``T_j`` the number of boards with more than ``j`` defects,
+``sum_k n_k * (lnG(k + alpha) - lnG(alpha)) = sum_j T_j * ln(alpha + j)``.
+The log-likelihood and its derivatives are therefore a few dot products
+over ``j``, whatever the number of boards. Fits are memoized by a digest
+of the histogram.
+"""
+
+import hashlib
+import math
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.profiling import stage_timer
+
+
+DEFECTS_COLUMN = "No. of Defects"
+BOARDS_COLUMN = "No. Of Boards"
+
+# Chi-square(1) quantiles for the profile-likelihood interval
+CHI2_1DF = {0.8: 1.6424, 0.9: 2.7055, 0.95: 3.8415, 0.99: 6.6349}
+
+ALPHA_BOUNDS = (1e-6, 1e8)
+MEMO_ENTRIES = 32
+_memo = OrderedDict()
+
+
+def defect_histogram(counts):
+    """(defects, boards) histogram of raw per-board defect counts."""
+    counts = pd.to_numeric(pd.Series(counts), errors="coerce").dropna().to_numpy()
+    if len(counts) == 0:
+        raise ValueError("No defect counts found")
+    if (counts < 0).any() or not np.array_equal(counts, np.round(counts)):
+        raise ValueError("Defect counts must be non-negative whole numbers")
+    boards = np.bincount(counts.astype(np.int64)).astype(float)
+    return np.arange(len(boards)), boards
+
+
+def histogram_from_frame(frame):
+    """Histogram from an uploaded sheet: either ``No. of Defects`` / ``No. Of Boards`` columns
+    (a histogram) or a single column of per-board defect counts (raw data, first numeric column)."""
+    if DEFECTS_COLUMN in frame.columns and BOARDS_COLUMN in frame.columns:
+        table = frame[[DEFECTS_COLUMN, BOARDS_COLUMN]].apply(pd.to_numeric, errors="coerce").dropna()
+        defects = table[DEFECTS_COLUMN].to_numpy()
+        if (defects < 0).any() or not np.array_equal(defects, np.round(defects)):
+            raise ValueError(f"'{DEFECTS_COLUMN}' must hold non-negative whole numbers")
+        # Repeated defect values are merged, so the histogram may come unsorted or split
+        boards = np.bincount(defects.astype(np.int64), weights=table[BOARDS_COLUMN].to_numpy(dtype=float))
+        return np.arange(len(boards)), boards
+    numeric = frame.apply(pd.to_numeric, errors="coerce").dropna(axis=1, how="all")
+    if numeric.empty:
+        raise ValueError(f"Expected '{DEFECTS_COLUMN}' and '{BOARDS_COLUMN}' columns or a column of per-board defect counts")
+    return defect_histogram(numeric.iloc[:, 0])
+
+
+class _Histogram:
+    # Sufficient statistics of the negative binomial likelihood
+    def __init__(self, defects, boards):
+        defects = np.asarray(defects, dtype=np.int64)
+        boards = np.asarray(boards, dtype=float)
+        if (boards < 0).any():
+            raise ValueError("Board counts must be non-negative")
+        self.n = np.bincount(defects, weights=boards)
+        self.boards = float(self.n.sum())
+        if self.boards <= 0:
+            raise ValueError("The histogram has no boards")
+        k = np.arange(len(self.n))
+        self.defects = float(self.n @ k)
+        self.mean = self.defects / self.boards
+        self.variance = float(self.n @ (k - self.mean) ** 2) / self.boards
+        # T_j = boards with more than j defects, j = 0 .. max - 1
+        self.tail = (self.boards - np.cumsum(self.n))[:-1]
+        self.j = np.arange(len(self.tail), dtype=float)
+        log_factorial = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, len(self.n))))])
+        self.log_factorial_sum = float(self.n @ log_factorial)
+
+    def log_likelihood(self, alpha):
+        """Profile log-likelihood for an array of alphas (mu at its MLE)."""
+        alpha = np.asarray(alpha, dtype=float)
+        mu = self.mean
+        # sum_j T_j ln(alpha + j) - S ln(alpha + mu), with sum_j T_j = S, in a form that stays exact for large alpha
+        gamma_terms = np.log1p((self.j - mu) / (alpha[..., None] + mu)) @ self.tail if len(self.tail) else 0.0
+        value = gamma_terms - self.boards * alpha * np.log1p(mu / alpha) - self.log_factorial_sum
+        if mu > 0:
+            value = value + self.defects * math.log(mu)
+        return value
+
+    def poisson_log_likelihood(self):
+        if self.mean == 0:
+            return -self.log_factorial_sum
+        return self.defects * math.log(self.mean) - self.boards * self.mean - self.log_factorial_sum
+
+    def score(self, alpha):
+        # d logL / d alpha and its derivative, for a scalar alpha
+        inverse = 1 / (alpha + self.j)
+        mu = self.mean
+        first = self.tail @ inverse - self.boards * math.log1p(mu / alpha)
+        second = -self.tail @ inverse ** 2 + self.boards * mu / (alpha * (alpha + mu))
+        return first, second
+
+
+def _solve_score(histogram):
+    # Newton on log(alpha), kept inside a bisection bracket of the decreasing score
+    if histogram.variance <= histogram.mean:
+        return math.inf, True  # no over-dispersion: the likelihood keeps rising towards Poisson
+    low, limit = ALPHA_BOUNDS
+    if histogram.score(low)[0] <= 0:
+        return low, False
+    # Start from the method-of-moments estimate and widen until the score turns negative
+    high = histogram.mean ** 2 / (histogram.variance - histogram.mean)
+    while histogram.score(high)[0] > 0:
+        high *= 10
+        if high > limit:
+            return math.inf, False
+    log_low, log_high = math.log(low), math.log(high)
+    log_alpha = log_high
+    for _ in range(200):
+        alpha = math.exp(log_alpha)
+        first, second = histogram.score(alpha)
+        if first > 0:
+            log_low = log_alpha
+        else:
+            log_high = log_alpha
+        step = -first / (second * alpha) if second != 0 else 0.0
+        candidate = log_alpha + step
+        if not (log_low < candidate < log_high) or not math.isfinite(candidate):
+            candidate = (log_low + log_high) / 2
+        if abs(candidate - log_alpha) < 1e-12 or log_high - log_low < 1e-12:
+            return math.exp(candidate), True
+        log_alpha = candidate
+    return math.exp(log_alpha), False
+
+
+def _bound(histogram, threshold, inside, outside):
+    # Bisection on log(alpha) for the profile log-likelihood crossing ``threshold``
+    if histogram.log_likelihood(outside) >= threshold:
+        return outside
+    a, b = math.log(inside), math.log(outside)
+    for _ in range(100):
+        middle = (a + b) / 2
+        if histogram.log_likelihood(math.exp(middle)) >= threshold:
+            a = middle
+        else:
+            b = middle
+    return math.exp((a + b) / 2)
+
+
+def _digest(defects, boards, confidence):
+    histogram = np.bincount(np.asarray(defects, dtype=np.int64), weights=np.asarray(boards, dtype=float))
+    return hashlib.sha256(np.trim_zeros(histogram, "b").tobytes() + repr(confidence).encode()).hexdigest()
+
+
+@stage_timer("alpha fit")
+def fit_alpha(defects, boards, confidence=0.95):
+    """Negative binomial fit of a defects-per-board histogram.
+
+    Returns a dict with ``alpha`` (``inf`` when the data are not
+    over-dispersed, i.e. Poisson), its profile-likelihood interval
+    ``alpha_low`` / ``alpha_high`` at ``confidence``, the method-of-moments
+    alpha and the sample mean / variance. Memoized by histogram digest.
+    """
+    if confidence not in CHI2_1DF:
+        raise ValueError(f"confidence must be one of {', '.join(map(str, CHI2_1DF))}")
+    digest = _digest(defects, boards, confidence)
+    if digest in _memo:
+        _memo.move_to_end(digest)
+        return dict(_memo[digest])
+
+    histogram = _Histogram(defects, boards)
+    alpha, converged = _solve_score(histogram)
+    low, high = ALPHA_BOUNDS
+    if math.isfinite(alpha):
+        best = float(histogram.log_likelihood(alpha))
+        threshold = best - CHI2_1DF[confidence] / 2
+        alpha_low = _bound(histogram, threshold, alpha, low)
+        alpha_high = _bound(histogram, threshold, alpha, high)
+        alpha_high = math.inf if alpha_high >= high else alpha_high
+    else:
+        best = float(histogram.poisson_log_likelihood())
+        threshold = best - CHI2_1DF[confidence] / 2
+        # The likelihood rises monotonically to the Poisson limit
+        alpha_low = _bound(histogram, threshold, high, low)
+        alpha_high = math.inf
+
+    excess = histogram.variance - histogram.mean
+    result = {
+        "alpha": alpha,
+        "alpha_low": alpha_low,
+        "alpha_high": alpha_high,
+        "confidence": confidence,
+        "alpha_moments": histogram.mean ** 2 / excess if excess > 0 else math.inf,
+        "mean": histogram.mean,
+        "variance": histogram.variance,
+        "boards": histogram.boards,
+        "defects": histogram.defects,
+        "log_likelihood": best,
+        "poisson_log_likelihood": float(histogram.poisson_log_likelihood()),
+        "converged": converged,
+        "digest": digest,
+    }
+    _memo[digest] = result
+    while len(_memo) > MEMO_ENTRIES:
+        _memo.popitem(last=False)
+    return dict(result)
+
+
+def fitted_frame(defects, boards, alpha):
+    """Observed vs fitted boards per defect count (negative binomial, or Poisson for infinite alpha)."""
+    histogram = _Histogram(defects, boards)
+    k = np.arange(len(histogram.n))
+    mu = histogram.mean
+    log_factorial = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, len(k))))])
+    if math.isfinite(alpha):
+        log_gamma_ratio = np.concatenate([[0.0], np.cumsum(np.log(alpha + k[:-1]))])
+        log_pmf = log_gamma_ratio - log_factorial + alpha * math.log(alpha / (alpha + mu))
+        if mu > 0:
+            log_pmf = log_pmf + k * math.log(mu / (alpha + mu))
+    else:
+        log_pmf = -mu - log_factorial + (k * math.log(mu) if mu > 0 else np.where(k == 0, 0.0, -np.inf))
+    return pd.DataFrame({
+        DEFECTS_COLUMN: k,
+        "Observed Boards": histogram.n,
+        "Fitted Boards": histogram.boards * np.exp(log_pmf),
+    })
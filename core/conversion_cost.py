@@ -0,0 +1,103 @@
+"""Conversion cost of process-mapping sheets against the MMR-EMS master.
+
+``cost_process_map`` is page 5's costing of one sheet: an inner merge on
+Stage / Process Name, then ``VA MC Cost``, ``Batch Set up Cost`` and
+``Labour cost/Hr`` per stage. ``variant_costs`` costs every sheet of a
+workbook (MK0 ... SOP and variants) in one go. The sheets are stacked
+under a ``Variant`` key, merged with MMR-EMS once and costed with a single
+set of column operations, then summed per variant with one groupby.
+"""
+
+import pandas as pd
+
+from core.cost_model import LABOUR_OVERHEAD, MONTHS_PER_YEAR, quote_frame
+from core.profiling import stage_timer
+
+
+VARIANT_COLUMN = "Variant"
+COST_COLUMNS = ["VA MC Cost", "Batch Set up Cost", "Labour cost/Hr"]
+REQUIRED_COLUMNS = ("Stage", "Process Cycle Time", "MMR", "Batch Set up Time", "FTE for Batch Set up", "DL FTE", "IDL FTE")
+
+
+def _add_costs(merged, labour_cost_hr, idl_cost_hr, annual_volume):
+    batch_qty = annual_volume / MONTHS_PER_YEAR if annual_volume > 0 else 1  # Avoid division by zero
+    merged['MMR'] = merged['MMR'].fillna(0)
+    merged['VA MC Cost'] = (merged['Process Cycle Time'] * merged['MMR']).fillna(0)
+    merged['Batch Set up Cost'] = (
+        (((merged['Batch Set up Time'] * labour_cost_hr) / 3600) * LABOUR_OVERHEAD) / batch_qty
+    ) * merged['FTE for Batch Set up']
+    merged['Labour cost/Hr'] = (
+        ((((merged['Process Cycle Time'] * labour_cost_hr) / 3600) * LABOUR_OVERHEAD) * merged['DL FTE']) +
+        ((((merged['Process Cycle Time'] * idl_cost_hr) / 3600) * LABOUR_OVERHEAD) * merged['IDL FTE'])
+    )
+    merged['Batch Set up Cost'] = merged['Batch Set up Cost'].fillna(0)
+    merged['Labour cost/Hr'] = merged['Labour cost/Hr'].fillna(0)
+    return merged
+
+
+@stage_timer("MMR-EMS merge")
+def cost_process_map(process_map, mmr_ems, labour_cost_hr, idl_cost_hr, annual_volume):
+    """Stages of ``process_map`` found in MMR-EMS, with their VA MC, batch set-up and labour cost.
+
+    Raises KeyError when a costing column is missing from both tables.
+    """
+    merged = process_map.merge(mmr_ems, left_on='Stage', right_on='Process Name', how='inner')
+    if not merged.empty:
+        merged.fillna(0, inplace=True)
+    return _add_costs(merged, labour_cost_hr, idl_cost_hr, annual_volume)
+
+
+@stage_timer("process-mapping variants")
+def variant_costs(sheets, mmr_ems, labour_cost_hr, idl_cost_hr, annual_volume, cost_inputs=None):
+    """Per-variant conversion cost table of every process-mapping sheet in ``sheets``.
+
+    Sheets lacking a costing column (in the sheet or in MMR-EMS) are listed
+    with a ``Skipped`` reason instead. Columns a sheet shares with MMR-EMS,
+    such as the ``MMR`` of a sheet saved already costed, are taken from
+    MMR-EMS. With ``cost_inputs`` (``CostModel``
+    inputs such as PCB, NRE and the OHP tier) each variant is also run
+    through the cost chain for its Total and Conversion Cost.
+    Returns ``(summary, stages)``; ``stages`` is the stacked per-stage table.
+    """
+    usable = {}
+    skipped = {}
+    for name, sheet in sheets.items():
+        missing = [column for column in REQUIRED_COLUMNS if column not in sheet.columns and column not in mmr_ems.columns]
+        if missing:
+            skipped[name] = "Missing " + ", ".join(missing)
+            continue
+        # The merge would suffix shared columns (MMR_x / MMR_y), and Variant is the stacking key
+        colliding = [column for column in sheet.columns if column != 'Stage' and (column in mmr_ems.columns or column == VARIANT_COLUMN)]
+        usable[name] = sheet.drop(columns=colliding)
+
+    if usable:
+        stacked = pd.concat(usable, names=[VARIANT_COLUMN, None]).reset_index(level=0)
+        stages = stacked.merge(mmr_ems, left_on='Stage', right_on='Process Name', how='inner')
+        stages = stages.fillna(0)
+        stages = _add_costs(stages, labour_cost_hr, idl_cost_hr, annual_volume)
+        summary = stages.groupby(VARIANT_COLUMN, sort=False)[COST_COLUMNS].sum()
+        summary["Matched Stages"] = stages.groupby(VARIANT_COLUMN, sort=False).size()
+        summary = summary.reindex(list(usable)).fillna(0)
+        summary["Matched Stages"] = summary["Matched Stages"].astype(int)
+        summary["Stages"] = [len(sheet) for sheet in usable.values()]
+        summary["Manufacturing Cost (₹)"] = summary[COST_COLUMNS].sum(axis=1)
+    else:
+        stages = pd.DataFrame(columns=[VARIANT_COLUMN])
+        summary = pd.DataFrame(columns=[*COST_COLUMNS, "Matched Stages", "Stages", "Manufacturing Cost (₹)"])
+
+    if cost_inputs is not None and not summary.empty:
+        inputs = pd.DataFrame({
+            "Total Batch Set up Cost": summary["Batch Set up Cost"],
+            "Total VA MC Cost": summary["VA MC Cost"],
+            "Total Labour cost/Hr": summary["Labour cost/Hr"],
+        })
+        for name, value in cost_inputs.items():
+            inputs[name] = value
+        quoted = quote_frame(inputs, ["Material Cost (₹)", "OH&P (₹)", "Total Cost (₹)", "Conversion Cost (₹)"])
+        summary = summary.join(quoted)
+
+    summary.index.name = VARIANT_COLUMN
+    summary = summary.reset_index()
+    if skipped:
+        summary = pd.concat([summary, pd.DataFrame({VARIANT_COLUMN: list(skipped), "Skipped": list(skipped.values())})], ignore_index=True)
+    return summary, stages
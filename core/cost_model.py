@@ -0,0 +1,240 @@
+"""Should-costing cost chain of page 5 as a memoized formula graph.
+
+Consumables (RTV glue, top / bottom solder paste, wave flux, solder bar)
+feed the input cost, which feeds MOH / FOH / profit on RM and VA, R&D,
+warranty and SG&A, and finally the total, RM and conversion cost. Every
+node is declared once in ``NODES`` with the inputs / nodes it depends on;
+node and input names are the column headers page 5 saves to the costing
+sheet. ``CostModel`` evaluates nodes on demand and caches them; setting an
+input drops only the cached nodes downstream of it, so a widget change
+re-evaluates just that slice of the chain. ``quote`` and ``quote_frame``
+run the same graph without Streamlit, for batch quoting.
+"""
+
+import math
+
+import pandas as pd
+
+
+# Page 5 costing: batch quantity is a month of the annual volume, labour cost carries this multiplier
+MONTHS_PER_YEAR = 12
+LABOUR_OVERHEAD = 1.15
+
+# OHP% model per annual volume tier
+OHP_PERCENTAGES = {
+    "<100K": {"MOH %": 1, "FOH %": 12.5, "Profit on RM %": 1.5, "Profit on VA %": 8, "R&D %": 1, "Warranty %": 1, "SG&A %": 3},
+    ">100K": {"MOH %": 1, "FOH %": 12.5, "Profit on RM %": 1, "Profit on VA %": 8, "R&D %": 2, "Warranty %": 1, "SG&A %": 2},
+    "5K/10K": {"MOH %": 1, "FOH %": 20, "Profit on RM %": 1, "Profit on VA %": 8, "R&D %": 3, "Warranty %": 1, "SG&A %": 4},
+}
+VOLUME_TIERS = tuple(OHP_PERCENTAGES)
+PERCENTAGE_LABELS = ("MOH %", "FOH %", "Profit on RM %", "Profit on VA %", "R&D %", "Warranty %", "SG&A %")
+
+# Input -> default; the material constants are the fixed values shown on page 5
+INPUTS = {
+    # RTV Glue
+    "RTV Wt/Brd Est": 0.0,
+    "RTV Wastage %": 0.0,
+    "RTV Cost/ml": 4.472,
+    "RTV SG": 1.09,
+    # Solder Paste - Top & Bot
+    "Board Length(mm)": 0.0,
+    "Board Width(mm)": 0.0,
+    "Solder Paste SG (g/cc)": 7.31,
+    "Solder Paste Cost(₹/g)": 5.59,
+    "Top Wt Estimate %": 0.0,
+    "Top Wastage %": 0.0,
+    "Top SP Thick(mm)": 0.0,
+    "Bot Wt Estimate %": 0.0,
+    "Bot Wastage %": 0.0,
+    "Bot SP Thick(mm)": 0.0,
+    # Flux Wave Soldering
+    "Flux Wastage %": 0.0,
+    "Flux Cost(₹/ml)": 0.473,
+    # Solder Bar - circumferential and barrel fill
+    "Pad OD (mm)": 0.0,
+    "Pad ID (mm)": 0.0,
+    "Solder Joints": 0.0,
+    "Solder Thick (mm)": 0.6,
+    "Barrel Dia(mm)": 0.0,
+    "Board Thick(mm)": 0.0,
+    "Barrel Joints": 0.0,
+    "Solder Bar Cost(₹/g)": 2.064,
+    "Solder Bar SG": 7.3,
+    # Input cost
+    "PCB (₹)": 0.0,
+    "Electronics Component (₹)": 0.0,
+    "Mechanical Component (₹)": 0.0,
+    "NRE (₹)": 0.0,
+    # OHP% model and the process map's conversion cost totals
+    "Select Annual Volume": "<100K",
+    "Total Batch Set up Cost": 0.0,
+    "Total VA MC Cost": 0.0,
+    "Total Labour cost/Hr": 0.0,
+}
+
+
+def _percentage(label):
+    return lambda tier: OHP_PERCENTAGES[tier][label]
+
+
+def _barrel_solder_vol(barrel_dia, lead_thickness, board_thick):
+    comp_lead_volume_in_the_barrel = math.pi * (((barrel_dia / 2) ** 2) - ((lead_thickness / 2) ** 2)) * board_thick
+    barrel_volume_without_lead = math.pi * ((barrel_dia / 2) ** 2) * board_thick
+    return barrel_volume_without_lead - comp_lead_volume_in_the_barrel
+
+
+# node -> (inputs / nodes it depends on, formula).
+# Listed in dependency order, so the downstream sets below are built in one reverse pass.
+NODES = {
+    # RTV Glue
+    "Wt per Board (Incl Wastage %)": (("RTV Wt/Brd Est", "RTV SG", "RTV Wastage %"), lambda wt, sg, wastage: (wt * sg) * (1 + (wastage / 100))),
+    "RTV Cost Per Board": (("Wt per Board (Incl Wastage %)", "RTV Cost/ml"), lambda wt, cost: wt * cost),
+    # Solder Paste - Top
+    "Top SP Wt (100%)(g)": (("Board Length(mm)", "Board Width(mm)", "Top SP Thick(mm)", "Solder Paste SG (g/cc)"), lambda length, width, thick, sg: (length * width * thick * sg) / 1000),
+    "Top SP Wt Estimate(g)": (("Top SP Wt (100%)(g)", "Top Wt Estimate %", "Top Wastage %"), lambda wt, estimate, wastage: wt * (estimate / 100) * (1 + wastage / 100)),
+    "Top SP Cost/Brd(₹)": (("Top SP Wt Estimate(g)", "Solder Paste Cost(₹/g)"), lambda wt, cost: wt * cost),
+    # Solder Paste - Bottom
+    "Bot SP Wt (100%)(g)": (("Board Length(mm)", "Board Width(mm)", "Bot SP Thick(mm)", "Solder Paste SG (g/cc)"), lambda length, width, thick, sg: (length * width * thick * sg) / 1000),
+    "Bot SP Wt Estimate(g)": (("Bot SP Wt (100%)(g)", "Bot Wt Estimate %", "Bot Wastage %"), lambda wt, estimate, wastage: wt * (estimate / 100) * (1 + wastage / 100)),
+    "Bot SP Cost/Brd(₹)": (("Bot SP Wt Estimate(g)", "Solder Paste Cost(₹/g)"), lambda wt, cost: wt * cost),
+    # Flux Wave Soldering
+    "Flux Area/Brd(mm^2)": (("Board Length(mm)", "Board Width(mm)"), lambda length, width: length * width),
+    "Flux Spray Area(mm^2)": (("Flux Area/Brd(mm^2)", "Flux Wastage %"), lambda area, wastage: ((area / 100) * 0.1) * (1 + wastage / 100)),
+    "Flux Cost Per Board(₹)": (("Flux Spray Area(mm^2)", "Flux Cost(₹/ml)"), lambda area, cost: area * cost),
+    # Solder Bar - circumferential fill (annular ring x solder thickness, at the paste SG)
+    "Solder Vol(mm^3)": (("Pad OD (mm)", "Pad ID (mm)", "Solder Thick (mm)"), lambda od, id_, thick: math.pi * ((od / 2) ** 2 - (id_ / 2) ** 2) * thick),
+    "Solder Wt/Joint(g)": (("Solder Vol(mm^3)", "Solder Paste SG (g/cc)"), lambda vol, sg: (vol / 1000) * sg),
+    "Solder Wt/Brd(g)": (("Solder Wt/Joint(g)", "Solder Joints"), lambda wt, joints: wt * joints),
+    # Solder Bar - barrel fill
+    "Lead Thickness(mm)": (("Barrel Dia(mm)",), lambda barrel_dia: barrel_dia - 0.4),  # as per Ather guidelines
+    "Barrel Solder Vol(mm^3)": (("Barrel Dia(mm)", "Lead Thickness(mm)", "Board Thick(mm)"), _barrel_solder_vol),
+    "Barrel Solder Wt/Joint(g)": (("Barrel Solder Vol(mm^3)", "Solder Bar SG"), lambda vol, sg: (vol / 1000) * sg),  # mm³ to cm³
+    "Barrel Solder Wt/Brd(g)": (("Barrel Solder Wt/Joint(g)", "Barrel Joints"), lambda wt, joints: wt * joints),
+    "Total Solder Wt(g)": (("Solder Wt/Brd(g)", "Barrel Solder Wt/Brd(g)"), lambda circumferential, barrel: circumferential + barrel),
+    "Solder Bar Cost/Brd(₹)": (("Total Solder Wt(g)", "Solder Bar Cost(₹/g)"), lambda wt, cost: wt * cost),
+    # Input cost
+    "Consumables (₹)": (
+        ("RTV Cost Per Board", "Top SP Cost/Brd(₹)", "Bot SP Cost/Brd(₹)", "Flux Cost Per Board(₹)", "Solder Bar Cost/Brd(₹)"),
+        lambda rtv, top, bot, flux, solder_bar: rtv + top + bot + flux + solder_bar,
+    ),
+    "PCB & Component Cost (₹)": (("PCB (₹)", "Electronics Component (₹)", "Mechanical Component (₹)"), lambda pcb, electronics, mech: pcb + electronics + mech),
+    # OHP% Model Vs. Ann. Volume
+    **{label: (("Select Annual Volume",), _percentage(label)) for label in PERCENTAGE_LABELS},
+    # Cost Computation
+    "Material Cost (₹)": (("PCB & Component Cost (₹)", "NRE (₹)"), lambda rm, nre: rm + nre),
+    "Manufacturing Cost (₹)": (("Total Batch Set up Cost", "Total VA MC Cost", "Total Labour cost/Hr"), lambda batchsetup, vamachine, labour: batchsetup + vamachine + labour),
+    "MOH (₹)": (("PCB & Component Cost (₹)", "MOH %"), lambda rm, pct: rm * (pct / 100)),
+    "FOH (₹)": (("Manufacturing Cost (₹)", "FOH %"), lambda va, pct: va * (pct / 100)),
+    "Profit on RM (₹)": (("PCB & Component Cost (₹)", "Profit on RM %"), lambda rm, pct: rm * (pct / 100)),
+    "Profit on VA (₹)": (("Manufacturing Cost (₹)", "Profit on VA %"), lambda va, pct: va * (pct / 100)),
+    "OH&P (₹)": (("MOH (₹)", "FOH (₹)", "Profit on RM (₹)", "Profit on VA (₹)"), lambda moh, foh, profit_rm, profit_va: moh + foh + profit_rm + profit_va),
+    "R&D (₹)": (("Material Cost (₹)", "Manufacturing Cost (₹)", "R&D %"), lambda material, manufacturing, pct: (material + manufacturing) * (pct / 100)),
+    "Warranty (₹)": (("Material Cost (₹)", "Manufacturing Cost (₹)", "Warranty %"), lambda material, manufacturing, pct: (material + manufacturing) * (pct / 100)),
+    "SG&A (₹)": (("Material Cost (₹)", "Manufacturing Cost (₹)", "SG&A %"), lambda material, manufacturing, pct: (material + manufacturing) * (pct / 100)),
+    # Cost Summary
+    "Total Cost (₹)": (
+        ("Material Cost (₹)", "Manufacturing Cost (₹)", "MOH (₹)", "FOH (₹)", "Profit on RM (₹)", "Profit on VA (₹)", "R&D (₹)", "Warranty (₹)", "SG&A (₹)"),
+        lambda material, manufacturing, moh, foh, profit_rm, profit_va, r_n_d, warranty, sg_and_a: (
+            (material + manufacturing) + moh + foh + profit_rm + profit_va + r_n_d + warranty + sg_and_a
+        ),
+    ),
+    "RM Cost (₹)": (("Material Cost (₹)",), lambda material: material),
+    "Conversion Cost (₹)": (("Total Cost (₹)", "Material Cost (₹)"), lambda total, material: total - material),
+}
+
+# Columns page 5 writes to the first row of the costing sheet, in sheet order
+SAVE_COLUMNS = (
+    'RTV Wt/Brd Est', 'RTV Wastage %', 'RTV Cost/ml', 'RTV SG', 'Wt per Board (Incl Wastage %)', 'RTV Cost Per Board',  # RTV Glue section
+    "Board Length(mm)", "Board Width(mm)", "Top Wt Estimate %", "Top Wastage %", "Solder Paste SG (g/cc)", "Solder Paste Cost(₹/g)", "Top SP Thick(mm)", "Top SP Wt (100%)(g)", "Top SP Wt Estimate(g)", "Top SP Cost/Brd(₹)",  # Solder Paste - Top section
+    "Bot Wt Estimate %", "Bot Wastage %", "Bot SP Thick(mm)", "Bot SP Wt (100%)(g)", "Bot SP Wt Estimate(g)", "Bot SP Cost/Brd(₹)",  # Solder Paste - Bottom section
+    "Flux Wastage %", "Flux Cost(₹/ml)", "Flux Area/Brd(mm^2)", "Flux Spray Area(mm^2)", "Flux Cost Per Board(₹)",  # Flux Wave Soldering section
+    "Pad OD (mm)", "Pad ID (mm)", "Solder Joints", "Solder Thick (mm)", "Solder Vol(mm^3)", "Solder Wt/Joint(g)", "Solder Wt/Brd(g)",  # Circumferential Fill Solder Bar
+    "Barrel Dia(mm)", "Board Thick(mm)", "Barrel Joints", "Lead Thickness(mm)", "Solder Bar Cost(₹/g)", "Barrel Solder Vol(mm^3)", "Barrel Solder Wt/Joint(g)", "Barrel Solder Wt/Brd(g)", "Total Solder Wt(g)", "Solder Bar Cost/Brd(₹)",  # Barrel Fill Solder Bar
+    "PCB (₹)", "Electronics Component (₹)", "Mechanical Component (₹)", "NRE (₹)", "Consumables (₹)",  # Input Cost section
+    "Select Annual Volume", *PERCENTAGE_LABELS,  # OHP% Model Vs. Ann. Volume section
+    "MOH (₹)", "Profit on RM (₹)", "FOH (₹)", "Profit on VA (₹)", "Material Cost (₹)", "Manufacturing Cost (₹)", "OH&P (₹)", "R&D (₹)", "Warranty (₹)", "SG&A (₹)",  # Cost Computation section
+    "Total Cost (₹)", "RM Cost (₹)", "Conversion Cost (₹)",  # Cost Summary section
+)
+
+# Saved costing sheets have always held these paste / flux percentages as fractions
+SAVED_AS_FRACTION = ("Top Wt Estimate %", "Top Wastage %", "Bot Wt Estimate %", "Bot Wastage %", "Flux Wastage %")
+
+
+def _downstream():
+    children = {name: [] for name in (*INPUTS, *NODES)}
+    for label, (deps, _) in NODES.items():
+        for dep in deps:
+            children[dep].append(label)
+    downstream = {}
+    for name in reversed(tuple(children)):
+        reached = set(children[name])
+        for child in children[name]:
+            reached |= downstream[child]
+        downstream[name] = reached
+    return {name: downstream[name] for name in INPUTS}
+
+
+DOWNSTREAM = _downstream()
+
+
+class CostModel:
+    """Inputs and cached node values of one costing, kept across Streamlit reruns."""
+
+    def __init__(self, **inputs):
+        self.inputs = dict(INPUTS)
+        self.values = {}
+        self.evaluations = 0
+        self.set_inputs(inputs)
+
+    def set_input(self, name, value):
+        if name not in INPUTS:
+            raise KeyError(f"Unknown cost model input: {name}")
+        if self.inputs[name] == value:
+            return
+        if name == "Select Annual Volume" and value not in OHP_PERCENTAGES:
+            raise ValueError(f"Unknown annual volume tier {value!r}; expected one of {', '.join(VOLUME_TIERS)}")
+        self.inputs[name] = value
+        for label in DOWNSTREAM[name]:
+            self.values.pop(label, None)
+
+    def set_inputs(self, inputs):
+        for name, value in inputs.items():
+            self.set_input(name, value)
+
+    def __getitem__(self, label):
+        if label in self.inputs:
+            return self.inputs[label]
+        if label not in self.values:
+            deps, formula = NODES[label]
+            self.values[label] = formula(*[self[dep] for dep in deps])
+            self.evaluations += 1
+        return self.values[label]
+
+    def row(self):
+        """Values of ``SAVE_COLUMNS`` as page 5 writes them to the costing sheet."""
+        return {
+            column: self[column] / 100 if column in SAVED_AS_FRACTION else self[column]
+            for column in SAVE_COLUMNS
+        }
+
+
+def quote(inputs, labels=None):
+    """Evaluate the cost chain for one set of inputs; returns ``{node: value}``."""
+    model = CostModel(**inputs)
+    return {label: model[label] for label in (labels or NODES)}
+
+
+def quote_frame(frame, labels=None):
+    """Quote every row of ``frame`` (columns named after ``INPUTS``; blanks take the default).
+
+    One model is reused down the rows, so a row only re-evaluates the nodes
+    downstream of the inputs that differ from the previous row.
+    """
+    labels = list(labels or NODES)
+    columns = [column for column in frame.columns if column in INPUTS]
+    model = CostModel()
+    quotes = []
+    for record in frame[columns].to_dict("records"):
+        model.set_inputs({name: INPUTS[name] if pd.isna(value) else value for name, value in record.items()})
+        quotes.append([model[label] for label in labels])
+    return pd.DataFrame(quotes, columns=labels, index=frame.index)
@@ -0,0 +1,139 @@
+"""Total Cost of page 5 swept over annual volume, product life, labour rate and OHP tier.
+
+The grand total is linear in the process-map totals and the OHP%
+percentages:
+
+    Total = M * (1 + R&D% + Warranty% + SG&A%)
+          + F * (1 + FOH% + Profit on VA% + R&D% + Warranty% + SG&A%)
+          + RM * (MOH% + Profit on RM%)
+
+where RM is PCB + components, M = RM + NRE per unit and F = batch set-up +
+VA machine + labour cost. The process map is therefore reduced once to a
+few sums. Each parameter then gets its own broadcast axis, so the whole
+(volume, life, labour, tier) grid evaluates in one NumPy pass. Batch set-up
+cost falls with the monthly batch size and NRE per unit with the product
+volume; labour enters through the batch set-up and DL cost.
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.cost_model import LABOUR_OVERHEAD, MONTHS_PER_YEAR, OHP_PERCENTAGES, VOLUME_TIERS
+from core.nre import nre_per_unit
+from core.profiling import stage_timer
+
+
+def process_map_totals(process_map):
+    """Per-unit coefficients of the merged process map / MMR-EMS table.
+
+    ``va`` is the VA MC Cost total. ``batch_setup`` and ``dl`` are
+    seconds x FTE, to be multiplied by the labour rate. ``idl`` is
+    seconds x IDL FTE, taken at the IDL rate.
+    """
+    def column(name):
+        return pd.to_numeric(process_map[name], errors="coerce").to_numpy(dtype=float)
+
+    cycle_time = column("Process Cycle Time")
+    va = cycle_time * column("MMR")
+    batch_setup = column("Batch Set up Time") * column("FTE for Batch Set up")
+    dl = cycle_time * column("DL FTE")
+    idl = cycle_time * column("IDL FTE")
+    # The page fills a row's cost with 0 when any of its inputs is missing
+    labour_valid = ~(np.isnan(dl) | np.isnan(idl))
+    return {
+        "va": np.nansum(va),
+        "batch_setup": np.nansum(batch_setup),
+        "dl": dl[labour_valid].sum(),
+        "idl": idl[labour_valid].sum(),
+    }
+
+
+@stage_timer("cost sweep")
+def sweep_total_cost(process_map, annual_volumes, product_lives, labour_rates, idl_cost_hr, rm_cost,
+                     tiers=VOLUME_TIERS, nre_unit_prices=(), nre_life_cycles=(), tool_maintenance_rate=0.0):
+    """Total Cost over the grid ``annual_volumes x product_lives x labour_rates x tiers``.
+
+    Returns a dict with the four axes and ``total``, ``material`` and
+    ``manufacturing`` arrays of shape (volumes, lives, labour rates, tiers).
+    """
+    volumes = np.asarray(annual_volumes, dtype=float)
+    lives = np.asarray(product_lives, dtype=float)
+    labour = np.asarray(labour_rates, dtype=float)
+    tiers = list(tiers)
+    totals = process_map_totals(process_map)
+
+    # Broadcast axes: volume (V, 1, 1, 1), life (1, L, 1, 1), labour (1, 1, R, 1), tier (1, 1, 1, T)
+    v = volumes[:, None, None, None]
+    life = lives[None, :, None, None]
+    rate = labour[None, None, :, None]
+    pct = {
+        label: np.array([OHP_PERCENTAGES[tier][label] for tier in tiers], dtype=float)[None, None, None, :] / 100
+        for label in OHP_PERCENTAGES[tiers[0]]
+    }
+
+    batch_qty = np.where(v > 0, v / MONTHS_PER_YEAR, 1.0)
+    batch_setup = (totals["batch_setup"] * rate / 3600 * LABOUR_OVERHEAD) / batch_qty
+    labour_cost = (totals["dl"] * rate + totals["idl"] * idl_cost_hr) / 3600 * LABOUR_OVERHEAD
+    manufacturing = batch_setup + totals["va"] + labour_cost  # (V, 1, R, 1)
+
+    nre = nre_per_unit(nre_unit_prices, nre_life_cycles, v * life, tool_maintenance_rate)  # (V, L, 1, 1)
+    material = rm_cost + nre
+
+    shared = pct["R&D %"] + pct["Warranty %"] + pct["SG&A %"]
+    total = (
+        material * (1 + shared)
+        + manufacturing * (1 + pct["FOH %"] + pct["Profit on VA %"] + shared)
+        + rm_cost * (pct["MOH %"] + pct["Profit on RM %"])
+    )
+    shape = (len(volumes), len(lives), len(labour), len(tiers))
+    return {
+        "annual_volumes": volumes,
+        "product_lives": lives,
+        "labour_rates": labour,
+        "tiers": tiers,
+        "total": np.broadcast_to(total, shape),
+        "material": np.broadcast_to(material, shape),
+        "manufacturing": np.broadcast_to(manufacturing, shape),
+    }
+
+
+def sweep_frame(result):
+    """Long table of the sweep, one row per grid point."""
+    index = pd.MultiIndex.from_product(
+        [result["annual_volumes"], result["product_lives"], result["labour_rates"], result["tiers"]],
+        names=["Annual Volume", "Product Life", "Labour cost/Hr", "OHP Tier"],
+    )
+    return pd.DataFrame({
+        "Material Cost (₹)": result["material"].ravel(),
+        "Manufacturing Cost (₹)": result["manufacturing"].ravel(),
+        "Total Cost (₹)": result["total"].ravel(),
+    }, index=index).reset_index()
+
+
+def break_even_volumes(result, price):
+    """Smallest annual volume at which Total Cost drops to ``price``, per life, labour rate and tier.
+
+    Interpolates linearly between grid volumes (ascending order expected);
+    NaN where the cost stays above the price over the whole grid.
+    """
+    volumes = result["annual_volumes"]
+    total = result["total"]
+    below = total <= price
+    first = below.argmax(axis=0)  # (L, R, T)
+    found = below.any(axis=0)
+
+    # Interpolate between the last grid volume above the price and the first at or below it
+    previous = np.maximum(first - 1, 0)
+    cost_at = np.take_along_axis(total, first[None], axis=0)[0]
+    cost_before = np.take_along_axis(total, previous[None], axis=0)[0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(cost_before > cost_at, (cost_before - price) / (cost_before - cost_at), 1.0)
+    volume = volumes[previous] + np.clip(fraction, 0, 1) * (volumes[first] - volumes[previous])
+    volume = np.where(first == 0, volumes[0], volume)
+    volume = np.where(found, volume, np.nan)
+
+    index = pd.MultiIndex.from_product(
+        [result["product_lives"], result["labour_rates"], result["tiers"]],
+        names=["Product Life", "Labour cost/Hr", "OHP Tier"],
+    )
+    return pd.DataFrame({"Break-even Annual Volume": volume.ravel()}, index=index).reset_index()
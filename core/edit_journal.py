@@ -0,0 +1,245 @@
+"""Undo/redo journal of the data-editor tables on pages 1, 2 and 4.
+
+Every change to a table is appended to the journal as a small operation:
+cells set, a blank row inserted at a position, or a row deleted. Undo and
+redo only move the journal position, and a new edit after an undo drops
+the redo tail. The table itself is not copied per edit. It is rebuilt for
+a position from the nearest checkpoint at or before it, replaying at most
+``CHECKPOINT_EVERY`` operations. Checkpoints are stored as
+``sheet_edits.SheetPatch`` differences from the sheet's original in
+``workbook_cache.original_sheets``, which is shared and never copied.
+
+``journal_for`` keeps one journal per session on its ``SheetEdits``: only
+the selected file and sheet have a history, and selecting another one drops
+it. The journal's checkpoints, cached table and deleted rows count against
+the session cap of ``SHEET_EDITS_MAX_MB``.
+
+Cell edits are read from the data editor's own widget state
+(``edited_rows``), so only what the user typed is journaled. ``version``
+changes whenever the editor has to be rebuilt from the journal (an insert,
+delete, undo, redo or amend); the pages use it in the editor's key.
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.sheet_edits import SheetPatch
+
+
+CHECKPOINT_EVERY = 20
+
+
+def _same_values(a, b):
+    # Value equality that ignores dtype changes from the editor's round trip
+    if a.shape != b.shape or not a.columns.equals(b.columns):
+        return False
+    for column in a.columns:
+        left, right = a[column].to_numpy(), b[column].to_numpy()
+        try:
+            equal = np.asarray(left == right, dtype=bool)
+        except (TypeError, ValueError):
+            return False
+        if equal.shape != left.shape or not (equal | (pd.isna(left) & pd.isna(right))).all():
+            return False
+    return True
+
+
+def _set_cells(frame, cells):
+    for column, group in pd.DataFrame(cells, columns=["row", "column", "value"]).groupby("column", sort=False):
+        values = frame[column].to_numpy(copy=True)
+        new_values = np.asarray(group["value"].tolist())
+        if not np.can_cast(new_values.dtype, values.dtype, casting="same_kind"):
+            values = values.astype(object)
+        values[group["row"].to_numpy(dtype=int)] = new_values
+        frame[column] = values
+    return frame
+
+
+def _apply(frame, operation):
+    kind = operation[0]
+    if kind == "cells":
+        return _set_cells(frame, operation[1])
+    if kind == "insert":
+        position = operation[1]
+        new_row = pd.DataFrame({col: [np.nan] for col in frame.columns})
+        return pd.concat([frame.iloc[:position], new_row, frame.iloc[position:]]).reset_index(drop=True)
+    if kind == "delete":
+        return frame.drop(frame.index[operation[1]]).reset_index(drop=True)
+    raise ValueError(f"Unknown journal operation {kind!r}")
+
+
+def _frame_bytes(frame):
+    return int(frame.memory_usage(deep=True).sum())
+
+
+class EditJournal:
+    """Undo/redo history of one table (see module docstring).
+
+    ``base`` is the shared original the table was loaded from; it is read,
+    never modified. Without it the journal keeps its own copy of ``frame``.
+    """
+
+    def __init__(self, frame, base=None, checkpoint_every=CHECKPOINT_EVERY):
+        self.checkpoint_every = checkpoint_every
+        self.version = 0
+        self.position = 0
+        self._base = frame.copy() if base is None else base
+        self._operations = []
+        self._checkpoints = {0: None}  # position -> SheetPatch or frame; None is the base itself
+        self._cache = (0, self._base)
+        self._cache_bytes = 0
+        if base is not None and not _same_values(frame, base):
+            # The table starts from earlier edits of the sheet
+            self._checkpoints[0] = self._snapshot(frame)
+            self._set_cache(0, self._restore(self._checkpoints[0]))
+        self._seen = {}
+
+    def _set_cache(self, position, frame):
+        self._cache = (position, frame)
+        self._cache_bytes = None  # measured by nbytes when asked
+
+    def nbytes(self):
+        """Bytes held beyond the shared original: checkpoints, the cached table and deleted rows."""
+        if self._cache_bytes is None:
+            self._cache_bytes = 0 if self._cache[1] is self._base else _frame_bytes(self._cache[1])
+        total = self._cache_bytes
+        for checkpoint in self._checkpoints.values():
+            if isinstance(checkpoint, SheetPatch):
+                total += checkpoint.nbytes
+            elif checkpoint is not None:
+                total += _frame_bytes(checkpoint)
+        for operation in self._operations:
+            if operation[0] == "delete":
+                total += _frame_bytes(operation[2])
+        return total
+
+    @property
+    def can_undo(self):
+        return self.position > 0
+
+    @property
+    def can_redo(self):
+        return self.position < len(self._operations)
+
+    def _snapshot(self, frame):
+        if len(self._base) and self._base.columns.is_unique and frame.columns.is_unique:
+            return SheetPatch(self._base, frame)
+        return frame.copy()
+
+    def _restore(self, checkpoint):
+        if checkpoint is None:
+            return self._base.copy()
+        if isinstance(checkpoint, SheetPatch):
+            return checkpoint.apply(self._base)
+        return checkpoint.copy()
+
+    def _materialize(self, position):
+        # The cached table; callers that hand it out copy it
+        cached_position, cached = self._cache
+        if cached_position == position:
+            return cached
+        start = max(point for point in self._checkpoints if point <= position)
+        frame = self._restore(self._checkpoints[start])
+        for step in range(start, position):
+            frame = _apply(frame, self._operations[step])
+            if (step + 1) % self.checkpoint_every == 0 and step + 1 not in self._checkpoints:
+                self._checkpoints[step + 1] = self._snapshot(frame)
+        self._set_cache(position, frame)
+        return frame
+
+    def frame(self, position=None):
+        """The table at ``position`` (default: the current one), as a new frame."""
+        return self._materialize(self.position if position is None else position).copy()
+
+    def _append(self, operation, rebuild=True):
+        # A new edit after an undo drops the redo tail
+        del self._operations[self.position:]
+        self._checkpoints = {point: checkpoint for point, checkpoint in self._checkpoints.items() if point <= self.position}
+        cached_position, cached = self._cache
+        if cached_position == self.position:
+            # The cache is private, except at the start where it is the base
+            self._set_cache(self.position + 1, _apply(cached.copy() if cached is self._base else cached, operation))
+        self._operations.append(operation)
+        self.position += 1
+        if rebuild:
+            self._rebuilt()
+
+    def _rebuilt(self):
+        self.version += 1
+        self._seen = {}
+
+    def set_cells(self, cells):
+        """Journal ``(row position, column, value)`` cell changes as one operation."""
+        if cells:
+            self._append(("cells", list(cells)))
+
+    def record_editor(self, editor_state):
+        """Journal the cell edits of the data editor's widget state made since the last call."""
+        cells = []
+        columns = set(self._cache[1].columns)
+        for row, changes in (editor_state or {}).get("edited_rows", {}).items():
+            for column, value in changes.items():
+                if column not in columns:
+                    continue
+                key = (int(row), column)
+                if key not in self._seen or self._seen[key] != value:
+                    self._seen[key] = value
+                    cells.append((int(row), column, value))
+        if cells:
+            # The editor already shows these edits, so it is not rebuilt
+            self._append(("cells", cells), rebuild=False)
+
+    def insert_row(self, position):
+        """Insert a blank row before ``position`` (the row count appends it)."""
+        self._append(("insert", int(position)))
+
+    def delete_row(self, position):
+        """Delete the row at ``position``; the row is kept in the journal for ``removed_rows``."""
+        self._append(("delete", int(position), self._materialize(self.position).iloc[[int(position)]]))
+
+    def amend(self, frame):
+        """Make ``frame`` the table at the current position without adding an undo step.
+
+        For values derived from the table, such as page 4's calculated rows,
+        so that recalculating after an undo keeps the redo history (unless
+        the row count changed). Returns True when the table changed.
+        """
+        current = self._materialize(self.position)
+        if _same_values(frame, current):
+            return False
+        if frame.shape != current.shape:
+            # Later operations address rows by position, which no longer hold
+            del self._operations[self.position:]
+        self._checkpoints = {point: checkpoint for point, checkpoint in self._checkpoints.items() if point < self.position}
+        self._checkpoints[self.position] = self._snapshot(frame)
+        self._set_cache(self.position, frame.copy())
+        self._rebuilt()
+        return True
+
+    def undo(self):
+        if self.can_undo:
+            self.position -= 1
+            self._rebuilt()
+
+    def redo(self):
+        if self.can_redo:
+            self.position += 1
+            self._rebuilt()
+
+    def removed_rows(self):
+        """Rows deleted by the operations up to the current position, in deletion order."""
+        rows = [operation[2] for operation in self._operations[:self.position] if operation[0] == "delete"]
+        return pd.concat(rows) if rows else pd.DataFrame()
+
+
+def journal_for(edits, file_id, sheet_name, frame):
+    """The journal of the selected sheet, kept on ``edits`` (the session's ``SheetEdits``).
+
+    A journal for another file or sheet is dropped and a new one started
+    from ``frame`` on the sheet's shared original.
+    """
+    key = (file_id, sheet_name)
+    if edits.journal is None or edits.journal[0] != key:
+        edits.journal = (key, EditJournal(frame, base=edits.original(sheet_name)))
+    edits.enforce_limit()
+    return edits.journal[1]
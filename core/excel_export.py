@@ -0,0 +1,42 @@
+"""Streaming Excel export for large frames.
+
+``pd.ExcelWriter`` with openpyxl (and the cell-by-cell loops the pages used
+to run on top of it) builds a Cell object for every value and keeps the
+whole workbook in memory until it is saved. Here the workbook is opened in
+openpyxl's write-only mode and every frame is appended a whole row at a
+time, so rows are serialised as they are written. Values are converted to
+Python objects ``SLICE_ROWS`` rows at a time, so memory stays flat no
+matter how many placements a board has.
+"""
+
+from core.lazy_import import lazy_module
+
+
+openpyxl = lazy_module("openpyxl")
+
+SLICE_ROWS = 10000
+
+
+def _column_values(series):
+    # NaN / NaT / pd.NA become empty cells, like DataFrame.to_excel
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def iter_frame_rows(frame, header=True):
+    """Yield plain-Python rows of ``frame``, header first."""
+    if header:
+        yield list(frame.columns)
+    for start in range(0, len(frame), SLICE_ROWS):
+        rows = frame.iloc[start:start + SLICE_ROWS]
+        yield from zip(*[_column_values(rows.iloc[:, i]) for i in range(rows.shape[1])])
+
+
+def write_sheets(sheets, file):
+    """Write ``{sheet name: DataFrame}`` to ``file`` (a path or a binary buffer)."""
+    workbook = openpyxl.Workbook(write_only=True)
+    for name, frame in sheets.items():
+        worksheet = workbook.create_sheet(title=name)
+        for row in iter_frame_rows(frame):
+            worksheet.append(row)
+    workbook.save(file)
+    return file
@@ -0,0 +1,123 @@
+"""Hashed package index over SMD_Package_Feeder_Master.
+
+Page 1 used to ``merge`` every xydata row against the feeder master and
+then filter ``Topbottom`` twice to get the top / bottom pick-and-place time.
+``FeederIndex`` hashes the master's Package_Master keys once (memoized per
+file digest, so reruns and further boards reuse it). A board's packages are
+factorized into category codes, mapped through the index and reduced with a
+single ``np.bincount`` per side. Results are identical to the merge,
+duplicate master rows included.
+
+Packages are matched on a normalised key: integral numbers become their
+digits, so a package stored as the number 402 in the Excel feeder master
+matches ``402`` read as text from a CSV placement file.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+from core.master_data import load_master_data
+from core.profiling import stage_timer
+from core.workbook_cache import read_bytes
+
+
+FEEDER_MASTER_SHEET = "SMD_Package_Feeder_Master"
+PACKAGE_COLUMN = "Package"
+MASTER_KEY_COLUMN = "Package_Master"
+CYCLE_TIME_COLUMN = "Cycle Time_Master"
+SIDE_COLUMN = "Topbottom"
+
+# Topbottom value -> side slot in the grouped reduction; anything else lands in slot 2
+SIDES = {"YES": 0, "NO": 1}
+
+MEMO_ENTRIES = 8
+_memo = OrderedDict()
+
+
+def _package_key(value):
+    if isinstance(value, (bool, np.bool_)):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return str(value)
+    if isinstance(value, (float, np.floating)) and not np.isnan(value):
+        return str(int(value)) if float(value).is_integer() else str(value)
+    return value
+
+
+def package_keys(packages):
+    """Match keys of ``packages``: integral numbers as their digits, everything else unchanged."""
+    # Normalise the distinct packages only
+    codes, uniques = pd.factorize(pd.Series(packages), use_na_sentinel=False)
+    keys = np.array([_package_key(value) for value in uniques], dtype=object)
+    return pd.Index(keys[codes], dtype=object)
+
+
+class FeederIndex:
+    """Package_Master -> cycle time lookup built once per feeder master."""
+
+    def __init__(self, feeder_master):
+        self.master = feeder_master.reset_index(drop=True)
+        keys = pd.Series(package_keys(self.master[MASTER_KEY_COLUMN]))
+        self._keys = keys.to_numpy()
+        cycle_times = pd.to_numeric(self.master[CYCLE_TIME_COLUMN], errors="coerce")
+
+        # A left merge repeats an xydata row once per matching master row, so its
+        # cycle-time total per package is the sum over all duplicates
+        grouped = cycle_times.groupby(keys, sort=False, dropna=False).sum()
+        self.packages = pd.Index(grouped.index)
+        self.cycle_time = np.append(grouped.to_numpy(dtype=float), 0.0)  # last slot: unmatched
+        self.unique = keys.is_unique
+        self.first_row = np.append(pd.Index(keys).get_indexer(self.packages) if self.unique else np.zeros(0, dtype=np.int64), -1)
+
+    def codes(self, packages):
+        """Index code of each package, ``len(self.packages)`` where it has no master row."""
+        # Factorize first: a board has millions of rows but only a few hundred distinct packages
+        board_codes, board_packages = pd.factorize(pd.Series(packages), use_na_sentinel=False)
+        lookup = self.packages.get_indexer(package_keys(board_packages))
+        lookup[lookup < 0] = len(self.packages)
+        return lookup[board_codes]
+
+    def pnp_cycle_times(self, xydata, codes=None):
+        """Top and bottom pick-and-place time: ``Cycle Time_Master`` summed by ``Topbottom``.
+
+        Pass ``codes`` from ``self.codes`` to reuse one package lookup for ``join`` too.
+        """
+        codes = self.codes(xydata[PACKAGE_COLUMN]) if codes is None else codes
+        cycle_time = self.cycle_time[codes]
+        side = xydata[SIDE_COLUMN].map(SIDES).fillna(2).to_numpy(dtype=np.int64)
+        totals = np.bincount(side, weights=cycle_time, minlength=3)
+        return {"top": totals[SIDES["YES"]], "bottom": totals[SIDES["NO"]]}
+
+    @stage_timer("xydata merge")
+    def join(self, xydata, codes=None):
+        """Same frame as ``xydata.merge(master, left_on="Package", right_on="Package_Master", how="left")``."""
+        overlap = set(xydata.columns) & set(self.master.columns)
+        if not self.unique or overlap or not self.master.columns.is_unique:
+            # Duplicate keys or clashing column names need merge's row repetition / suffixes
+            # (on the normalised keys; merge adds them as a "key_0" column)
+            board_keys = package_keys(xydata[PACKAGE_COLUMN]).to_numpy()
+            return xydata.merge(self.master, left_on=board_keys, right_on=self._keys, how="left").drop(columns="key_0")
+
+        codes = self.codes(xydata[PACKAGE_COLUMN]) if codes is None else codes
+        rows = self.first_row[codes]
+        # Row -1 (no master row) fills NaN and upcasts only when it occurs, as in the left merge
+        matched = pd.DataFrame({
+            column: take(self.master[column].to_numpy(), rows, allow_fill=True)
+            for column in self.master.columns
+        })
+        return pd.concat([xydata.reset_index(drop=True), matched], axis=1)
+
+
+def feeder_index_for_file(file):
+    """FeederIndex of the feeder master sheet in ``file``, memoized by file digest."""
+    digest = hashlib.sha256(read_bytes(file)).hexdigest()
+    if digest not in _memo:
+        _memo[digest] = FeederIndex(load_master_data(file, [FEEDER_MASTER_SHEET])[FEEDER_MASTER_SHEET])
+        while len(_memo) > MEMO_ENTRIES:
+            _memo.popitem(last=False)
+    _memo.move_to_end(digest)
+    return _memo[digest]
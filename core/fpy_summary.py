@@ -0,0 +1,165 @@
+"""FPY Prediction Summary: per-stage cycle time / takt / throughput metrics.
+
+The Homepage computes these for every MK/X/SOP sheet of one uploaded
+process-mapping workbook. The same computation runs headless over a whole
+directory of workbooks, spread across a process pool:
+
+    python -m core.fpy_summary <directory> [-o summary.parquet|summary.xlsx] [-w WORKERS]
+
+The consolidated output has one row per workbook, sheet and metric.
+Workbooks or sheets that cannot be summarised are listed in an error table
+(the "Errors" sheet of the Excel output, or ``<output>.errors.csv`` next to a
+Parquet file) rather than aborting the run.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from core.excel_export import write_sheets
+from core.workbook_cache import read_excel_cached
+
+
+STAGE_SHEET_PREFIXES = ('MK', 'X', "X1", 'SOP', "X1.1", "X1.2", "X1.3", "mk", "poc", "x", "x1.1", "x1.2", "x1.3")
+
+STAGE_METRICS = ['End to End Cycle Time', 'Desired Takt Time', 'Desired Trough Put(UPH)', 'Cycle Time', 'Actual Trough Put', 'Annual Volume', 'Batch Qty']
+STAGE_UOMS = ['Minute', 'Minute', 'Units/hour', 'Minute', 'Units/shift', 'nos', 'nos']
+
+# 24 h a day less three 45 minute breaks, in minutes
+AVAILABLE_TIME_PER_DAY = 24 * 60 - (3 * 45)
+
+WORKBOOK_PATTERNS = ("*.xlsx", "*.xlsm")
+SUMMARY_COLUMNS = ["Workbook", "Sheet", "Metric", "UOM", "Value"]
+ERROR_COLUMNS = ["Workbook", "Sheet", "Error"]
+
+
+def stage_sheet_names(sheets):
+    # Filter sheet names that start with 'MK', 'X', or 'SOP'
+    return [sheet for sheet in sheets if sheet.startswith(STAGE_SHEET_PREFIXES)]
+
+
+def stage_metrics(df_table):
+    """Return the STAGE_METRICS values for one stage sheet, in order."""
+    annual_vol_nos = df_table.at[0, 'Annual Volume']
+    batch_qty = annual_vol_nos / 12
+    end_to_end_cycle_time = df_table.at[0, 'Total Cycle Time, sec'] / 60  # Convert seconds to minutes
+    desired_takt_time = AVAILABLE_TIME_PER_DAY / (batch_qty / 24)
+    desired_trough_put = ((batch_qty / 24) / AVAILABLE_TIME_PER_DAY) * 60
+    cycle_time = df_table.at[0, 'Max Overall PCBA CT'] / 60
+    actual_trough_put = AVAILABLE_TIME_PER_DAY / cycle_time
+    return [end_to_end_cycle_time, desired_takt_time, desired_trough_put, cycle_time, actual_trough_put, annual_vol_nos, batch_qty]
+
+
+def stage_summary(sheets, sheet_names=None):
+    """Collect the metrics of every stage sheet into one long-format frame.
+
+    One row per (Sheet, Metric, UOM, Value); nothing is merged or copied per
+    sheet, so the cost is linear in the number of sheets.
+    """
+    sheet_names = stage_sheet_names(sheets) if sheet_names is None else list(sheet_names)
+    values = [value for sheet_name in sheet_names for value in stage_metrics(sheets[sheet_name])]
+    return pd.DataFrame({
+        "Sheet": [sheet_name for sheet_name in sheet_names for _ in STAGE_METRICS],
+        "Metric": STAGE_METRICS * len(sheet_names),
+        "UOM": STAGE_UOMS * len(sheet_names),
+        "Value": pd.to_numeric(pd.Series(values, dtype=object), errors="coerce"),
+    })
+
+
+def pivot_stage_summary(long_summary):
+    """Pivot a long stage summary into the Metric / UOM / one-column-per-sheet table."""
+    sheet_names = list(dict.fromkeys(long_summary["Sheet"]))
+    wide = long_summary.pivot(index=["Metric", "UOM"], columns="Sheet", values="Value")
+    # Keep the metric order of the page and the sheet order of the workbook
+    wide = wide.reindex(index=pd.MultiIndex.from_arrays([STAGE_METRICS, STAGE_UOMS], names=["Metric", "UOM"]), columns=sheet_names)
+    wide.columns.name = None
+    return wide.reset_index()
+
+
+def summarize_workbook(path, workbook=None):
+    """Summarise every stage sheet of one workbook.
+
+    ``workbook`` is the label written to the Workbook column (default: the
+    file name). Returns ``(rows, errors)`` as lists of tuples matching SUMMARY_COLUMNS
+    and ERROR_COLUMNS, so the result pickles cheaply back from a worker.
+    """
+    workbook = workbook or Path(path).name
+    try:
+        sheets = read_excel_cached(path)
+    except Exception as e:
+        return [], [(workbook, None, f"{type(e).__name__}: {e}")]
+
+    rows, errors = [], []
+    for sheet_name in stage_sheet_names(sheets):
+        try:
+            values = stage_metrics(sheets[sheet_name])
+        except Exception as e:
+            errors.append((workbook, sheet_name, f"{type(e).__name__}: {e}"))
+            continue
+        rows.extend(zip([workbook] * len(STAGE_METRICS), [sheet_name] * len(STAGE_METRICS), STAGE_METRICS, STAGE_UOMS, values))
+    return rows, errors
+
+
+def find_workbooks(directory):
+    paths = {path for pattern in WORKBOOK_PATTERNS for path in directory.rglob(pattern)}
+    # Skip Excel's "~$" lock files
+    return sorted(path for path in paths if not path.name.startswith("~$"))
+
+
+def summarize_directory(directory, workers=None):
+    """Summarise every workbook under ``directory`` on a process pool.
+
+    Returns ``(summary, errors)`` DataFrames.
+    """
+    directory = Path(directory)
+    paths = find_workbooks(directory)
+    labels = [str(path.relative_to(directory)) for path in paths]
+    rows, errors = [], []
+    if paths:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for workbook_rows, workbook_errors in pool.map(summarize_workbook, paths, labels, chunksize=chunksize):
+                rows.extend(workbook_rows)
+                errors.extend(workbook_errors)
+
+    summary = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+    summary["Value"] = pd.to_numeric(summary["Value"], errors="coerce")
+    return summary, pd.DataFrame(errors, columns=ERROR_COLUMNS)
+
+
+def write_summary(summary, errors, output):
+    output = Path(output)
+    if output.suffix.lower() in (".xlsx", ".xlsm"):
+        write_sheets({"Summary": summary, "Errors": errors}, output)
+    else:
+        summary.to_parquet(output, index=False)
+        if not errors.empty:
+            errors.to_csv(output.with_suffix(".errors.csv"), index=False)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.fpy_summary", description="Consolidated FPY / cycle-time summary for a directory of process-mapping workbooks.")
+    parser.add_argument("directory", help="directory searched recursively for .xlsx/.xlsm workbooks")
+    parser.add_argument("-o", "--output", default="fpy_summary.parquet", help="output file, .parquet or .xlsx (default: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if not Path(args.directory).is_dir():
+        parser.error(f"{args.directory} is not a directory")
+
+    summary, errors = summarize_directory(args.directory, args.workers)
+    output = write_summary(summary, errors, args.output)
+    print(f"{summary['Workbook'].nunique()} workbooks, {summary['Sheet'].size // len(STAGE_METRICS)} stage sheets -> {output}")
+    if not errors.empty:
+        print(f"{len(errors)} workbooks/sheets could not be summarised", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
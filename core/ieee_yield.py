@@ -0,0 +1,198 @@
+"""IEEE PCBA yield chain (Pfi -> Pfo -> D -> Ync / Ycl -> Overall yield).
+
+Every function here works on NumPy arrays and broadcasts, so the same code
+scores one stage typed into the IEEE page or a whole portfolio of board
+variants (boards x stages x defect categories) in a single pass.
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.profiling import stage_timer
+
+
+DATA_POINTS_COLUMN = "Data Points"
+DEFECT_RATE_ROW = "Defect Rate per Solder Joint (DR)"
+TEST_EFFICIENCY_ROW = "Test Efficiency %"
+
+# Defect category -> row holding its number of opportunities
+CATEGORY_ROWS = {
+    "Soldering": "No. Solder Joints (N)",
+    "Placement": "No. Placement",
+    "Component": "No. Component",
+}
+CATEGORIES = tuple(CATEGORY_ROWS)
+
+CHAIN_POINTS = ("Pfi", "Pfo", "D", "Poisson Yield (Ync)", "Clustered Yield (Ycl)", "Overall yield")
+
+
+@stage_timer("IEEE yield chain")
+def yield_chain(opportunities, defect_rate, test_efficiency, alpha):
+    """Evaluate the full chain for broadcastable inputs.
+
+    ``defect_rate`` is per opportunity (not per million) and
+    ``test_efficiency`` is a fraction, i.e. the values the IEEE page stores
+    in its "Data Points" rows.
+    """
+    opportunities = np.asarray(opportunities, dtype=float)
+    defect_rate = np.asarray(defect_rate, dtype=float)
+    test_efficiency = np.asarray(test_efficiency, dtype=float)
+    alpha = np.asarray(alpha, dtype=float)
+
+    # log(1 - Pfi); log1p keeps precision for ppm defect rates
+    log_pass = opportunities * np.log1p(-defect_rate)
+
+    # Formula: =1-(1-DR)^N
+    pfi = -np.expm1(log_pass)
+    # Formula: =1-((1-Pfi)^(1-TE))
+    pfo = -np.expm1((1 - test_efficiency) * log_pass)
+    # Formula: =SUM(Pfi:Pfo)*TE
+    avg_defects = (pfi + pfo) * test_efficiency
+    # Formula: =EXP(-D)
+    ync = np.exp(-avg_defects)
+    # Formula: =(1+(D/alpha))^-alpha
+    ycl = (1 + avg_defects / alpha) ** (-alpha)
+
+    return {
+        "Pfi": pfi,
+        "Pfo": pfo,
+        "D": avg_defects,
+        "Poisson Yield (Ync)": ync,
+        "Clustered Yield (Ycl)": ycl,
+        "Overall yield": ync * ycl,
+    }
+
+
+def result_row_label(point, category):
+    # "Overall yield_Soldering" is the label the IEEE workbooks already use
+    return f"{point}_{category}"
+
+
+def _data_point_values(sheet, row_label, stages):
+    rows = sheet.loc[sheet[DATA_POINTS_COLUMN] == row_label, stages]
+    if rows.empty:
+        return np.full(len(stages), np.nan)
+    return pd.to_numeric(rows.iloc[0], errors="coerce").to_numpy(dtype=float)
+
+
+def sheet_stages(sheet):
+    return [col for col in sheet.columns if col != DATA_POINTS_COLUMN]
+
+
+def sheet_inputs(sheet, stages=None):
+    """Pull (opportunities, defect rate, test efficiency) out of a Data Points sheet.
+
+    ``opportunities`` has shape (stages, categories); the other two have
+    shape (stages, 1) so they broadcast across the categories.
+    """
+    stages = sheet_stages(sheet) if stages is None else list(stages)
+    opportunities = np.column_stack(
+        [_data_point_values(sheet, CATEGORY_ROWS[category], stages) for category in CATEGORIES]
+    )
+    defect_rate = _data_point_values(sheet, DEFECT_RATE_ROW, stages)[:, None]
+    test_efficiency = _data_point_values(sheet, TEST_EFFICIENCY_ROW, stages)[:, None]
+    return opportunities, defect_rate, test_efficiency
+
+
+def score_sheet(sheet, alpha, stages=None):
+    """Score every stage column of one Data Points sheet.
+
+    Returns a frame with one row per (point, category) label, e.g.
+    "Pfi_Soldering" or "Overall yield_Component", and one column per stage.
+    """
+    stages = sheet_stages(sheet) if stages is None else list(stages)
+    results = yield_chain(*sheet_inputs(sheet, stages), alpha)
+
+    labels = [result_row_label(point, category) for point in CHAIN_POINTS for category in CATEGORIES]
+    # (points, stages, categories) -> (points * categories, stages)
+    values = np.stack([results[point] for point in CHAIN_POINTS]).transpose(0, 2, 1).reshape(len(labels), len(stages))
+    scored = pd.DataFrame(values, columns=stages)
+    scored.insert(0, DATA_POINTS_COLUMN, labels)
+    return scored
+
+
+@stage_timer("IEEE portfolio scoring")
+def score_boards(sheets, alpha, stages=None):
+    """Score a whole portfolio of Data Points sheets in one broadcast.
+
+    ``sheets`` maps a board name to its Data Points sheet. All boards are
+    stacked into (boards, stages, categories) arrays before the chain runs.
+    Returns a tidy frame with one row per board, stage and category.
+    """
+    boards = list(sheets)
+    if stages is None:
+        stages = []
+        for board in boards:
+            stages.extend(stage for stage in sheet_stages(sheets[board]) if stage not in stages)
+    stages = list(stages)
+
+    # One concat + one reindex instead of per-board row lookups
+    input_rows = [DEFECT_RATE_ROW, TEST_EFFICIENCY_ROW] + [CATEGORY_ROWS[category] for category in CATEGORIES]
+    stacked = pd.concat([sheets[board] for board in boards], keys=range(len(boards)), names=["Board", None])
+    stacked = stacked.reset_index(level=0)
+    stacked = stacked[stacked[DATA_POINTS_COLUMN].isin(input_rows)].drop_duplicates(["Board", DATA_POINTS_COLUMN])
+    grid = stacked.set_index(["Board", DATA_POINTS_COLUMN]).reindex(
+        index=pd.MultiIndex.from_product([range(len(boards)), input_rows]), columns=stages
+    )
+    values = grid.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float).reshape(len(boards), len(input_rows), len(stages))
+
+    defect_rate = values[:, 0, :, None]
+    test_efficiency = values[:, 1, :, None]
+    # (boards, categories, stages) -> (boards, stages, categories)
+    opportunities = values[:, 2:, :].transpose(0, 2, 1)
+
+    results = yield_chain(opportunities, defect_rate, test_efficiency, alpha)
+
+    shape = (len(boards), len(stages), len(CATEGORIES))
+    scored = pd.DataFrame({
+        "Board": np.repeat(boards, len(stages) * len(CATEGORIES)),
+        "Stage": np.tile(np.repeat(stages, len(CATEGORIES)), len(boards)),
+        "Category": np.tile(CATEGORIES, len(boards) * len(stages)),
+        "Opportunities": opportunities.ravel(),
+    })
+    for point in CHAIN_POINTS:
+        scored[point] = np.broadcast_to(results[point], shape).ravel()
+    return scored
+
+
+def score_variants(variants, alpha=None):
+    """Score a table of board variants, one variant per row.
+
+    ``variants`` needs the Data Points row names as columns (DR, Test
+    Efficiency % and the three opportunity counts); an optional "Alpha"
+    column overrides ``alpha`` per variant. Returns one column per
+    (point, category) label, aligned to ``variants.index``.
+    """
+    if "Alpha" in variants.columns:
+        alpha = variants["Alpha"].to_numpy(dtype=float)
+    if alpha is None:
+        raise ValueError("alpha is required when the variants have no 'Alpha' column")
+
+    opportunities = np.column_stack([
+        pd.to_numeric(variants[CATEGORY_ROWS[category]], errors="coerce").to_numpy(dtype=float)
+        for category in CATEGORIES
+    ])
+    defect_rate = pd.to_numeric(variants[DEFECT_RATE_ROW], errors="coerce").to_numpy(dtype=float)[:, None]
+    test_efficiency = pd.to_numeric(variants[TEST_EFFICIENCY_ROW], errors="coerce").to_numpy(dtype=float)[:, None]
+    alpha = np.broadcast_to(np.asarray(alpha, dtype=float), (len(variants),))[:, None]
+
+    results = yield_chain(opportunities, defect_rate, test_efficiency, alpha)
+
+    columns = {}
+    for point in CHAIN_POINTS:
+        for i, category in enumerate(CATEGORIES):
+            columns[result_row_label(point, category)] = results[point][:, i]
+    return pd.DataFrame(columns, index=variants.index)
+
+
+def set_data_point(sheet, row_label, column, value):
+    """Write ``value`` into the ``row_label`` row, appending the row if it is missing."""
+    row_idx = sheet.index[sheet[DATA_POINTS_COLUMN] == row_label]
+    if not row_idx.empty:
+        sheet.at[row_idx[0], column] = value
+        return sheet
+
+    new_row = pd.DataFrame({col: [np.nan] for col in sheet.columns})
+    new_row.at[0, DATA_POINTS_COLUMN] = row_label
+    new_row.at[0, column] = value
+    return pd.concat([sheet, new_row], ignore_index=True)
@@ -0,0 +1,172 @@
+"""Incremental recompute of the derived rows of an IPC-7912 OMI & DPMO sheet.
+
+The derived rows (Sum Product, Estimated Yield, Squared Error, z, Number of
+opportunities, Estimated DPMO, ...) form a small dependency graph over four
+inputs per stage: the actual first pass yield, the package counts of the
+stage column, its fault probabilities and the solder joint / test coverage
+entries. ``IpcDpmoModel`` keeps an O(1) label -> row index over the
+``Package`` column and, per stage, the last input values it saw. Only the
+rows downstream of an input that actually changed are recomputed and
+written back with ``iat``, instead of rescanning and re-splicing the whole
+sheet on every edit. A derived cell whose value in the table no longer
+matches the model (after an undo, or edited by hand) is written again too.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+LABEL_COLUMN = "Package"
+END_OF_INPUT_LABEL = "End Of Input Table"
+
+# Inputs set from the page; "stage_counts" and "fault_probability" are read from the sheet itself
+INPUTS = ("actual_fpy", "stage_counts", "fault_probability", "solder_joint", "test_coverage")
+
+# label -> (inputs / labels it depends on, formula, row it is inserted after when missing).
+# Listed in dependency order, so one pass in this order is a topological evaluation.
+RULES = {
+    "Actual first pass yield": (("actual_fpy",), lambda afpy: afpy, None),
+    # Formula: -LOG10(AFPY)
+    "-Log of AFPY": (("actual_fpy",), lambda afpy: -math.log10(afpy), "Actual first pass yield"),
+    # Formula: SUMPRODUCT(stage, stage - Fault Probability)
+    "Sum Product": (("stage_counts", "fault_probability"), lambda counts, fault: float(np.nansum(counts * fault)), "-Log of AFPY"),
+    # Formula: EXP(-Sum Product)
+    "Estimated Yield from Current p Value": (("Sum Product",), lambda sumproduct: math.exp(-sumproduct), "Sum Product"),
+    "Squared Error": (("Estimated Yield from Current p Value",), lambda estimated_yield: math.exp(-estimated_yield), "Estimated Yield from Current p Value"),
+    "z (which is what we have to minimize)": (("Squared Error",), lambda squared_error: math.exp(-squared_error), "Squared Error"),
+    "Solder Joint": (("solder_joint",), lambda solder_joint: solder_joint, "z (which is what we have to minimize)"),
+    # Formula: 2 * SUM(stage above End Of Input Table) + Solder Joint
+    "Number of opportunities to failure at the point n, On": (("stage_counts", "solder_joint"), lambda counts, solder_joint: float(np.nansum(counts)) * 2 + solder_joint, "Solder Joint"),
+    "Enter Test coverage %, Ct": (("test_coverage",), lambda test_coverage: test_coverage, "Number of opportunities to failure at the point n, On"),
+    # Formula: -LN(Estimated Yield) / (On * Ct) * 10^6
+    "Estimated DPMO": (
+        ("Estimated Yield from Current p Value", "Number of opportunities to failure at the point n, On", "test_coverage"),
+        lambda estimated_yield, opportunities, test_coverage: (-math.log(estimated_yield) / (opportunities * test_coverage)) * (10 ** 6),
+        "Enter Test coverage %, Ct",
+    ),
+}
+DERIVED_LABELS = tuple(RULES)
+
+
+def fault_probability_column(stage):
+    return f"{stage} - Fault Probability"
+
+
+class IpcDpmoModel:
+    """Derived-row state of one IPC sheet, kept across Streamlit reruns."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.inputs = {}   # stage -> {input name: value}
+        self.values = {}   # stage -> {label: value}
+        self.dirty = {}    # stage -> set of changed inputs / labels
+        self._labels = None
+        self._reindex()
+
+    def _reindex(self):
+        labels = self.frame[LABEL_COLUMN]
+        self._labels = labels.copy()
+        self.row_of = {}
+        for row, label in enumerate(labels):
+            self.row_of.setdefault(label, row)
+
+    def sync(self, frame):
+        """Adopt the latest table from the data editor; the label index is rebuilt only if rows moved.
+
+        Derived cells that differ from the model's values are marked dirty,
+        so the next ``recompute`` of their stage writes them again.
+        """
+        self.frame = frame
+        if not frame[LABEL_COLUMN].reset_index(drop=True).equals(self._labels.reset_index(drop=True)):
+            self._reindex()
+        for stage, stage_values in self.values.items():
+            stale = {label for label, value in stage_values.items() if not self._cell_matches(label, stage, value)}
+            if stale:
+                self.dirty.setdefault(stage, set()).update(stale)
+
+    def _cell_matches(self, label, stage, value):
+        row = self.row_of.get(label)
+        if row is None or stage not in self.frame.columns:
+            return False
+        cell = pd.to_numeric(pd.Series([self.frame.iat[row, self.frame.columns.get_loc(stage)]]), errors="coerce").iat[0]
+        if pd.isna(cell) or pd.isna(value):
+            return bool(pd.isna(cell) and pd.isna(value))
+        return math.isclose(cell, value, rel_tol=1e-12, abs_tol=0.0)
+
+    def set_input(self, stage, name, value):
+        stage_inputs = self.inputs.setdefault(stage, {})
+        if name not in stage_inputs or stage_inputs[name] != value:
+            stage_inputs[name] = value
+            self.dirty.setdefault(stage, set()).add(name)
+
+    def _input_rows(self):
+        end_row = self.row_of.get(END_OF_INPUT_LABEL)
+        if end_row is not None:
+            return slice(0, end_row)
+        # No end marker: every row that is not one of the derived rows
+        return ~self.frame[LABEL_COLUMN].isin(DERIVED_LABELS).to_numpy()
+
+    def _read_sheet_inputs(self, stage):
+        rows = self._input_rows()
+        if stage in self.frame.columns:
+            counts = pd.to_numeric(self.frame[stage], errors="coerce").to_numpy(dtype=float)[rows]
+            self._set_array_input(stage, "stage_counts", counts)
+        fault_column = fault_probability_column(stage)
+        if fault_column in self.frame.columns:
+            fault = pd.to_numeric(self.frame[fault_column], errors="coerce").to_numpy(dtype=float)[rows]
+            self._set_array_input(stage, "fault_probability", fault)
+
+    def _set_array_input(self, stage, name, array):
+        previous = self.inputs.get(stage, {}).get(name)
+        if previous is None or previous.shape != array.shape or not np.array_equal(previous, array, equal_nan=True):
+            self.inputs.setdefault(stage, {})[name] = array
+            self.dirty.setdefault(stage, set()).add(name)
+
+    def set_cell(self, label, stage, value):
+        if stage not in self.frame.columns:
+            self.frame[stage] = np.nan
+        if not pd.api.types.is_float_dtype(self.frame[stage]):
+            self.frame[stage] = pd.to_numeric(self.frame[stage], errors="coerce")
+        row = self.row_of.get(label)
+        if row is None:
+            self._insert_row(label)
+            row = self.row_of[label]
+        self.frame.iat[row, self.frame.columns.get_loc(stage)] = value
+
+    def _insert_row(self, label):
+        # Missing rows go right after the row they are derived from, or at the end
+        new_row = pd.DataFrame({col: [np.nan] for col in self.frame.columns})
+        new_row[LABEL_COLUMN] = [label]
+        anchor = self.row_of.get(RULES[label][2]) if label in RULES else None
+        position = len(self.frame) if anchor is None else anchor + 1
+        self.frame = pd.concat([self.frame.iloc[:position], new_row, self.frame.iloc[position:]]).reset_index(drop=True)
+        self._reindex()
+
+    def recompute(self, stage):
+        """Recompute and write the rows downstream of changed inputs; returns the labels written."""
+        self._read_sheet_inputs(stage)
+        dirty = self.dirty.pop(stage, set())
+        stage_inputs = self.inputs.get(stage, {})
+        stage_values = self.values.setdefault(stage, {})
+
+        changed = set(dirty)
+        written = []
+        try:
+            for label, (deps, formula, _) in RULES.items():
+                # Rewritten when an input changed, or when the sheet's cell went stale
+                if label not in dirty and not changed.intersection(deps):
+                    continue
+                args = [stage_inputs.get(dep) if dep in INPUTS else stage_values.get(dep) for dep in deps]
+                if any(arg is None for arg in args):
+                    continue
+                stage_values[label] = formula(*args)
+                changed.add(label)
+                self.set_cell(label, stage, stage_values[label])
+                written.append(label)
+        except Exception:
+            # Keep the inputs dirty so the next rerun retries once the bad value is fixed
+            self.dirty.setdefault(stage, set()).update(dirty)
+            raise
+        return written
@@ -0,0 +1,33 @@
+"""Modules imported on first use, to keep the cold start of the pages short.
+
+plotly.express, openpyxl and scikit-learn each take 100 ms or more to
+import, and a page only needs them once a file is uploaded and the section
+that draws, reads or fits runs. ``px = lazy_module("plotly.express")`` binds
+a stand-in at the top of a page or core module; the real module is imported
+the first time an attribute such as ``px.line`` is looked up, and is shared
+through ``sys.modules`` like a normal import from then on.
+
+``benchmarks/import_time.py`` reports what each page still imports at start.
+"""
+
+import importlib
+
+
+class _LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        # Only called for names not set in __init__, i.e. the module's own attributes
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}>"
+
+
+def lazy_module(name):
+    """Stand-in for ``import name`` that imports the module on first attribute access."""
+    return _LazyModule(name)
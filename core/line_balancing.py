@@ -0,0 +1,279 @@
+"""Line balancing: assign the process-map tasks to the fewest stations that meet takt.
+
+The Homepage derives the desired takt time from the Annual Volume and page 1
+records a Process Cycle Time per stage, but nothing groups the stages into
+stations. ``balance_line`` solves that (simple assembly line balancing,
+type 1): every task goes to one station, a task's predecessors sit in the
+same or an earlier station, and no station's load exceeds takt.
+
+The ranked positional weight heuristic (a task's time plus the time of every
+task that depends on it) gives an assignment in milliseconds for hundreds of
+tasks. An optional branch and bound then searches station by station over
+maximal station loads, pruned by the ``ceil(remaining work / takt)`` lower
+bound and by already-seen sets of assigned tasks. It is bounded by
+``node_limit`` station loads and ``time_limit`` seconds and keeps the best
+assignment found, so it stays fast enough to run on every edit; the result
+says whether the station count is proven minimal.
+"""
+
+import heapq
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.line_des import stages_from_process_map
+from core.profiling import stage_timer
+
+
+PREDECESSORS_COLUMN = "Predecessors"
+
+NODE_LIMIT = 50000
+TIME_LIMIT = 0.5
+
+# Station loads are compared against takt with this tolerance (seconds)
+EPSILON = 1e-9
+
+
+class _SearchLimit(Exception):
+    pass
+
+
+def tasks_from_process_map(filtered_data):
+    """(names, task times, predecessors) from the page 1 process map.
+
+    An optional ``Predecessors`` column lists, per row, the stages that must
+    be done first, separated by commas (``Stage`` or ``Side / Stage``; a
+    bare Stage name matches it on every side). Without the column each stage
+    follows the one above it and ``predecessors`` is None.
+    """
+    names, task_times, _ = stages_from_process_map(filtered_data)
+    if PREDECESSORS_COLUMN not in filtered_data.columns:
+        return names, task_times, None
+
+    rows = filtered_data[pd.to_numeric(filtered_data['Process Cycle Time'], errors='coerce') > 0]
+    lookup = {}
+    for i, (name, stage) in enumerate(zip(names, rows['Stage'].astype(str))):
+        lookup.setdefault(name, []).append(i)
+        if name != stage:
+            lookup.setdefault(stage, []).append(i)
+
+    predecessors = []
+    for name, cell in zip(names, rows[PREDECESSORS_COLUMN]):
+        tasks = []
+        for predecessor in ([] if pd.isna(cell) else str(cell).replace(";", ",").split(",")):
+            predecessor = predecessor.strip()
+            if not predecessor:
+                continue
+            if predecessor not in lookup:
+                raise ValueError(f"Predecessor '{predecessor}' of '{name}' is not a stage of the process map")
+            tasks.extend(lookup[predecessor])
+        predecessors.append(tasks)
+    return names, task_times, predecessors
+
+
+def _topological_order(weights, predecessors):
+    # Kahn's algorithm, taking the heaviest ready task first
+    n = len(weights)
+    successors = [[] for _ in range(n)]
+    waiting = [0] * n
+    for task, task_predecessors in enumerate(predecessors):
+        for predecessor in set(task_predecessors):
+            successors[predecessor].append(task)
+            waiting[task] += 1
+    ready = [(-weights[task], task) for task in range(n) if not waiting[task]]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, task = heapq.heappop(ready)
+        order.append(task)
+        for successor in successors[task]:
+            waiting[successor] -= 1
+            if not waiting[successor]:
+                heapq.heappush(ready, (-weights[successor], successor))
+    if len(order) < n:
+        raise ValueError("The precedence relations contain a cycle")
+    return order
+
+
+def positional_weights(task_times, predecessors):
+    """Ranked positional weight of each task: its time plus the time of all tasks that follow it."""
+    task_times = np.asarray(task_times, dtype=float)
+    n = len(task_times)
+    order = _topological_order(task_times, predecessors)
+    # follows[i, j]: task j (transitively) needs task i
+    follows = np.zeros((n, n), dtype=bool)
+    for task in reversed(order):
+        for predecessor in set(predecessors[task]):
+            follows[predecessor] |= follows[task]
+            follows[predecessor, task] = True
+    return task_times + follows @ task_times
+
+
+def lower_bound(task_times, takt):
+    """Station count no assignment can beat: total work over takt, and one station per task over takt / 2."""
+    task_times = np.asarray(task_times, dtype=float)
+    by_work = math.ceil(task_times.sum() / takt - EPSILON)
+    by_size = math.ceil(np.sum(task_times > takt / 2 + EPSILON) + np.sum(np.abs(task_times - takt / 2) <= EPSILON) / 2)
+    return max(by_work, by_size, 1 if len(task_times) else 0)
+
+
+def _rpw_stations(times, predecessors, weights, takt):
+    # Open a station and keep adding the highest-ranked ready task that still fits
+    ranked = sorted(range(len(times)), key=lambda task: (-weights[task], task))
+    done = [False] * len(times)
+    stations = []
+    left = len(times)
+    while left:
+        station, idle = [], takt
+        added = True
+        while added:
+            added = False
+            for task in ranked:
+                if not done[task] and times[task] <= idle + EPSILON and all(done[p] for p in predecessors[task]):
+                    done[task] = True
+                    station.append(task)
+                    idle -= times[task]
+                    left -= 1
+                    added = True
+                    break
+        stations.append(station)
+    return stations
+
+
+def _branch_and_bound(times, predecessors, weights, takt, best, bound, node_limit, time_limit):
+    # Tasks are renumbered topologically, so a station load is enumerated once, in increasing order
+    order = _topological_order(weights, predecessors)
+    position = {task: i for i, task in enumerate(order)}
+    n = len(order)
+    task_times = [times[task] for task in order]
+    masks = [sum(1 << position[p] for p in set(predecessors[task])) for task in order]
+    full = (1 << n) - 1
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    nodes = 0
+    seen = {}
+    stations = []
+    complete = True
+
+    def loads(assigned):
+        # Maximal station loads: no further ready task fits
+        load = []
+
+        def extend(done, idle, first):
+            nonlocal nodes
+            extended = False
+            for i in range(first, n):
+                if not done >> i & 1 and task_times[i] <= idle + EPSILON and not masks[i] & ~done:
+                    extended = True
+                    load.append(i)
+                    yield from extend(done | 1 << i, idle - task_times[i], i + 1)
+                    load.pop()
+            if extended:
+                return
+            nodes += 1
+            if nodes > node_limit or (deadline is not None and time.perf_counter() > deadline):
+                raise _SearchLimit
+            for i in range(first):
+                if not done >> i & 1 and task_times[i] <= idle + EPSILON and not masks[i] & ~done:
+                    return
+            yield done, takt - idle, list(load)
+
+        yield from extend(assigned, takt, 0)
+
+    def search(assigned, work_left):
+        nonlocal best
+        if assigned == full:
+            best = [[order[i] for i in station] for station in stations]
+            return
+        if len(stations) + math.ceil(work_left / takt - EPSILON) >= len(best):
+            return
+        if seen.get(assigned, n + 1) <= len(stations):
+            return
+        seen[assigned] = len(stations)
+        for done, work, load in loads(assigned):
+            stations.append(load)
+            search(done, work_left - work)
+            stations.pop()
+            if len(best) <= bound:
+                return
+
+    try:
+        search(0, sum(task_times))
+    except _SearchLimit:
+        complete = False
+    return best, complete, nodes
+
+
+@stage_timer("line balancing")
+def balance_line(names, task_times, takt, predecessors=None, branch_and_bound=False, node_limit=NODE_LIMIT, time_limit=TIME_LIMIT):
+    """Assign tasks to the fewest stations whose load stays within ``takt`` seconds.
+
+    ``predecessors[i]`` lists the indices of the tasks that must be done
+    before task ``i``; None means each task follows the previous one. Returns
+    a dict of the station count (``stations``), its lower bound and line
+    efficiency plus a per-task ``assignment`` table and a per-station
+    ``station_loads`` table.
+    ``time_limit`` None bounds the branch and bound by ``node_limit`` only.
+    """
+    task_times = np.asarray(task_times, dtype=float)
+    n = len(task_times)
+    if n == 0:
+        raise ValueError("The process map has no stage with a positive Process Cycle Time")
+    if not takt or takt <= 0:
+        raise ValueError("Takt time must be positive")
+    if predecessors is None:
+        predecessors = [[]] + [[i - 1] for i in range(1, n)]
+    if len(predecessors) != n:
+        raise ValueError("One list of predecessors per task is required")
+    slowest = int(task_times.argmax())
+    if task_times[slowest] > takt + EPSILON:
+        raise ValueError(f"'{names[slowest]}' takes {task_times[slowest]:.1f} s, longer than the takt of {takt:.1f} s")
+
+    weights = positional_weights(task_times, predecessors)
+    times = task_times.tolist()
+    bound = lower_bound(task_times, takt)
+    stations = _rpw_stations(times, predecessors, weights.tolist(), takt)
+    method = "Ranked positional weight"
+    proven = len(stations) == bound
+    nodes = 0
+    if branch_and_bound and not proven:
+        found, complete, nodes = _branch_and_bound(times, predecessors, weights.tolist(), takt, stations, bound, node_limit, time_limit)
+        if len(found) < len(stations):
+            method = "Branch and bound"
+        stations = found
+        proven = complete or len(stations) == bound
+
+    station_of = np.empty(n, dtype=np.int64)
+    for number, station in enumerate(stations, start=1):
+        station_of[station] = number
+    loads = np.bincount(station_of, weights=task_times, minlength=len(stations) + 1)[1:]
+
+    task_order = [task for station in stations for task in station]
+    assignment = pd.DataFrame({
+        "Station": station_of[task_order],
+        "Stage": [names[task] for task in task_order],
+        "Task Time, sec": task_times[task_order],
+        "Positional Weight, sec": weights[task_order],
+    })
+    station_table = pd.DataFrame({
+        "Station": np.arange(1, len(stations) + 1),
+        "Stages": [", ".join(names[task] for task in station) for station in stations],
+        "Load, sec": loads,
+        "Idle, sec": takt - loads,
+        "Utilization %": loads / takt * 100,
+    })
+    return {
+        "stations": len(stations),
+        "lower_bound": bound,
+        "proven_minimal": proven,
+        "method": method,
+        "nodes": nodes,
+        "takt": takt,
+        "efficiency": float(task_times.sum() / (len(stations) * takt) * 100),
+        "balance_delay": float(100 - task_times.sum() / (len(stations) * takt) * 100),
+        # Spread of the station loads around the busiest station
+        "smoothness_index": float(np.sqrt(np.sum((loads.max() - loads) ** 2))),
+        "assignment": assignment,
+        "station_loads": station_table,
+    }
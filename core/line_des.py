@@ -0,0 +1,241 @@
+"""Discrete-event simulation of the process map as a serial production line.
+
+Each stage of the page 1 process map (``filtered_data``) is a single
+machine with a stochastic cycle time, a batch set-up every ``batch_size``
+units and operation-dependent breakdowns. Between stages sit finite buffers;
+a stage that finishes a unit while the next buffer is full stays blocked
+holding it. Events live on a ``heapq`` calendar.
+
+Time is the *working* clock of the shift calendar: Shift Hr/day x Days/Week x
+Weeks/Year. Off-shift time pauses the whole line without changing its state,
+so simulating those seconds would only add idle events. A year of production
+simulates in a few seconds.
+"""
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from core.profiling import stage_timer
+
+
+SAMPLE_BLOCK = 4096
+
+# Event kinds, ordered so simultaneous finishes are handled before arrivals
+FINISH, ARRIVAL = 0, 1
+
+
+def working_seconds(shift_hr_day, days_week, weeks_year, shifts=1):
+    """Working seconds in a year of the shift calendar."""
+    return float(shift_hr_day) * shifts * float(days_week) * float(weeks_year) * 3600
+
+
+def stages_from_process_map(filtered_data):
+    """(names, cycle times, set-up times) in seconds from the page 1 process map."""
+    stages = filtered_data.copy()
+    stages['Process Cycle Time'] = pd.to_numeric(stages['Process Cycle Time'], errors='coerce')
+    stages['Batch Set up Time'] = pd.to_numeric(stages['Batch Set up Time'], errors='coerce').fillna(0)
+    stages = stages[stages['Process Cycle Time'] > 0]
+    names = (stages['Side'].astype(str) + " / " + stages['Stage'].astype(str)).tolist() if 'Side' in stages.columns else stages['Stage'].astype(str).tolist()
+    return names, stages['Process Cycle Time'].to_numpy(dtype=float), stages['Batch Set up Time'].to_numpy(dtype=float)
+
+
+class _Sampler:
+    # Draws random variates in NumPy blocks; one Python call per variate is the hot path
+    def __init__(self, draw):
+        self.draw = draw
+        self.block = draw(SAMPLE_BLOCK)
+        self.i = 0
+
+    def __call__(self):
+        if self.i == SAMPLE_BLOCK:
+            self.block = self.draw(SAMPLE_BLOCK)
+            self.i = 0
+        value = self.block[self.i]
+        self.i += 1
+        return value
+
+
+def _cycle_time_sampler(rng, mean, cv):
+    if cv <= 0:
+        return lambda: mean
+    # Gamma keeps cycle times positive with the requested mean and coefficient of variation
+    shape = 1 / cv ** 2
+    return _Sampler(lambda n: rng.gamma(shape, mean / shape, n).tolist())
+
+
+@stage_timer("line simulation")
+def simulate_line(names, cycle_times, setup_times, horizon, batch_size=100, cycle_time_cv=0.1, buffer_size=5, mtbf=None, mttr=None, takt=None, seed=None):
+    """Simulate ``horizon`` working seconds of the line.
+
+    ``mtbf`` / ``mttr`` are mean busy seconds between failures and mean
+    repair seconds (exponential; ``None`` disables breakdowns). With
+    ``takt`` set, units are released into the first stage every ``takt``
+    seconds; without it the first stage never starves. Returns a dict of
+    line KPIs plus a per-stage ``stages`` table. ``buffer_size`` (units
+    between two stages) and ``batch_size`` must be at least 1.
+    """
+    n = len(names)
+    if n == 0:
+        raise ValueError("The process map has no stage with a positive Process Cycle Time")
+    if buffer_size < 1:
+        raise ValueError("Buffer size must be at least 1")
+    if batch_size < 1:
+        raise ValueError("Batch size must be at least 1")
+    rng = np.random.default_rng(seed)
+    cycle = [_cycle_time_sampler(rng, float(ct), cycle_time_cv) for ct in cycle_times]
+    setups = [float(setup) for setup in setup_times]
+    breakdowns = mtbf is not None and mttr is not None and mtbf > 0
+    if breakdowns:
+        time_to_failure = _Sampler(lambda k: rng.exponential(mtbf, k).tolist())
+        repair_time = _Sampler(lambda k: rng.exponential(mttr, k).tolist())
+        next_failure = [time_to_failure() for _ in range(n)]
+
+    # Input buffer of stage i; stage 0's is unbounded (released orders)
+    queue = [0] * n
+    capacity = [float("inf")] + [buffer_size] * (n - 1)
+    busy = [False] * n
+    blocked_since = [None] * n
+    since_setup = [0] * n
+
+    busy_time = [0.0] * n
+    setup_time = [0.0] * n
+    down_time = [0.0] * n
+    blocked_time = [0.0] * n
+
+    events = []
+    seq = 0
+    now = 0.0
+    completed = 0
+    released = 0
+    wip = 0
+    wip_area = 0.0
+    last_change = 0.0
+    max_wip = 0
+
+    def start(i):
+        # Try to start stage i, then walk upstream releasing any stage it unblocked
+        nonlocal seq, wip, wip_area, last_change, released, max_wip
+        while i >= 0:
+            if busy[i] or blocked_since[i] is not None:
+                return
+            if i == 0 and takt is None:
+                # Saturated line: raw material is always available
+                wip_area += wip * (now - last_change)
+                last_change = now
+                wip += 1
+                released += 1
+                max_wip = max(max_wip, wip)
+            elif queue[i] > 0:
+                queue[i] -= 1
+            else:
+                return
+
+            duration = cycle[i]()
+            busy_time[i] += duration
+            if setups[i] and since_setup[i] % batch_size == 0:
+                duration += setups[i]
+                setup_time[i] += setups[i]
+            since_setup[i] += 1
+            if breakdowns:
+                # Failures count busy time only; each one adds a repair to this job
+                remaining = duration
+                while next_failure[i] <= remaining:
+                    remaining -= next_failure[i]
+                    repair = repair_time()
+                    duration += repair
+                    down_time[i] += repair
+                    next_failure[i] = time_to_failure()
+                next_failure[i] -= remaining
+            busy[i] = True
+            seq += 1
+            heapq.heappush(events, (now + duration, FINISH, seq, i))
+
+            # A slot opened in stage i's input buffer: release a blocked upstream stage
+            i -= 1
+            if i < 0 or blocked_since[i] is None:
+                return
+            blocked_time[i] += now - blocked_since[i]
+            blocked_since[i] = None
+            queue[i + 1] += 1
+
+    if takt is not None:
+        heapq.heappush(events, (0.0, ARRIVAL, 0, 0))
+    else:
+        start(0)
+
+    last = n - 1
+    while events and events[0][0] <= horizon:
+        now, kind, _, i = heapq.heappop(events)
+        if kind == ARRIVAL:
+            wip_area += wip * (now - last_change)
+            last_change = now
+            wip += 1
+            released += 1
+            max_wip = max(max_wip, wip)
+            queue[0] += 1
+            seq += 1
+            heapq.heappush(events, (now + takt, ARRIVAL, seq, 0))
+            start(0)
+            continue
+
+        busy[i] = False
+        if i == last:
+            wip_area += wip * (now - last_change)
+            last_change = now
+            wip -= 1
+            completed += 1
+        elif queue[i + 1] < capacity[i + 1]:
+            queue[i + 1] += 1
+            start(i + 1)
+        else:
+            blocked_since[i] = now
+            continue
+        start(i)
+
+    wip_area += wip * (horizon - last_change)
+    for i in range(n):
+        if blocked_since[i] is not None:
+            blocked_time[i] += horizon - blocked_since[i]
+    # Jobs still running at the horizon were charged in full when they started
+    for finish_time, kind, _, i in events:
+        if kind == FINISH and finish_time > horizon:
+            overrun = finish_time - horizon
+            cut = min(overrun, down_time[i])
+            down_time[i] -= cut
+            overrun -= cut
+            cut = min(overrun, setup_time[i])
+            setup_time[i] -= cut
+            busy_time[i] -= overrun - cut
+
+    stages = pd.DataFrame({
+        "Stage": names,
+        "Mean Cycle Time, sec": np.asarray(cycle_times, dtype=float),
+        "Batch Set up Time, sec": np.asarray(setups),
+        "Processing %": np.asarray(busy_time) / horizon * 100,
+        "Set up %": np.asarray(setup_time) / horizon * 100,
+        "Down %": np.asarray(down_time) / horizon * 100,
+        "Blocked %": np.asarray(blocked_time) / horizon * 100,
+    })
+    stages["Utilization %"] = stages["Processing %"] + stages["Set up %"] + stages["Down %"]
+    stages["Starved %"] = (100 - stages["Utilization %"] - stages["Blocked %"]).clip(lower=0)
+    bottleneck = int(stages["Utilization %"].idxmax())
+
+    hours = horizon / 3600
+    throughput = completed / hours if hours else 0.0
+    avg_wip = wip_area / horizon if horizon else 0.0
+    return {
+        "units": completed,
+        "released": released,
+        "throughput_per_hour": throughput,
+        "actual_cycle_time": horizon / completed if completed else float("inf"),
+        "takt": takt,
+        "avg_wip": avg_wip,
+        "max_wip": max_wip,
+        # Little's law
+        "lead_time": avg_wip / (completed / horizon) if completed else float("inf"),
+        "bottleneck": names[bottleneck],
+        "bottleneck_utilization": stages.at[bottleneck, "Utilization %"],
+        "stages": stages,
+    }
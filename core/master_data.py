@@ -0,0 +1,125 @@
+"""Single-open loader for the simulation_db master-data workbook.
+
+``pd.read_excel(file, sheet_name=...)`` unzips and parses the whole workbook
+XML again for every sheet it is asked for. ``load_master_data`` opens the
+workbook once in openpyxl's read-only streaming mode, reads every master
+sheet it knows about in that one pass and memoizes the typed frames per file
+digest, so Process_CT, NRE, MMR-EMS, Assumptions and the feeder master all
+come from a single parse - on every page and on every rerun.
+"""
+
+import hashlib
+import io
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.lazy_import import lazy_module
+from core.workbook_cache import read_bytes
+
+
+openpyxl = lazy_module("openpyxl")
+
+# Sheet name -> columns that must come back numeric
+MASTER_SCHEMAS = {
+    "Process_CT": ["Shift Hr/day", "Days/Week", "Weeks/Year", "Overall Labor Efficiency", "Batch Set up Time", "Process Cycle Time"],
+    "SMD_Package_Feeder_Master": ["Cycle Time_Master"],
+    "NRE": ["Unit Price (₹)", "Life Cycle (Boards)"],
+    "MMR-EMS": ["MMR"],
+    "Assumptions": ["Labour cost/Hr", "Idl Cost/Hr"],
+}
+SIMULATION_DB_SHEETS = tuple(MASTER_SCHEMAS)
+
+MEMO_ENTRIES = 8
+_memo = OrderedDict()
+
+
+def _convert_cell(value):
+    # Same rule as pandas' openpyxl reader: whole-number floats become ints
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def header_names(values):
+    """Column names of a header row the way ``pd.read_excel`` names them: ``Unnamed: i`` for blanks, ``.1``, ``.2`` on repeats."""
+    columns, seen = [], {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def _sheet_frame(worksheet):
+    # Read-only sheets can report padded dimensions; trim empty trailing cells and rows
+    rows = []
+    last_filled = -1
+    for row in worksheet.iter_rows(values_only=True):
+        row = [_convert_cell(value) for value in row]
+        while row and row[-1] is None:
+            row.pop()
+        rows.append(row)
+        if row:
+            last_filled = len(rows) - 1
+    del rows[last_filled + 1:]
+    if not rows:
+        return pd.DataFrame()
+
+    width = max(len(row) for row in rows)
+    header = rows[0] + [None] * (width - len(rows[0]))
+    records = [row + [None] * (width - len(row)) for row in rows[1:]]
+    frame = pd.DataFrame.from_records(records, columns=header_names(header))
+    # Empty cells are NaN, as pd.read_excel gives them, not None
+    return frame.where(frame.notna(), np.nan).infer_objects()
+
+
+def _apply_schema(sheet_name, frame):
+    for column in MASTER_SCHEMAS.get(sheet_name, []):
+        if column in frame.columns:
+            frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    return frame
+
+
+def _parse_workbook(data, sheet_names):
+    workbook = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        return {
+            name: _apply_schema(name, _sheet_frame(workbook[name])) if name in workbook.sheetnames else None
+            for name in sheet_names
+        }
+    finally:
+        workbook.close()
+
+
+def load_master_data(file, sheets=SIMULATION_DB_SHEETS):
+    """Return ``{sheet name: DataFrame}`` for the requested master sheets.
+
+    All known master sheets present in the workbook are parsed in the same
+    pass, so a later call for another sheet of the same file is a memo hit.
+    Raises ``ValueError`` (like ``pd.read_excel``) if a requested sheet is missing.
+    """
+    data = read_bytes(file)
+    digest = hashlib.sha256(data).hexdigest()
+
+    parsed = _memo.setdefault(digest, {})
+    _memo.move_to_end(digest)
+    missing = [name for name in sheets if name not in parsed]
+    if missing:
+        to_parse = list(dict.fromkeys(missing + [name for name in SIMULATION_DB_SHEETS if name not in parsed]))
+        parsed.update(_parse_workbook(data, to_parse))
+    while len(_memo) > MEMO_ENTRIES:
+        _memo.popitem(last=False)
+
+    frames = {}
+    for name in sheets:
+        if parsed[name] is None:
+            raise ValueError(f"Worksheet named '{name}' not found")
+        # Callers add columns and fill NaNs in place, so hand out copies
+        frames[name] = parsed[name].copy()
+    return frames
@@ -0,0 +1,86 @@
+"""NRE amortization of the NRE master over product-volume scenarios.
+
+Page 5's NRE Mapping adds one tooling item per rerun:
+``Qty for LCV = max(product volume, life cycle) / life cycle`` and
+``Extended Price = Unit Price x Qty for LCV``; NRE per unit is the total
+extended price plus tool maintenance, spread over the product volume. Here
+the same rule is one broadcast over (scenarios, items), so a whole tooling
+list is costed for any number of product volumes at once.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+ITEM_COLUMN = "Item"
+UNIT_PRICE_COLUMN = "Unit Price (₹)"
+LIFE_CYCLE_COLUMN = "Life Cycle (Boards)"
+NRE_COLUMNS = ['Item', 'Unit Price (₹)', 'Life Cycle (Boards)', 'Qty for LCV', "Extended Price (₹)"]
+
+
+def amortize(unit_prices, life_cycles, product_volumes):
+    """Qty for LCV and Extended Price per (product volume, item); shape ``volumes.shape + (items,)``.
+
+    Items without a unit price or life cycle get NaN, like the blank cells of the page.
+    """
+    unit_prices = np.asarray(unit_prices, dtype=float)
+    life_cycles = np.asarray(life_cycles, dtype=float)
+    product_volumes = np.asarray(product_volumes, dtype=float)
+    life_cycles = np.where(np.nan_to_num(life_cycles) != 0, life_cycles, np.nan)
+    unit_prices = np.where(np.nan_to_num(unit_prices) != 0, unit_prices, np.nan)
+
+    qty_for_lcv = np.maximum(product_volumes[..., None], life_cycles) / life_cycles
+    ext_price = unit_prices * qty_for_lcv
+    return qty_for_lcv, ext_price
+
+
+def nre_per_unit(unit_prices, life_cycles, product_volume, tool_maintenance_rate=0.0):
+    """NRE per unit for each product volume (any shape) from the NRE items' price and life cycle."""
+    product_volume = np.asarray(product_volume, dtype=float)
+    _, ext_price = amortize(unit_prices, life_cycles, product_volume)
+    total_cost = np.nansum(ext_price, axis=-1) * (1 + tool_maintenance_rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(product_volume > 0, total_cost / product_volume, 0.0)
+
+
+def _select(nre_master, items):
+    master = nre_master.drop_duplicates(ITEM_COLUMN)
+    if items is not None:
+        master = master.set_index(ITEM_COLUMN).loc[list(items)].reset_index()
+    return (
+        master[ITEM_COLUMN].tolist(),
+        pd.to_numeric(master[UNIT_PRICE_COLUMN], errors="coerce").to_numpy(dtype=float),
+        pd.to_numeric(master[LIFE_CYCLE_COLUMN], errors="coerce").to_numpy(dtype=float),
+    )
+
+
+def nre_items(nre_master, product_volume, items=None):
+    """NRE Mapping rows of every item (or ``items``) of the NRE master at one product volume."""
+    names, unit_prices, life_cycles = _select(nre_master, items)
+    qty_for_lcv, ext_price = amortize(unit_prices, life_cycles, product_volume)
+    return pd.DataFrame(dict(zip(NRE_COLUMNS, [names, unit_prices, life_cycles, qty_for_lcv, ext_price])))
+
+
+def nre_scenarios(nre_master, product_volumes, items=None, tool_maintenance_rate=0.0):
+    """Total extended price, total cost and NRE per unit for each product-volume scenario."""
+    names, unit_prices, life_cycles = _select(nre_master, items)
+    product_volumes = np.asarray(product_volumes, dtype=float)
+    _, ext_price = amortize(unit_prices, life_cycles, product_volumes)
+    total_ext_price = np.nansum(ext_price, axis=-1)
+    total_cost = total_ext_price * (1 + tool_maintenance_rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_unit = np.where(product_volumes > 0, total_cost / product_volumes, 0.0)
+    return pd.DataFrame({
+        "Product Volume": product_volumes,
+        "Total Extended Price (₹)": total_ext_price,
+        "Total Cost (₹)": total_cost,
+        "NRE Per Unit (₹)": per_unit,
+    })
+
+
+def extended_prices(nre_master, product_volumes, items=None):
+    """Extended Price of each item (rows) under each product-volume scenario (columns)."""
+    names, unit_prices, life_cycles = _select(nre_master, items)
+    product_volumes = np.asarray(product_volumes, dtype=float)
+    _, ext_price = amortize(unit_prices, life_cycles, product_volumes)
+    return pd.DataFrame(ext_price.T, index=pd.Index(names, name=ITEM_COLUMN), columns=product_volumes)
@@ -0,0 +1,125 @@
+"""Plot data for the Cost vs. Solder Defects charts of the Homepage and page 3.
+
+``Cost % Change = DR * N * scale`` for every board over a grid of defect
+rate scalings, built as one (boards, grid points) outer product instead of a
+frame per board. Before plotting, each curve is decimated with
+Largest-Triangle-Three-Buckets (LTTB) so that the chart stays within a point
+budget however many boards the sheet has. The buckets are walked once for
+all curves together, since they share the x grid. Above ``WEBGL_POINTS``
+points the chart is drawn with WebGL traces instead of SVG. The traces are
+built directly with ``plotly.graph_objects``: ``px.line`` spends seconds
+laying out several hundred colour groups.
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.lazy_import import lazy_module
+from core.profiling import stage_timer
+from core.yield_curves import scaling_grid
+
+
+go = lazy_module("plotly.graph_objects")
+
+# np.linspace(0.1, 100, 50), the scaling grid of the cost charts
+COST_GRID = ("linear", 0.1, 100, 50)
+MAX_POINTS = 20000  # points sent to the browser per chart
+MIN_CURVE_POINTS = 8
+WEBGL_POINTS = 2000
+
+
+def cost_table(solder_joints, defect_rates, scaling):
+    """Cost % Change of shape (boards, grid points)."""
+    joints = pd.to_numeric(pd.Series(solder_joints, dtype=object), errors="coerce").to_numpy(dtype=float)
+    rates = pd.to_numeric(pd.Series(defect_rates, dtype=object), errors="coerce").to_numpy(dtype=float)
+    return np.outer(rates * joints, scaling)
+
+
+def lttb_indices(x, y, points):
+    """Indices of the ``points`` LTTB samples of each row of ``y`` (curves, n) over the shared ``x`` (n).
+
+    Returns an int array of shape (curves, points); rows are unchanged when
+    ``points`` is not smaller than ``n``.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    curves, n = y.shape
+    if points >= n or points < 3:
+        return np.broadcast_to(np.arange(n), (curves, n)).copy()
+
+    rows = np.arange(curves)
+    # First and last points are kept; the inner n - 2 points are split into points - 2 buckets
+    edges = np.floor(np.linspace(1, n - 1, points - 1)).astype(int)
+    selected = np.empty((curves, points), dtype=int)
+    selected[:, 0] = 0
+    selected[:, -1] = n - 1
+    previous = np.zeros(curves, dtype=int)
+    for bucket in range(points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = y[:, stop:next_stop].mean(axis=1)
+        prev_x = x[previous]
+        prev_y = y[rows, previous]
+        # Twice the triangle area (previous point, candidate, next average), for every candidate in the bucket
+        area = np.abs(
+            (prev_x - next_x)[:, None] * (y[:, start:stop] - prev_y[:, None])
+            - (prev_x[:, None] - x[None, start:stop]) * (next_y - prev_y)[:, None]
+        )
+        previous = start + np.nan_to_num(area, nan=-1.0).argmax(axis=1)
+        selected[:, bucket + 1] = previous
+    return selected
+
+
+def curve_frame(labels, x, y, x_column, y_column, label_column="Board", max_points=MAX_POINTS, log_x=False):
+    """Long plotting frame of the curves ``y`` (curves, n) over ``x`` (n), decimated to ``max_points`` in total.
+
+    With ``log_x`` the curves are decimated in log10(x), the space they are drawn in.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    curves, n = y.shape
+    per_curve = max(MIN_CURVE_POINTS, max_points // max(curves, 1))
+    indices = lttb_indices(np.log10(x) if log_x else x, y, per_curve)
+    return pd.DataFrame({
+        x_column: x[indices].ravel(),
+        y_column: np.take_along_axis(y, indices, axis=1).ravel(),
+        label_column: np.repeat(np.array(labels, dtype=object), indices.shape[1]),
+    })
+
+
+@stage_timer("cost curve data")
+def cost_curves(boards, solder_joints, defect_rates, x_column, grid=COST_GRID, x_max=None,
+                max_points=MAX_POINTS, log_x=False):
+    """Decimated long frame (x_column, Cost % Change, Board) with one curve per board, up to ``x_max``."""
+    scaling = scaling_grid(grid)
+    costs = cost_table(solder_joints, defect_rates, scaling)
+    if x_max is not None:
+        keep = scaling <= x_max
+        scaling, costs = scaling[keep], costs[:, keep]
+    return curve_frame(list(boards), scaling, costs, x_column, "Cost % Change", max_points=max_points, log_x=log_x)
+
+
+@stage_timer("cost chart figure")
+def line_chart(frame, x, y, color, title=None, labels=None, template="plotly_white", log_x=False,
+               webgl_points=WEBGL_POINTS):
+    """Line chart of ``frame`` with one trace per ``color`` value, like ``px.line``.
+
+    Traces are WebGL (``Scattergl``) once the frame has more than ``webgl_points`` rows.
+    """
+    labels = labels or {}
+    x_label, y_label, color_label = (labels.get(column, column) for column in (x, y, color))
+    trace = go.Scattergl if len(frame) > webgl_points else go.Scatter
+    hover = f"{color_label}=%{{fullData.name}}<br>{x_label}=%{{x}}<br>{y_label}=%{{y}}<extra></extra>"
+    traces = [
+        trace(x=group[x].to_numpy(), y=group[y].to_numpy(), mode="lines", name=str(name),
+              legendgroup=str(name), hovertemplate=hover)
+        for name, group in frame.groupby(color, sort=False)
+    ]
+    fig = go.Figure(data=traces)
+    fig.update_layout(template=template, title=title, legend_title_text=color_label,
+                      xaxis_title=x_label, yaxis_title=y_label)
+    if log_x:
+        fig.update_xaxes(type="log")
+    return fig
@@ -0,0 +1,164 @@
+"""Pick-and-place cycle time of many boards against one feeder master.
+
+Page 1 reports the component count and top / bottom P&P time of a single
+uploaded xydata file. A release screens hundreds of board revisions, so the
+same totals run here over a folder or zip of xydata files (xlsx
+``xydata_version`` sheet or placement CSV), spread across a process pool:
+
+    python -m core.pnp_batch <folder|boards.zip> -m simulation_db.xlsx [-o pnp_batch.parquet|pnp_batch.xlsx] [-w WORKERS]
+
+The ``FeederIndex`` of the feeder master is built once in the parent
+(memoized per file digest) and handed to each worker by the pool
+initializer, so a worker only reads and streams its boards. The output has
+one row per board with its component count, top / bottom P&P time and the
+packages that have no feeder master row. Boards that cannot be read are
+listed in an error table (the "Errors" sheet of the Excel output, or
+``<output>.errors.csv`` next to a Parquet file) rather than aborting the run.
+"""
+
+import argparse
+import io
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
+
+import pandas as pd
+
+from core.excel_export import write_sheets
+from core.feeder_index import CYCLE_TIME_COLUMN, PACKAGE_COLUMN, feeder_index_for_file
+from core.workbook_cache import read_bytes
+from core.xydata_stream import CHUNK_ROWS, PlacementTotals, iter_chunks
+
+
+BOARD_PATTERNS = ("*.xlsx", "*.csv")
+BOARD_COLUMNS = ["Board", "Placements", "Component Count", "Top P&P Time", "Bottom P&P Time", "Unmatched Placements", "Unmatched Package Count", "Unmatched Packages"]
+ERROR_COLUMNS = ["Board", "Error"]
+
+# Feeder index of the worker process, set by the pool initializer
+_feeder_index = None
+
+
+def _init_worker(feeder_index):
+    global _feeder_index
+    _feeder_index = feeder_index
+
+
+def _is_board(name):
+    # Skip Excel's "~$" lock files
+    return PurePosixPath(name).suffix.lower() in (".xlsx", ".csv") and not PurePosixPath(name).name.startswith("~$")
+
+
+def _zip_boards(file, prefix=""):
+    with zipfile.ZipFile(file if isinstance(file, (str, os.PathLike)) else io.BytesIO(read_bytes(file))) as archive:
+        return [
+            (prefix + info.filename, archive.read(info))
+            for info in sorted(archive.infolist(), key=lambda info: info.filename)
+            if not info.is_dir() and _is_board(info.filename) and not info.filename.startswith("__MACOSX/")
+        ]
+
+
+def find_boards(sources):
+    """``(board, source)`` pairs of the xydata files in ``sources``.
+
+    Each source is a directory (searched recursively), a zip archive or a
+    single xlsx / csv file, given as a path or an uploaded file. ``source``
+    is a path for files on disk and the raw bytes otherwise, so it pickles
+    cheaply to a worker.
+    """
+    boards = []
+    for source in sources:
+        if isinstance(source, (str, os.PathLike)) and Path(source).is_dir():
+            directory = Path(source)
+            paths = {path for pattern in BOARD_PATTERNS for path in directory.rglob(pattern)}
+            boards.extend((str(path.relative_to(directory)), str(path)) for path in sorted(paths) if _is_board(path.name))
+            continue
+        name = str(source) if isinstance(source, (str, os.PathLike)) else source.name
+        if name.lower().endswith(".zip"):
+            # Members of several uploaded archives are told apart by the archive name
+            boards.extend(_zip_boards(source, prefix="" if len(sources) == 1 else f"{Path(name).name}/"))
+        elif isinstance(source, (str, os.PathLike)):
+            boards.append((Path(source).name, str(source)))
+        else:
+            boards.append((name, read_bytes(source)))
+    return boards
+
+
+def summarize_board(board, source, feeder_index=None, chunk_rows=CHUNK_ROWS):
+    """Totals of one board as ``(row, error)``; one of the two is None.
+
+    ``row`` matches BOARD_COLUMNS. Without ``feeder_index`` the worker's
+    index from the pool initializer is used.
+    """
+    feeder_index = feeder_index or _feeder_index
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+        source.name = board  # is_csv goes by the file name
+    try:
+        totals = PlacementTotals(feeder_index)
+        for chunk in iter_chunks(source, chunk_rows):
+            totals.add(chunk)
+        counts = totals.package_counts()
+    except Exception as e:
+        return None, (board, f"{type(e).__name__}: {e}")
+
+    unmatched = counts[counts[CYCLE_TIME_COLUMN].isna()]
+    packages = sorted(unmatched[PACKAGE_COLUMN].dropna().astype(str).unique())
+    row = (board, totals.rows, totals.component_count, totals.top, totals.bottom, int(unmatched["Placements"].sum()), len(packages), ", ".join(packages))
+    return row, None
+
+
+def summarize_boards(boards, feeder_index, workers=None, chunk_rows=CHUNK_ROWS):
+    """Summarise ``(board, source)`` pairs from ``find_boards`` on a process pool.
+
+    Returns ``(boards, errors)`` DataFrames, in the order of ``boards``.
+    """
+    rows, errors = [], []
+    if boards:
+        labels, sources = zip(*boards)
+        workers = min(workers or os.cpu_count() or 1, len(boards))
+        chunksize = max(1, len(boards) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(feeder_index,)) as pool:
+            for row, error in pool.map(summarize_board, labels, sources, [None] * len(boards), [chunk_rows] * len(boards), chunksize=chunksize):
+                if row is not None:
+                    rows.append(row)
+                if error is not None:
+                    errors.append(error)
+    return pd.DataFrame(rows, columns=BOARD_COLUMNS), pd.DataFrame(errors, columns=ERROR_COLUMNS)
+
+
+def write_batch(boards, errors, output):
+    output = Path(output)
+    if output.suffix.lower() in (".xlsx", ".xlsm"):
+        write_sheets({"Boards": boards, "Errors": errors}, output)
+    else:
+        boards.to_parquet(output, index=False)
+        if not errors.empty:
+            errors.to_csv(output.with_suffix(".errors.csv"), index=False)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.pnp_batch", description="Component count and top / bottom P&P cycle time of a folder or zip of xydata files.")
+    parser.add_argument("sources", nargs="+", help="folders (searched recursively), zip archives or single .xlsx/.csv xydata files")
+    parser.add_argument("-m", "--feeder-master", required=True, help="workbook with the SMD_Package_Feeder_Master sheet (simulation_db.xlsx)")
+    parser.add_argument("-o", "--output", default="pnp_batch.parquet", help="output file, .parquet or .xlsx (default: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    for source in args.sources:
+        if not Path(source).exists():
+            parser.error(f"{source} does not exist")
+
+    feeder_index = feeder_index_for_file(args.feeder_master)
+    boards, errors = summarize_boards(find_boards(args.sources), feeder_index, args.workers)
+    output = write_batch(boards, errors, args.output)
+    print(f"{len(boards)} boards, {int((boards['Unmatched Package Count'] > 0).sum())} with unmatched packages -> {output}")
+    if not errors.empty:
+        print(f"{len(errors)} boards could not be read", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Stage timings of each Streamlit rerun, for the sidebar waterfall and JSONL traces.
+
+A page calls ``sidebar_panel(st, page)`` at the top, which runs
+``profile_rerun(st.session_state, page)`` and draws the sidebar waterfall.
+``profile_rerun`` closes the previous rerun's trace, appends it as one JSON line to
+``PROFILE_TRACE_FILE`` when that is set (tracing is off by default) and
+starts timing the new rerun. A trace file that reaches
+``PROFILE_TRACE_MAX_MB`` (default 50) is rotated to ``<file>.1``, replacing
+the previous one. ``stage_timer(name)`` then records a
+named stage, used as ``with stage_timer("load_data"):`` or as a decorator.
+The core modules time their own heavy steps (``load_data``, the xydata and
+MMR-EMS merges, the IEEE yield chain, chart data) the same way. Outside a
+profiled rerun, ``stage_timer`` does nothing.
+
+A rerun is closed when the next one starts, as a page may stop early
+(``st.stop``, ``st.rerun`` or an error). The waterfall therefore shows the
+last ``PROFILE_RERUNS`` completed reruns, and the total of a rerun is the
+end of its last stage.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import pandas as pd
+
+from core.lazy_import import lazy_module
+
+
+go = lazy_module("plotly.graph_objects")
+
+TRACE_PATH = os.environ.get("PROFILE_TRACE_FILE", "")
+TRACE_MAX_BYTES = int(float(os.environ.get("PROFILE_TRACE_MAX_MB", "50")) * 1024 * 1024)
+KEEP_RERUNS = int(os.environ.get("PROFILE_RERUNS", "10"))
+
+# Trace of the rerun running in this script thread
+_current = ContextVar("rerun_trace", default=None)
+
+
+class _RerunTrace:
+    def __init__(self, page, number):
+        self.page = page
+        self.number = number
+        self.started = time.time()
+        self.origin = time.perf_counter()
+        self.depth = 0
+        self.stages = []
+
+    def record(self):
+        return {
+            "page": self.page,
+            "rerun": self.number,
+            "started": self.started,
+            "total_ms": max((stage["start_ms"] + stage["duration_ms"] for stage in self.stages), default=0.0),
+            "stages": self.stages,
+        }
+
+
+@contextmanager
+def stage_timer(name):
+    """Time the enclosed block as stage ``name`` of the current rerun."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    depth = trace.depth
+    trace.depth += 1
+    try:
+        yield
+    finally:
+        trace.depth = depth
+        trace.stages.append({
+            "stage": name,
+            "start_ms": (start - trace.origin) * 1000,
+            "duration_ms": (time.perf_counter() - start) * 1000,
+            "depth": depth,
+        })
+
+
+class RerunProfiler:
+    """Stage timings of the last ``keep`` reruns of one page in one session."""
+
+    def __init__(self, page, keep=KEEP_RERUNS, trace_path=TRACE_PATH):
+        self.page = page
+        self.trace_path = trace_path
+        self.history = deque(maxlen=keep)
+        self._trace = None
+        self._reruns = 0
+
+    def start(self):
+        """Close the previous rerun's trace and start timing a new rerun."""
+        self.finish()
+        self._reruns += 1
+        self._trace = _RerunTrace(self.page, self._reruns)
+        _current.set(self._trace)
+
+    def finish(self):
+        if self._trace is None:
+            return
+        record = self._trace.record()
+        self._trace = None
+        self.history.append(record)
+        if self.trace_path:
+            try:
+                if os.path.exists(self.trace_path) and os.path.getsize(self.trace_path) >= TRACE_MAX_BYTES:
+                    os.replace(self.trace_path, self.trace_path + ".1")
+                with open(self.trace_path, "a", encoding="utf-8") as trace_file:
+                    trace_file.write(json.dumps(record) + "\n")
+            except OSError:
+                pass  # A read-only deployment still gets the sidebar waterfall
+
+    def waterfall(self):
+        """One row per stage of the kept reruns, most recent rerun first."""
+        rows = [
+            {"Rerun": record["rerun"], "Stage": stage["stage"], "Start (ms)": stage["start_ms"],
+             "Duration (ms)": stage["duration_ms"], "Depth": stage["depth"], "Total (ms)": record["total_ms"]}
+            for record in reversed(self.history)
+            for stage in sorted(record["stages"], key=lambda stage: stage["start_ms"])
+        ]
+        return pd.DataFrame(rows, columns=["Rerun", "Stage", "Start (ms)", "Duration (ms)", "Depth", "Total (ms)"])
+
+
+def profile_rerun(state, page):
+    """Start profiling a rerun of ``page``; the profilers live in ``state`` (st.session_state)."""
+    if "profilers" not in state:
+        state["profilers"] = {}
+    profilers = state["profilers"]
+    if page not in profilers:
+        profilers[page] = RerunProfiler(page)
+    profiler = profilers[page]
+    profiler.start()
+    return profiler
+
+
+def sidebar_panel(st, page):
+    """Profile this rerun of ``page`` and show the previous reruns in a sidebar "Rerun profile" expander."""
+    profiler = profile_rerun(st.session_state, page)
+    with st.sidebar.expander("Rerun profile"):
+        if profiler.history:
+            st.plotly_chart(waterfall_figure(profiler.waterfall()), use_container_width=True)
+        else:
+            st.caption("Stage timings appear here from the next rerun.")
+    return profiler
+
+
+def waterfall_figure(frame):
+    """Horizontal waterfall of ``RerunProfiler.waterfall()``: one bar per stage from its start."""
+    labels = [
+        f"#{rerun} " + "  " * depth + stage
+        for rerun, stage, depth in zip(frame["Rerun"], frame["Stage"], frame["Depth"])
+    ]
+    fig = go.Figure(go.Bar(
+        x=frame["Duration (ms)"],
+        base=frame["Start (ms)"],
+        y=labels,
+        orientation="h",
+        marker_color=frame["Rerun"],
+        hovertemplate="%{y}<br>start %{base:.1f} ms<br>%{x:.1f} ms<extra></extra>",
+    ))
+    fig.update_layout(
+        template="plotly_white",
+        xaxis_title="ms since rerun start",
+        yaxis={"autorange": "reversed"},
+        height=max(250, 22 * len(frame) + 80),
+        margin={"l": 10, "r": 10, "t": 10, "b": 40},
+        showlegend=False,
+    )
+    return fig
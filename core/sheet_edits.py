@@ -0,0 +1,265 @@
+"""Edited sheets kept as patches on top of the cached workbook originals.
+
+``SheetEdits`` replaces the plain ``st.session_state.edited_sheets`` dict and
+keeps its mapping interface: ``edits[name] = frame``, ``edits[name]``,
+``name in edits``, ``edits.get`` and ``edits.items()``. The page's current
+sheet stays in memory as is, since the page holds that frame anyway. Every
+other sheet is reduced to a patch against its original from
+``workbook_cache.original_sheets``, which is shared by all sessions. A patch
+holds the original row each edited row came from and the cells that differ
+from it. Rows are matched by a hash of their values, so inserting or
+removing a row and then ``reset_index`` does not turn every row below into
+an edit. A frame is rebuilt from its patch when it is read.
+
+Patches of a session, together with the undo/redo journal of the selected
+sheet (``edit_journal.journal_for``), are capped at ``SHEET_EDITS_MAX_MB``
+(default 64). When the cap is exceeded, the least recently used sheets are
+dropped and listed by ``pop_dropped``. The sheet just written and the
+journal are never dropped.
+"""
+
+import os
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+import numpy as np
+import pandas as pd
+
+
+MAX_BYTES = int(float(os.environ.get("SHEET_EDITS_MAX_MB", "64")) * 1024 * 1024)
+
+
+def _frame_bytes(frame):
+    return int(frame.memory_usage(deep=True).sum())
+
+
+def _array_bytes(values):
+    if values.dtype == object:
+        return int(pd.Series(values, copy=False).memory_usage(deep=True, index=False))
+    return int(values.nbytes)
+
+
+def _unchanged(new, old):
+    # Elementwise equality where NaN equals NaN; any comparison failure counts as a change
+    try:
+        with np.errstate(invalid="ignore"):
+            equal = np.asarray(new == old, dtype=bool)
+        if equal.shape != new.shape:
+            return np.zeros(len(new), dtype=bool)
+        return equal | (pd.isna(new) & pd.isna(old))
+    except (TypeError, ValueError):
+        return np.zeros(len(new), dtype=bool)
+
+
+def _row_keys(frame, columns):
+    # (row hash, occurrence) so repeated identical rows pair up one to one. Numbers are hashed
+    # as floats: a blank row added to an int column turns the whole column into floats.
+    values = pd.DataFrame({
+        i: frame[column].astype(float) if pd.api.types.is_numeric_dtype(frame[column]) and frame[column].dtype != bool else frame[column]
+        for i, column in enumerate(columns)
+    })
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+    return pd.MultiIndex.from_arrays([hashes, occurrence])
+
+
+def _source_rows(base, frame, columns):
+    """Row of ``base`` each row of ``frame`` came from, or -1 for a new row."""
+    if len(frame) == len(base):
+        # Same length (the usual cell edit): keep rows in place
+        return np.arange(len(frame))
+    if not columns:
+        return np.full(len(frame), -1)
+    try:
+        rows = _row_keys(base, columns).get_indexer(_row_keys(frame, columns))
+    except TypeError:
+        rows = np.full(len(frame), -1)
+    # Pair the remaining rows in order, so an edited row is stored as its changed cells
+    unmatched = np.flatnonzero(rows < 0)
+    free = np.setdiff1d(np.arange(len(base)), rows[rows >= 0])
+    paired = min(len(unmatched), len(free))
+    rows[unmatched[:paired]] = free[:paired]
+    return rows
+
+
+def _encode_runs(rows):
+    # Source rows as runs of consecutive originals: (first position, first source row) per run
+    if not len(rows):
+        return np.array([], dtype=np.int32), np.array([], dtype=np.int32)
+    starts = np.flatnonzero(np.diff(rows, prepend=rows[0] - 2) != 1)
+    return starts.astype(np.int32), rows[starts].astype(np.int32)
+
+
+def _decode_runs(starts, sources, length):
+    lengths = np.diff(np.append(starts, length))
+    return np.arange(length) - np.repeat(starts, lengths) + np.repeat(sources, lengths)
+
+
+class SheetPatch:
+    """``frame`` as the differences from ``base``; ``apply(base)`` rebuilds it."""
+
+    def __init__(self, base, frame):
+        columns = [column for column in frame.columns if column in base.columns]
+        rows = _source_rows(base, frame, columns)
+        new_rows = rows < 0
+        self.index = frame.index
+        self.columns = frame.columns
+        self.dtypes = frame.dtypes
+        self.runs = None if np.array_equal(rows, np.arange(len(base))) else _encode_runs(rows)
+        self.cells = {}  # column -> (positions, values); positions None for a column missing from the original
+        self.nbytes = 0 if self.runs is None else int(self.runs[0].nbytes + self.runs[1].nbytes)
+        for column in frame.columns:
+            values = frame[column].to_numpy()
+            if column not in base.columns:
+                self.cells[column] = (None, values)
+                self.nbytes += _array_bytes(values)
+                continue
+            original = base[column].to_numpy()[np.where(new_rows, 0, rows)]
+            positions = np.flatnonzero(~_unchanged(values, original) | new_rows).astype(np.int32)
+            if len(positions):
+                self.cells[column] = (positions, values[positions])
+                self.nbytes += int(positions.nbytes) + _array_bytes(values[positions])
+
+    def apply(self, base):
+        rows = None if self.runs is None else np.maximum(_decode_runs(*self.runs, len(self.index)), 0)
+        data = {}
+        for column in self.columns:
+            positions, values = self.cells.get(column, (np.array([], dtype=np.int32), None))
+            if positions is None:
+                data[column] = values.copy()
+                continue
+            original = base[column].to_numpy()
+            column_values = original.copy() if rows is None else original[rows]
+            if values is not None:
+                if not np.can_cast(values.dtype, column_values.dtype, casting="same_kind"):
+                    column_values = column_values.astype(object)
+                column_values[positions] = values
+            data[column] = column_values
+        frame = pd.DataFrame(data, index=self.index, columns=self.columns)
+        for column, dtype in self.dtypes.items():
+            if frame[column].dtype != dtype:
+                try:
+                    frame[column] = frame[column].astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+        return frame
+
+
+def _patchable(base, frame):
+    return (
+        isinstance(frame, pd.DataFrame)
+        and base is not None
+        and len(base) > 0
+        and base.columns.is_unique
+        and frame.columns.is_unique
+    )
+
+
+class SheetEdits(MutableMapping):
+    """Edited sheets by name, stored as patches against their originals (see module docstring)."""
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+        self._bases = {}
+        self._stored = {}  # name -> (frame or SheetPatch, bytes); None for the current sheet
+        self._order = OrderedDict()  # least recently used first
+        self._current = None  # (name, frame) of the sheet the page is working on
+        self._dropped = []
+        self.journal = None  # (key, EditJournal) of the selected sheet, set by edit_journal.journal_for
+
+    def original(self, name):
+        """The tracked original of sheet ``name``, or None."""
+        return self._bases.get(name)
+
+    def track(self, sheets):
+        """Use ``sheets`` (name -> cached original frame) as the originals edits are stored against."""
+        for name, base in sheets.items():
+            if self._bases.get(name) is base:
+                continue
+            stored = self._stored.get(name)
+            frame = self._restore(name, stored[0]) if stored is not None else None
+            self._bases[name] = base
+            if stored is not None:
+                self._stored[name] = self._compact(name, frame)
+
+    def _compact(self, name, frame):
+        base = self._bases.get(name)
+        full_bytes = _frame_bytes(frame)
+        if _patchable(base, frame):
+            patch = SheetPatch(base, frame)
+            if patch.nbytes < full_bytes:
+                return patch, patch.nbytes
+        return frame, full_bytes
+
+    def _restore(self, name, stored):
+        if isinstance(stored, SheetPatch):
+            return stored.apply(self._bases[name])
+        return stored
+
+    def _release_current(self):
+        if self._current is None:
+            return
+        name, frame = self._current
+        self._current = None
+        self._stored[name] = self._compact(name, frame)
+        self._enforce_limit(keep=name)
+
+    def enforce_limit(self):
+        """Drop least recently used sheets until the patches and the journal fit the cap."""
+        self._enforce_limit(keep=None if self._current is None else self._current[0])
+
+    def _enforce_limit(self, keep):
+        total = self.nbytes()
+        for name in list(self._order):
+            if total <= self.max_bytes:
+                break
+            stored = self._stored.get(name)
+            if name == keep or stored is None:
+                continue
+            total -= stored[1]
+            del self._stored[name]
+            del self._order[name]
+            self._dropped.append(name)
+
+    def _touch(self, name):
+        self._order[name] = None
+        self._order.move_to_end(name)
+
+    def __setitem__(self, name, frame):
+        if self._current is not None and self._current[0] != name:
+            self._release_current()
+        self._current = (name, frame)
+        self._stored[name] = None
+        self._touch(name)
+
+    def __getitem__(self, name):
+        if self._current is not None and self._current[0] == name:
+            self._touch(name)
+            return self._current[1]
+        stored = self._stored[name]
+        frame = self._restore(name, stored[0])
+        self.__setitem__(name, frame)
+        return frame
+
+    def __delitem__(self, name):
+        if self._current is not None and self._current[0] == name:
+            self._current = None
+        del self._stored[name]
+        del self._order[name]
+
+    def __iter__(self):
+        # A snapshot: reading a sheet during iteration may compact or drop another one
+        return iter(list(self._stored))
+
+    def __len__(self):
+        return len(self._stored)
+
+    def nbytes(self):
+        """Bytes held by the stored patches and frames and by the journal, excluding the current sheet."""
+        total = sum(stored[1] for stored in self._stored.values() if stored is not None)
+        return total + (0 if self.journal is None else self.journal[1].nbytes())
+
+    def pop_dropped(self):
+        """Names of the sheets dropped for the memory cap since the last call."""
+        dropped, self._dropped = self._dropped, []
+        return dropped
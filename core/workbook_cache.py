@@ -0,0 +1,189 @@
+"""Disk-backed cache of parsed workbooks, keyed by the SHA-256 of the file bytes.
+
+Every sheet of a workbook is stored once as a Parquet file under
+``WORKBOOK_CACHE_DIR`` (default ``~/.cache/virtual_simulation/workbooks``),
+so re-uploading the same file - from any page, or after a server restart -
+skips the openpyxl parse. The cache is capped at ``WORKBOOK_CACHE_MAX_MB``
+and evicts the least recently used workbooks first.
+
+Column headers of Excel sheets are not always strings (dates, numbers), so
+each sheet's real column names are pickled next to its data rather than
+written to the JSON manifest.
+"""
+
+import hashlib
+import io
+import json
+import os
+import pickle
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from core.lazy_import import lazy_module
+from core.profiling import stage_timer
+
+
+CACHE_DIR = Path(os.environ.get("WORKBOOK_CACHE_DIR", Path.home() / ".cache" / "virtual_simulation" / "workbooks"))
+MAX_CACHE_BYTES = int(float(os.environ.get("WORKBOOK_CACHE_MAX_MB", "512")) * 1024 * 1024)
+MANIFEST_NAME = "manifest.json"
+
+pa = lazy_module("pyarrow")
+
+# Parsed workbooks kept in this process, so a Streamlit rerun does not even touch the disk;
+# shared by every session thread, hence the lock
+MEMORY_ENTRIES = 8
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def read_bytes(file):
+    """Return the raw bytes of an UploadedFile, a file-like object or a path."""
+    if isinstance(file, (str, os.PathLike)):
+        return Path(file).read_bytes()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    position = file.tell()
+    file.seek(0)
+    data = file.read()
+    file.seek(position)
+    return data
+
+
+def file_digest(file):
+    return hashlib.sha256(read_bytes(file)).hexdigest()
+
+
+def _copy_sheets(sheets):
+    # Pages edit the frames they get back, so never hand out the cached objects
+    return {name: frame.copy() for name, frame in sheets.items()}
+
+
+def _entry_size(entry):
+    return sum(path.stat().st_size for path in entry.iterdir() if path.is_file())
+
+
+def _write_sheet(frame, path_stem):
+    # Parquet needs unique string column names; the real names are pickled alongside
+    stored = frame.copy()
+    stored.columns = [f"c{i}" for i in range(stored.shape[1])]
+    try:
+        stored.to_parquet(path_stem.with_suffix(".parquet"), index=False)
+        pd.to_pickle(frame.columns, path_stem.with_suffix(".columns.pkl"))
+        return path_stem.with_suffix(".parquet").name, path_stem.with_suffix(".columns.pkl").name
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # Mixed-type object columns cannot be expressed in Arrow; keep them as a pickle
+        frame.to_pickle(path_stem.with_suffix(".pkl"))
+        return path_stem.with_suffix(".pkl").name, None
+
+
+def _read_sheet(entry, sheet):
+    path = entry / sheet["file"]
+    if path.suffix == ".pkl":
+        return pd.read_pickle(path)
+    frame = pd.read_parquet(path)
+    frame.columns = pd.read_pickle(entry / sheet["columns_file"])
+    return frame
+
+
+def _store_entry(cache_dir, digest, sheets):
+    # Build the entry in a scratch directory and rename it into place, so a
+    # crash or a concurrent upload never leaves a half-written entry behind
+    staging = cache_dir / f".{digest}.{uuid.uuid4().hex}"
+    staging.mkdir(parents=True)
+    try:
+        manifest = {"sheets": []}
+        for i, (name, frame) in enumerate(sheets.items()):
+            data_file, columns_file = _write_sheet(frame, staging / f"sheet_{i}")
+            sheet = {"name": name, "file": data_file}
+            if columns_file:
+                sheet["columns_file"] = columns_file
+            manifest["sheets"].append(sheet)
+        (staging / MANIFEST_NAME).write_text(json.dumps(manifest))
+        os.replace(staging, cache_dir / digest)
+    except OSError:
+        # A full disk or an entry written concurrently: serve this upload uncached
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _load_entry(entry):
+    manifest_path = entry / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text())
+        sheets = {sheet["name"]: _read_sheet(entry, sheet) for sheet in manifest["sheets"]}
+    except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError):
+        return None
+    # Touch the manifest so eviction sees this entry as recently used
+    os.utime(manifest_path)
+    return sheets
+
+
+def evict(cache_dir=None, max_bytes=None):
+    """Delete least recently used entries until the cache fits in ``max_bytes``."""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    if not cache_dir.is_dir():
+        return
+
+    entries = []
+    for entry in cache_dir.iterdir():
+        manifest_path = entry / MANIFEST_NAME
+        if entry.is_dir() and manifest_path.exists():
+            entries.append((manifest_path.stat().st_mtime, _entry_size(entry), entry))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries, key=lambda item: item[0]):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+
+
+def _cached_workbook(file, cache_dir=None, max_bytes=None):
+    data = read_bytes(file)
+    digest = hashlib.sha256(data).hexdigest()
+
+    with _memory_lock:
+        sheets = _memory_cache.get(digest)
+        if sheets is not None:
+            _memory_cache.move_to_end(digest)
+            return sheets
+
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    sheets = _load_entry(cache_dir / digest)
+    if sheets is None:
+        sheets = pd.read_excel(io.BytesIO(data), sheet_name=None)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            _store_entry(cache_dir, digest, sheets)
+            evict(cache_dir, max_bytes)
+        except OSError:
+            pass
+
+    with _memory_lock:
+        _memory_cache[digest] = sheets
+        while len(_memory_cache) > MEMORY_ENTRIES:
+            _memory_cache.popitem(last=False)
+    return sheets
+
+
+def read_excel_cached(file, cache_dir=None, max_bytes=None):
+    """Drop-in replacement for ``pd.read_excel(file, sheet_name=None)``."""
+    return _copy_sheets(_cached_workbook(file, cache_dir, max_bytes))
+
+
+def original_sheets(file):
+    """The cached sheets themselves, shared by every session: read them, never modify them."""
+    return _cached_workbook(file)
+
+
+@stage_timer("load_data")
+def load_data(file):
+    """Load an uploaded CSV as one frame, or every sheet of a workbook as a dict."""
+    if file.name.endswith('.csv'):
+        return pd.read_csv(file)
+    return read_excel_cached(file)
@@ -0,0 +1,176 @@
+"""Chunked reading of xydata placement files (CSV or the xlsx ``xydata_version`` sheet).
+
+Page 1 used to load the whole placement sheet to count ``REFDES`` and sum
+the top / bottom ``Cycle Time_Master``. A panel export can have millions of
+placements, so the file is read here in chunks of ``XYDATA_CHUNK_ROWS`` rows
+(default 100000): ``pd.read_csv(chunksize=...)`` for CSV, openpyxl's
+read-only row iterator for xlsx. ``PlacementTotals`` keeps running
+aggregates over the chunks (component count, per-side pick-and-place time
+through the ``FeederIndex``, placements per package and side), so memory is
+bounded by the chunk size and the number of distinct packages, not by the
+file. ``write_joined`` streams the feeder-master join into the download the
+same way.
+
+In CSV files ``REFDES``, ``Package`` and ``Topbottom`` are read as text, so
+a package such as ``0402`` keeps its leading zero.
+"""
+
+import hashlib
+import io
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.excel_export import iter_frame_rows
+from core.feeder_index import CYCLE_TIME_COLUMN, PACKAGE_COLUMN, SIDE_COLUMN
+from core.lazy_import import lazy_module
+from core.master_data import header_names
+from core.profiling import stage_timer
+from core.workbook_cache import read_bytes
+
+
+openpyxl = lazy_module("openpyxl")
+
+CHUNK_ROWS = int(os.environ.get("XYDATA_CHUNK_ROWS", "100000"))
+XYDATA_SHEET = "xydata_version"
+OUTPUT_SHEET = "Output"
+REFDES_COLUMN = "REFDES"
+TEXT_COLUMNS = (REFDES_COLUMN, PACKAGE_COLUMN, SIDE_COLUMN)
+SIDE_NAMES = {"YES": "Top", "NO": "Bottom"}
+
+MEMO_ENTRIES = 8
+_memo = OrderedDict()
+
+
+def is_csv(file):
+    """True for a .csv upload or path; other files are read as xlsx."""
+    name = str(file) if isinstance(file, (str, os.PathLike)) else getattr(file, "name", "")
+    return name.lower().endswith(".csv")
+
+
+def _open(file):
+    if isinstance(file, (str, os.PathLike)):
+        return open(file, "rb")
+    file.seek(0)
+    return file
+
+
+def _csv_chunks(file, chunk_rows):
+    source = _open(file)
+    try:
+        header = pd.read_csv(source, nrows=0, encoding="utf-8-sig").columns
+        source.seek(0)
+        dtype = {column: str for column in TEXT_COLUMNS if column in header}
+        yield from pd.read_csv(source, chunksize=chunk_rows, dtype=dtype, encoding="utf-8-sig")
+    finally:
+        if isinstance(file, (str, os.PathLike)):
+            source.close()
+
+
+def _xlsx_chunks(file, chunk_rows, sheet_name):
+    workbook = openpyxl.load_workbook(io.BytesIO(read_bytes(file)), read_only=True, data_only=True)
+    try:
+        if sheet_name not in workbook.sheetnames:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows, ())
+        columns = header_names(header)
+        records = []
+        chunks = 0
+        for row in rows:
+            if not any(value is not None for value in row):
+                continue  # read-only sheets can report padded, empty rows
+            records.append(row[:len(columns)] + (None,) * (len(columns) - len(row)))
+            if len(records) == chunk_rows:
+                yield pd.DataFrame.from_records(records, columns=columns).infer_objects()
+                records = []
+                chunks += 1
+        if records or not chunks:
+            yield pd.DataFrame.from_records(records, columns=columns).infer_objects()
+    finally:
+        workbook.close()
+
+
+def iter_chunks(file, chunk_rows=CHUNK_ROWS, sheet_name=XYDATA_SHEET):
+    """Yield the placements of ``file`` as DataFrames of at most ``chunk_rows`` rows."""
+    if is_csv(file):
+        return _csv_chunks(file, chunk_rows)
+    return _xlsx_chunks(file, chunk_rows, sheet_name)
+
+
+class PlacementTotals:
+    """Running aggregates of placement chunks against one ``FeederIndex``."""
+
+    def __init__(self, feeder_index):
+        self.feeder_index = feeder_index
+        self.rows = 0
+        self.component_count = 0
+        self.top = 0.0
+        self.bottom = 0.0
+        self._counts = None  # placements per (Package, Topbottom)
+
+    def add(self, chunk):
+        codes = self.feeder_index.codes(chunk[PACKAGE_COLUMN])
+        times = self.feeder_index.pnp_cycle_times(chunk, codes)
+        self.rows += len(chunk)
+        self.component_count += int(chunk[REFDES_COLUMN].count())
+        self.top += float(times["top"])
+        self.bottom += float(times["bottom"])
+        counts = chunk.groupby([PACKAGE_COLUMN, SIDE_COLUMN], dropna=False, sort=False).size()
+        if self._counts is not None:
+            counts = pd.concat([self._counts, counts]).groupby(level=[0, 1], dropna=False, sort=False).sum()
+        self._counts = counts
+
+    def package_counts(self):
+        """Placements per (Package, Topbottom) with the package's cycle time and total P&P time."""
+        if self._counts is None:
+            counts = pd.DataFrame({PACKAGE_COLUMN: [], SIDE_COLUMN: [], "Placements": np.array([], dtype=np.int64)})
+        else:
+            counts = self._counts.rename("Placements").reset_index()
+            counts.columns = [PACKAGE_COLUMN, SIDE_COLUMN, "Placements"]
+        codes = self.feeder_index.codes(counts[PACKAGE_COLUMN])
+        counts[CYCLE_TIME_COLUMN] = np.where(codes < len(self.feeder_index.packages), self.feeder_index.cycle_time[codes], np.nan)
+        counts["P&P Time"] = counts["Placements"] * self.feeder_index.cycle_time[codes]
+        counts["Side"] = counts[SIDE_COLUMN].map(SIDE_NAMES)
+        return counts.sort_values("Placements", ascending=False, ignore_index=True)
+
+
+@stage_timer("xydata stream")
+def placement_totals(file, feeder_index, chunk_rows=CHUNK_ROWS):
+    """``PlacementTotals`` of a whole placement file, memoized by file digest and feeder index."""
+    # The memoized totals keep their feeder index alive, so its id is not reused while memoized
+    key = (hashlib.sha256(read_bytes(file)).hexdigest(), id(feeder_index), is_csv(file), chunk_rows)
+    if key in _memo:
+        _memo.move_to_end(key)
+        return _memo[key]
+    totals = PlacementTotals(feeder_index)
+    for chunk in iter_chunks(file, chunk_rows):
+        totals.add(chunk)
+    _memo[key] = totals
+    while len(_memo) > MEMO_ENTRIES:
+        _memo.popitem(last=False)
+    return totals
+
+
+def write_joined(file, feeder_index, output, chunk_rows=CHUNK_ROWS):
+    """Write the placements joined with the feeder master to ``output``, chunk by chunk.
+
+    A CSV input gives a CSV of the joined rows. An xlsx input gives a
+    workbook with the original ``xydata_version`` sheet and the joined
+    ``Output`` sheet, written in write-only mode (the file is read twice).
+    """
+    if is_csv(file):
+        for i, chunk in enumerate(iter_chunks(file, chunk_rows)):
+            output.write(feeder_index.join(chunk).to_csv(index=False, header=i == 0).encode("utf-8"))
+        return output
+
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet_name, joined in ((XYDATA_SHEET, False), (OUTPUT_SHEET, True)):
+        worksheet = workbook.create_sheet(title=sheet_name)
+        for i, chunk in enumerate(iter_chunks(file, chunk_rows)):
+            for row in iter_frame_rows(feeder_index.join(chunk) if joined else chunk, header=i == 0):
+                worksheet.append(row)
+    workbook.save(output)
+    return output
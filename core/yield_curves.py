@@ -0,0 +1,93 @@
+"""Yield vs. solder defect rate scaling curves for the Homepage and page 3.
+
+``Yield (%) = 100 * exp(-alpha * scale * DR * N)`` over a grid of defect
+rate scalings, for every board (N solder joints, DR per joint) and alpha.
+All boards x alphas x grid points are one broadcast. The long plotting
+frames are kept in a bounded LRU cache keyed by the exact inputs, so a
+rerun, a slider move back to a previous value or a page switch reuses the
+frame instead of rebuilding it board by board.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from core.profiling import stage_timer
+
+
+# (spacing, start, stop, points): np.logspace(-1, 2, 50) is 0.1 .. 100 on a log scale
+LOG_GRID = ("log", -1, 2, 50)
+CLUSTERING_GRID = ("log", -1, 2, 10)
+CACHE_ENTRIES = 64
+
+
+def scaling_grid(grid):
+    """Defect rate scaling values of a grid spec."""
+    spacing, start, stop, points = grid
+    if spacing == "log":
+        return np.logspace(start, stop, points)
+    return np.linspace(start, stop, points)
+
+
+def yield_table(solder_joints, defect_rates, grid=LOG_GRID, alphas=(1.0,)):
+    """Yield (%) of shape (alphas, boards, grid points)."""
+    joints = np.asarray(solder_joints, dtype=float)
+    rates = np.asarray(defect_rates, dtype=float)
+    alphas = np.asarray(alphas, dtype=float)
+    scaling = scaling_grid(grid)
+    # (A, 1, 1) x (1, B, 1) x (1, 1, G)
+    exposure = (rates * joints)[None, :, None] * scaling[None, None, :]
+    return 100 * np.exp(-alphas[:, None, None] * exposure)
+
+
+def _numeric(values):
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+
+
+@lru_cache(maxsize=CACHE_ENTRIES)
+def _board_frame(boards, joints_key, rates_key, grid):
+    joints = np.frombuffer(joints_key)
+    rates = np.frombuffer(rates_key)
+    yields = yield_table(joints, rates, grid)[0]
+    scaling = scaling_grid(grid)
+    return pd.DataFrame({
+        "Defect Rate Scaling": np.tile(scaling, len(boards)),
+        "Yield (%)": yields.ravel(),
+        "Board": np.repeat(np.array(boards, dtype=object), len(scaling)),
+    })
+
+
+@lru_cache(maxsize=CACHE_ENTRIES)
+def _alpha_frame(joints, rate, alphas, labels, grid):
+    yields = yield_table([joints], [rate], grid, alphas)[:, 0, :]
+    scaling = scaling_grid(grid)
+    return pd.DataFrame({
+        "Defect Rate Scaling": np.tile(scaling, len(alphas)),
+        "Yield (%)": yields.ravel(),
+        "Alpha": np.repeat(np.array(labels, dtype=object), len(scaling)),
+    })
+
+
+@stage_timer("yield curve data")
+def board_curves(boards, solder_joints, defect_rates, grid=LOG_GRID):
+    """Long frame (Defect Rate Scaling, Yield (%), Board) with one curve per board."""
+    boards = tuple(boards)
+    # Byte keys hash NaN consistently, unlike tuples of floats
+    frame = _board_frame(boards, _numeric(solder_joints).tobytes(), _numeric(defect_rates).tobytes(), tuple(grid))
+    return frame.copy()
+
+
+@stage_timer("clustering curve data")
+def alpha_curves(solder_joints, defect_rate, alphas, labels=None, grid=CLUSTERING_GRID):
+    """Long frame (Defect Rate Scaling, Yield (%), Alpha) with one curve per alpha for one board."""
+    alphas = tuple(float(alpha) for alpha in alphas)
+    labels = tuple(labels) if labels is not None else tuple(f"alpha = {alpha:g}" for alpha in alphas)
+    joints, rate = _numeric([solder_joints, defect_rate])
+    frame = _alpha_frame(joints, rate, alphas, labels, tuple(grid))
+    return frame.copy()
+
+
+def cache_info():
+    """Hit / miss counters of both frame caches."""
+    return {"boards": _board_frame.cache_info(), "alphas": _alpha_frame.cache_info()}
@@ -0,0 +1,192 @@
+"""Monte Carlo version of the IEEE yield chain.
+
+Defect rate, test efficiency and alpha are sampled from user-chosen
+distributions and pushed through ``ieee_yield.yield_chain`` a chunk of
+trials at a time. Every chunk gets its own child of one ``SeedSequence``, so
+a run is reproducible for a given seed no matter how many worker threads
+execute the chunks. Chunks are reduced straight into fixed-bin histograms on
+[0, 1] (plus running sums), so memory stays bounded by the chunk size and
+percentiles are read off the merged histograms instead of a stored sample.
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.ieee_yield import CATEGORIES, yield_chain
+from core.profiling import stage_timer
+
+
+DISTRIBUTIONS = ("Fixed", "Uniform", "Triangular", "Normal", "Lognormal")
+
+# Parameters each distribution expects in its spec
+DISTRIBUTION_PARAMS = {
+    "Fixed": ("value",),
+    "Uniform": ("low", "high"),
+    "Triangular": ("low", "mode", "high"),
+    "Normal": ("mean", "sd"),
+    "Lognormal": ("mean", "sd"),
+}
+
+SIMULATED_POINTS = ("Poisson Yield (Ync)", "Clustered Yield (Ycl)", "Overall yield")
+DEFAULT_PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+
+# Valid range of each sampled input; samples outside are clipped
+INPUT_BOUNDS = {
+    "defect_rate": (0.0, 1.0 - 1e-12),
+    "test_efficiency": (0.0, 1.0),
+    "alpha": (1e-9, np.inf),
+}
+
+
+def fixed(value):
+    return {"distribution": "Fixed", "value": value}
+
+
+def check_spec(spec):
+    """Raise ValueError when a distribution spec's parameters cannot be sampled."""
+    kind = spec["distribution"]
+    if kind not in DISTRIBUTION_PARAMS:
+        raise ValueError(f"Unknown distribution {kind!r}, expected one of {DISTRIBUTIONS}")
+    if kind == "Uniform" and not spec["low"] <= spec["high"]:
+        raise ValueError(f"Uniform distribution needs low <= high, got low={spec['low']:g}, high={spec['high']:g}")
+    if kind == "Triangular" and not (spec["low"] <= spec["mode"] <= spec["high"] and spec["low"] < spec["high"]):
+        raise ValueError(f"Triangular distribution needs low <= mode <= high and low < high, got low={spec['low']:g}, mode={spec['mode']:g}, high={spec['high']:g}")
+    if kind in ("Normal", "Lognormal") and not spec["sd"] >= 0:
+        raise ValueError(f"{kind} distribution needs sd >= 0, got sd={spec['sd']:g}")
+    if kind == "Lognormal" and not spec["mean"] > 0:
+        raise ValueError(f"Lognormal distribution needs mean > 0, got mean={spec['mean']:g}")
+
+
+def sample(rng, spec, size):
+    """Draw ``size`` values from a distribution spec such as ``{"distribution": "Normal", "mean": 0.9, "sd": 0.02}``."""
+    check_spec(spec)
+    kind = spec["distribution"]
+    if kind == "Fixed":
+        return np.full(size, float(spec["value"]))
+    if kind == "Uniform":
+        return rng.uniform(spec["low"], spec["high"], size)
+    if kind == "Triangular":
+        return rng.triangular(spec["low"], spec["mode"], spec["high"], size)
+    if kind == "Normal":
+        return rng.normal(spec["mean"], spec["sd"], size)
+    if kind == "Lognormal":
+        # Spec holds the mean / sd of the variable itself, not of its log
+        mean, sd = float(spec["mean"]), float(spec["sd"])
+        sigma2 = math.log1p((sd / mean) ** 2)
+        return rng.lognormal(math.log(mean) - sigma2 / 2, math.sqrt(sigma2), size)
+
+
+def _empty_totals(bins):
+    shape = (len(SIMULATED_POINTS), len(CATEGORIES))
+    return {
+        "counts": np.zeros(shape + (bins,), dtype=np.int64),
+        "n": np.zeros(shape, dtype=np.int64),
+        "sum": np.zeros(shape),
+        "sum_sq": np.zeros(shape),
+    }
+
+
+def _run_chunk(seed_seq, size, opportunities, specs, bins):
+    rng = np.random.Generator(np.random.PCG64(seed_seq))
+    inputs = {
+        name: np.clip(sample(rng, specs[name], size), *INPUT_BOUNDS[name])[:, None]
+        for name in ("defect_rate", "test_efficiency", "alpha")
+    }
+    # (trials, 1) inputs against (categories,) opportunities -> (trials, categories)
+    chain = yield_chain(opportunities, inputs["defect_rate"], inputs["test_efficiency"], inputs["alpha"])
+
+    totals = _empty_totals(bins)
+    for p, point in enumerate(SIMULATED_POINTS):
+        values = chain[point]
+        for c in range(len(CATEGORIES)):
+            column = values[:, c]
+            column = column[np.isfinite(column)]
+            bin_idx = np.minimum((column * bins).astype(np.int64), bins - 1)
+            totals["counts"][p, c] = np.bincount(bin_idx, minlength=bins)
+            totals["n"][p, c] = column.size
+            totals["sum"][p, c] = column.sum()
+            totals["sum_sq"][p, c] = np.square(column).sum()
+    return totals
+
+
+@stage_timer("yield Monte Carlo")
+def simulate_yield(opportunities, defect_rate, test_efficiency, alpha, trials=1_000_000, chunk_size=250_000, seed=None, workers=None, bins=10_000):
+    """Run ``trials`` Monte Carlo trials of the yield chain.
+
+    ``opportunities`` holds one fixed count per category (NaN leaves a
+    category out). ``defect_rate`` (per opportunity), ``test_efficiency``
+    (fraction) and ``alpha`` are distribution specs, see ``sample``.
+    Returns the merged histogram totals consumed by ``percentile_table`` and
+    ``histogram_frame``.
+    """
+    opportunities = np.asarray(opportunities, dtype=float)
+    specs = {"defect_rate": defect_rate, "test_efficiency": test_efficiency, "alpha": alpha}
+    # Fail before any chunk is scheduled rather than inside a worker thread
+    for spec in specs.values():
+        check_spec(spec)
+    trials, chunk_size = int(trials), int(chunk_size)
+
+    chunk_sizes = [chunk_size] * (trials // chunk_size)
+    if trials % chunk_size:
+        chunk_sizes.append(trials % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    totals = _empty_totals(bins)
+    # NumPy releases the GIL inside the sampling and ufunc loops, so threads scale
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(lambda args: _run_chunk(*args, opportunities, specs, bins), zip(seeds, chunk_sizes)):
+            for key in totals:
+                totals[key] += chunk[key]
+
+    totals["trials"] = trials
+    totals["bins"] = bins
+    totals["seed"] = seeds[0].entropy if seeds else seed
+    return totals
+
+
+def _histogram_percentiles(counts, percentiles, bins):
+    cumulative = np.cumsum(counts)
+    total = cumulative[-1]
+    if total == 0:
+        return np.full(len(percentiles), np.nan)
+    targets = np.asarray(percentiles, dtype=float) / 100 * total
+    idx = np.minimum(np.searchsorted(cumulative, targets, side="left"), bins - 1)
+    below = np.where(idx > 0, cumulative[idx - 1], 0)
+    # Linear interpolation inside the bin the target falls into
+    fraction = np.where(counts[idx] > 0, (targets - below) / np.maximum(counts[idx], 1), 0)
+    return (idx + np.clip(fraction, 0, 1)) / bins
+
+
+def percentile_table(result, percentiles=DEFAULT_PERCENTILES):
+    """One row per (point, category) with mean, std and the requested percentiles."""
+    rows = []
+    for p, point in enumerate(SIMULATED_POINTS):
+        for c, category in enumerate(CATEGORIES):
+            n = result["n"][p, c]
+            mean = result["sum"][p, c] / n if n else np.nan
+            variance = result["sum_sq"][p, c] / n - mean ** 2 if n else np.nan
+            row = {"Point": point, "Category": category, "Trials": n, "Mean": mean, "Std": math.sqrt(max(variance, 0)) if n else np.nan}
+            row.update({f"P{q:g}": value for q, value in zip(percentiles, _histogram_percentiles(result["counts"][p, c], percentiles, result["bins"]))})
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def histogram_frame(result, point, category, max_bars=200):
+    """Histogram of one simulated point, re-binned to at most ``max_bars`` bars over its occupied range."""
+    counts = result["counts"][SIMULATED_POINTS.index(point), CATEGORIES.index(category)]
+    bins = result["bins"]
+    occupied = np.flatnonzero(counts)
+    if occupied.size == 0:
+        return pd.DataFrame({"Yield": [], "Trials": []})
+
+    first, last = occupied[0], occupied[-1] + 1
+    group = max(1, math.ceil((last - first) / max_bars))
+    last = first + math.ceil((last - first) / group) * group
+    padded = np.zeros(last - first, dtype=np.int64)
+    padded[: min(last, bins) - first] = counts[first:min(last, bins)]
+    grouped = padded.reshape(-1, group).sum(axis=1)
+    centers = (first + group * (np.arange(grouped.size) + 0.5)) / bins
+    return pd.DataFrame({"Yield": centers, "Trials": grouped})
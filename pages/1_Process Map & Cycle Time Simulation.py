@@ -1,13 +1,20 @@
 import streamlit as st
 import pandas as pd
-import openpyxl
 import os
-from openpyxl.utils import get_column_letter
-from openpyxl.utils.dataframe import dataframe_to_rows
 import os
 import io
 import tempfile
-import numpy as np
+from core.feeder_index import feeder_index_for_file
+from core.line_balancing import balance_line, tasks_from_process_map
+from core.line_des import simulate_line, stages_from_process_map, working_seconds
+from core.excel_export import write_sheets
+from core.master_data import load_master_data
+from core.pnp_batch import find_boards, summarize_boards
+from core.edit_journal import journal_for
+from core.profiling import sidebar_panel, stage_timer
+from core.sheet_edits import SheetEdits
+from core.workbook_cache import load_data, original_sheets, read_excel_cached
+from core.xydata_stream import is_csv, placement_totals, write_joined
 
 
 # Set the page layout to wide
@@ -16,6 +23,9 @@ st.set_page_config(layout="wide")
 # Title of the app
 st.title(":bar_chart: Process Mapping & :hourglass: Cycle Time Simulation")
 
+# Stage timings of this rerun; the sidebar waterfall shows the previous reruns
+sidebar_panel(st, "Process Map & Cycle Time Simulation")
+
 # Sidebar configuration
 st.sidebar.header("Category")
 
@@ -35,7 +45,7 @@ if new_analysis:
     # Load data if the file is uploaded
     if uploaded_file_simulation_db:
         # Load the specific sheet from simulation_db.xlsx for 'Process_CT'
-        df = pd.read_excel(uploaded_file_simulation_db, sheet_name='Process_CT')
+        df = load_master_data(uploaded_file_simulation_db, ['Process_CT'])['Process_CT']
 
         # Extract the required values
         shift_hr_day = df.at[0, 'Shift Hr/day']
@@ -64,28 +74,57 @@ if new_analysis:
         with col3:
             overall_labor_efficiency_input = st.text_input('Overall Labor Efficiency', value=overall_labor_efficiency, disabled=True)
 
-        # File uploader for the second Excel file (xydata.xlsx, sheet 'xydata_version')
-        uploaded_file_xydata = st.file_uploader("Upload the xydata.xlsx file", type=["xlsx"])
+        # File uploader for the placement file (xydata.xlsx sheet 'xydata_version', or a CSV placement export)
+        uploaded_file_xydata = st.file_uploader("Upload the xydata.xlsx or placement CSV file", type=["xlsx", "csv"])
 
         # File uploader for the third Excel file (simulation_db.xlsx, sheet 'SMD_Package_Feeder_Master')
         uploaded_file_feeder_master = st.file_uploader("Upload the feeder master Excel file (simulation_db.xlsx)", type=["xlsx"])
 
+        # Batch mode: P&P cycle time of many board revisions against the same feeder master
+        # (same computation as the `python -m core.pnp_batch` command line)
+        if uploaded_file_feeder_master:
+            with st.expander("Batch P&P Cycle Time (multiple boards)"):
+                uploaded_files_boards = st.file_uploader("Upload a zip of xydata files, or several xydata.xlsx / placement CSV files", type=["zip", "xlsx", "csv"], accept_multiple_files=True)
+                if uploaded_files_boards:
+                    batch_key = (uploaded_file_feeder_master.file_id, tuple(board_file.file_id for board_file in uploaded_files_boards))
+                    if st.button("Run Batch") and st.session_state.get('pnp_batch', (None,))[0] != batch_key:
+                        with st.spinner("Joining the boards with the feeder master..."):
+                            with stage_timer("P&P batch"):
+                                batch_boards, batch_errors = summarize_boards(find_boards(uploaded_files_boards), feeder_index_for_file(uploaded_file_feeder_master))
+                        st.session_state.pnp_batch = (batch_key, batch_boards, batch_errors)
+
+                    if st.session_state.get('pnp_batch', (None,))[0] == batch_key:
+                        _, batch_boards, batch_errors = st.session_state.pnp_batch
+                        st.dataframe(batch_boards, use_container_width=True)
+                        if not batch_errors.empty:
+                            st.warning(f"{len(batch_errors)} boards could not be read")
+                            st.dataframe(batch_errors, use_container_width=True)
+
+                        # Boards and errors as one workbook
+                        batch_output = io.BytesIO()
+                        write_sheets({"Boards": batch_boards, "Errors": batch_errors}, batch_output)
+                        st.download_button(
+                            label="Download Batch P&P Cycle Time",
+                            data=batch_output.getvalue(),
+                            file_name="pnp_batch.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
+
         # Load the data if both files are uploaded
         if uploaded_file_xydata and uploaded_file_feeder_master:
-            # Load the specific sheet from xydata.xlsx
-            df2 = pd.read_excel(uploaded_file_xydata, sheet_name='xydata_version')
-            
-            # Load the specific sheet from simulation_db.xlsx for feeder master
-            feeder_master = pd.read_excel(uploaded_file_feeder_master, sheet_name='SMD_Package_Feeder_Master')
-            
-            # Perform VLOOKUP equivalent using merge
-            df3 = df2.merge(feeder_master, left_on="Package", right_on="Package_Master", how="left")
+            # Package index over the feeder master sheet of simulation_db.xlsx
+            # (built once per feeder master file and reused across reruns and boards)
+            feeder_index = feeder_index_for_file(uploaded_file_feeder_master)
+
+            # Read the placements in fixed-size chunks, keeping only running totals
+            # (memoized per file, so reruns do not read the file again)
+            xydata_totals = placement_totals(uploaded_file_xydata, feeder_index)
 
             # Calculate values for the cycle time and other metrics
-            component_count = df2['REFDES'].count()
-            # total_cycle_time_calc = df3['Cycle Time_Master'].sum()
-            bottom_pnp_cycle_time = df3[df3['Topbottom'] == 'NO']['Cycle Time_Master'].sum()
-            top_pnp_cycle_time = df3[df3['Topbottom'] == 'YES']['Cycle Time_Master'].sum()
+            component_count = xydata_totals.component_count
+            # Top ('YES') and bottom ('NO') P&P time, summed over the chunks
+            bottom_pnp_cycle_time = xydata_totals.bottom
+            top_pnp_cycle_time = xydata_totals.top
 
             xyoutput_cl1, xyoutput_cl2, xyoutput_cl3, xyoutput_cl4 = st.columns(4)              
             # Create text input boxes for the calculated values
@@ -103,24 +142,18 @@ if new_analysis:
                 # total_cycle_time_input = st.text_input('Total Cycle Time, sec', value=total_cycle_time)
                 top_pnp_cycle_time_input = st.text_input('Top Pick&Place Cycle Time', value=top_pnp_cycle_time, disabled=True)
 
-        # Create an in-memory Excel file
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine="openpyxl") as writer:
-                # Write original 'xydata_version' sheet
-                df2.to_excel(writer, sheet_name='xydata_version', index=False)
+            with st.expander("Placements per package"):
+                st.dataframe(xydata_totals.package_counts(), use_container_width=True)
 
-                # Create the 'Output' sheet explicitly
-                writer.book.create_sheet(title="Output")
-                output_sheet = writer.sheets["Output"]
-                
-                # Write merged 'Output' sheet
-                output_sheet_name = 'Output'
-                for r_idx, row in enumerate(dataframe_to_rows(df3, index=False, header=True), start=1):
-                    for c_idx, value in enumerate(row, start=1):
-                        writer.sheets[output_sheet_name].cell(row=r_idx, column=c_idx, value=value)
-
-            # Save the in-memory file for download
-            output.seek(0)
+            # Join the placements with the feeder master chunk by chunk into the download:
+            # xlsx input -> original 'xydata_version' sheet + merged 'Output' sheet, CSV input -> merged CSV
+            export_key = (uploaded_file_xydata.file_id, uploaded_file_feeder_master.file_id)
+            if st.session_state.get('xydata_export', (None,))[0] != export_key:
+                output = io.BytesIO()
+                with stage_timer("xydata export"):
+                    write_joined(uploaded_file_xydata, feeder_index, output)
+                st.session_state.xydata_export = (export_key, output.getvalue())
+            output = st.session_state.xydata_export[1]
 
             # Generate the new filename based on the uploaded file name
             original_filename = uploaded_file_xydata.name
@@ -132,9 +165,12 @@ if new_analysis:
                 label="Download Updated xydata File",
                 data=output,
                 file_name=edited_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                mime="text/csv" if is_csv(uploaded_file_xydata) else "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
-            st.success("Data has been successfully saved to the 'Output' sheet in the updated xydata file.")
+            if is_csv(uploaded_file_xydata):
+                st.success("The placements merged with the feeder master are ready in the updated CSV file.")
+            else:
+                st.success("Data has been successfully saved to the 'Output' sheet in the updated xydata file.")
 
             # Create an empty DataFrame with the defined columns
             initial_df = pd.DataFrame(columns=['Side', 'Stage', 'Batch Set up Time', 'Process Cycle Time'])
@@ -248,6 +284,82 @@ if new_analysis:
             with totalbst_cl2:
                 total_batch_setup_time_display = st.text_input('Total Batch Set up Time', value=total_batch_setup_time, disabled=True)
 
+            # Discrete-event simulation of the mapped stages over one year of the shift calendar
+            with st.expander("Line Simulation (discrete-event, one year of shifts)"):
+                sim_cl1, sim_cl2, sim_cl3, sim_cl4 = st.columns(4)
+                with sim_cl1:
+                    sim_annual_demand = st.number_input('Annual Demand (0 = run flat out)', min_value=0, value=0, step=1000)
+                    sim_batch_size = st.number_input('Batch Size (units per set up)', min_value=1, value=100, step=10)
+                with sim_cl2:
+                    sim_cycle_time_cv = st.number_input('Cycle Time Variation (CV %)', min_value=0.0, max_value=200.0, value=10.0, step=5.0)
+                    sim_buffer_size = st.number_input('Buffer Between Stages (units)', min_value=1, value=5, step=1)
+                with sim_cl3:
+                    sim_mtbf_hours = st.number_input('MTBF, busy hours (0 = no breakdowns)', min_value=0.0, value=8.0, step=1.0)
+                    sim_mttr_minutes = st.number_input('MTTR, minutes', min_value=0.0, value=30.0, step=5.0)
+                with sim_cl4:
+                    sim_seed = st.number_input('Random Seed', min_value=0, value=42, step=1)
+
+                if st.button('Run Line Simulation'):
+                    sim_names, sim_cycle_times, sim_setup_times = stages_from_process_map(edited_data)
+                    if not sim_names:
+                        st.warning("Add stages with a Process Cycle Time to the process map first")
+                    else:
+                        sim_horizon = working_seconds(shift_hr_day, days_week, weeks_year)
+                        sim_takt = sim_horizon / sim_annual_demand if sim_annual_demand else None
+                        with st.spinner("Simulating one year of production..."):
+                            sim_result = simulate_line(
+                                sim_names, sim_cycle_times, sim_setup_times, sim_horizon,
+                                batch_size=sim_batch_size, cycle_time_cv=sim_cycle_time_cv / 100, buffer_size=sim_buffer_size,
+                                mtbf=sim_mtbf_hours * 3600 if sim_mtbf_hours else None, mttr=sim_mttr_minutes * 60,
+                                takt=sim_takt, seed=int(sim_seed)
+                            )
+
+                        kpi_cl1, kpi_cl2, kpi_cl3, kpi_cl4 = st.columns(4)
+                        kpi_cl1.metric('Units / Year', f"{sim_result['units']:,}")
+                        kpi_cl2.metric('Throughput (UPH)', f"{sim_result['throughput_per_hour']:.1f}")
+                        kpi_cl3.metric('Average WIP', f"{sim_result['avg_wip']:.1f}", help=f"Max WIP {sim_result['max_wip']}, lead time {sim_result['lead_time'] / 60:.1f} min")
+                        kpi_cl4.metric('Bottleneck Utilization', f"{sim_result['bottleneck_utilization']:.1f}%", help=sim_result['bottleneck'])
+
+                        if sim_takt is not None:
+                            if sim_result['actual_cycle_time'] > sim_takt * 1.001:
+                                st.error(f"Line cannot meet takt: {sim_result['actual_cycle_time']:.1f} s/unit vs takt {sim_takt:.1f} s. Bottleneck: {sim_result['bottleneck']}")
+                            else:
+                                st.success(f"Line meets takt {sim_takt:.1f} s/unit. Bottleneck: {sim_result['bottleneck']} at {sim_result['bottleneck_utilization']:.1f}% utilization")
+                        else:
+                            st.info(f"Flat-out capacity: {sim_result['actual_cycle_time']:.1f} s/unit. Bottleneck: {sim_result['bottleneck']}")
+
+                        st.dataframe(sim_result['stages'], use_container_width=True)
+
+            # Line balancing: group the mapped stages into the fewest stations that meet takt
+            # (an optional 'Predecessors' column lists the stages each row depends on)
+            with st.expander("Line Balancing (stations to meet takt)"):
+                bal_cl1, bal_cl2 = st.columns(2)
+                with bal_cl1:
+                    bal_annual_demand = st.number_input('Annual Demand for Takt', min_value=0, value=0, step=1000)
+                with bal_cl2:
+                    bal_exact = st.checkbox('Search for fewer stations (branch and bound)', value=True)
+
+                if bal_annual_demand:
+                    bal_takt = working_seconds(shift_hr_day, days_week, weeks_year) / bal_annual_demand
+                    try:
+                        bal_names, bal_task_times, bal_predecessors = tasks_from_process_map(edited_data)
+                        bal_result = balance_line(bal_names, bal_task_times, bal_takt, bal_predecessors, branch_and_bound=bal_exact)
+                    except ValueError as e:
+                        st.error(f"Line cannot be balanced at takt {bal_takt:.1f} s: {e}")
+                    else:
+                        bal_kpi1, bal_kpi2, bal_kpi3, bal_kpi4 = st.columns(4)
+                        bal_kpi1.metric('Takt Time, sec', f"{bal_takt:.1f}")
+                        bal_kpi2.metric('Stations', bal_result['stations'], help=f"Lower bound {bal_result['lower_bound']}")
+                        bal_kpi3.metric('Line Efficiency', f"{bal_result['efficiency']:.1f}%")
+                        bal_kpi4.metric('Smoothness Index', f"{bal_result['smoothness_index']:.1f}")
+                        if bal_result['proven_minimal']:
+                            st.success(f"{bal_result['stations']} stations is the minimum for this takt ({bal_result['method']}).")
+                        else:
+                            st.info(f"{bal_result['stations']} stations ({bal_result['method']}); the minimum may be as low as {bal_result['lower_bound']}.")
+                        st.dataframe(bal_result['station_loads'], use_container_width=True)
+                else:
+                    st.caption("Enter the annual demand to derive takt and balance the line.")
+
             # Provide inputs for file name, sheet name, and path
             st.markdown("### Save Data to Excel")
 
@@ -351,20 +463,16 @@ if existing_analysis:
         uploaded_file = st.file_uploader("Choose an Excel/CSV/XLSM file", type=["xlsx", "csv", "xlsm"])
 
         if uploaded_file:
-            # Load data from the uploaded file
-            @st.cache_data
-            def load_data(file):
-                if file.name.endswith('.csv'):
-                    df = pd.read_csv(file)
-                else:
-                    df = pd.read_excel(file, sheet_name=None)
-                return df
-
+            # Load data from the uploaded file (parsed sheets are cached on disk by file hash)
             data = load_data(uploaded_file)
 
-            # Initialize session state to store edited data for each sheet
+            # Initialize session state to store edited data for each sheet, as patches on the cached original
             if 'edited_sheets' not in st.session_state:
-                st.session_state.edited_sheets = {}
+                st.session_state.edited_sheets = SheetEdits()
+            if isinstance(data, dict):
+                st.session_state.edited_sheets.track(original_sheets(uploaded_file))
+            for dropped_sheet in st.session_state.edited_sheets.pop_dropped():
+                st.warning(f"Edits to '{dropped_sheet}' were discarded to stay within the session memory limit")
 
             # Assuming 'data' is a dictionary of DataFrames loaded from an Excel file
             if isinstance(data, dict):
@@ -377,6 +485,11 @@ if existing_analysis:
                     selected_data = data[sheet_name]
                     st.session_state.df = pd.DataFrame(selected_data)  # Load original data from file
                 
+            # Edit history of the selected sheet for undo/redo, on the shared cached original
+            # (counted against the session memory limit; selecting another sheet starts a new history)
+            journal = journal_for(st.session_state.edited_sheets, uploaded_file.file_id, sheet_name, st.session_state.df)
+            st.session_state.df = journal.frame()
+
             # Extract the required values
             shift_hr_day = st.session_state.df.at[0, 'Shift Hr/day']
             days_week = st.session_state.df.at[0, 'Days/Week']
@@ -415,9 +528,11 @@ if existing_analysis:
                 bottom_pnp_cycle_time_input = st.text_input('Bottom P&P Cycle Time', bottom_pnp_cycle_time, disabled=True)
                 top_pnp_cycle_time_input = st.text_input('Top P&P Cycle Time', value=top_pnp_cycle_time, disabled=True)
             
-            # Display data in a table
+            # Display data in a table; the key changes whenever the journal rebuilds the table
             st.subheader("Data Table")
-            edited_data = st.data_editor(st.session_state.df)
+            editor_key = f"data_editor_{sheet_name}_{journal.version}"
+            edited_data = st.data_editor(st.session_state.df, key=editor_key)
+            journal.record_editor(st.session_state.get(editor_key))
 
             # Ensure the 'Process Cycle Time' & 'Batch Set up Time' column is numeric
             edited_data['Process Cycle Time'] = pd.to_numeric(edited_data['Process Cycle Time'], errors='coerce')
@@ -435,6 +550,18 @@ if existing_analysis:
             # Save the updated DataFrame back to the session state
             st.session_state.edited_data = edited_data
 
+            # Undo / redo the last table edit (cell edits, added and removed rows)
+            undo_col, redo_col = st.columns([1, 1])
+            with undo_col:
+                if st.button("Undo", disabled=not journal.can_undo):
+                    journal.undo()
+                    st.session_state.edited_sheets[sheet_name] = journal.frame()
+                    st.rerun()
+            with redo_col:
+                if st.button("Redo", disabled=not journal.can_redo):
+                    journal.redo()
+                    st.session_state.edited_sheets[sheet_name] = journal.frame()
+                    st.rerun()
             
             # Create buttons side by side for adding new rows and saving the table
             col1, col2 = st.columns([1, 1])
@@ -473,11 +600,9 @@ if existing_analysis:
 
             with col2:
                 if st.button("Add New Row"):
-                    # Create a new row with NaN values
-                    new_row = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                    # Append the new row to the DataFrame
-                    st.session_state.df = pd.concat([st.session_state.df, new_row], ignore_index=True)
-                    st.session_state.edited_sheets[sheet_name] = st.session_state.df  # Update session state with new row
+                    # Append a new row with NaN values
+                    journal.insert_row(len(st.session_state.df))
+                    st.session_state.edited_sheets[sheet_name] = journal.frame()  # Update session state with new row
                     st.rerun()  # Rerun the app to update the data editor with the new row
 
             # Create buttons side by side for removing rows and saving removed rows
@@ -486,15 +611,9 @@ if existing_analysis:
             with col3:
                 row_to_delete = st.selectbox("Select row to delete", st.session_state.df.index)
                 if st.button("Remove Row"):
-                    if 'removed_rows' not in st.session_state:
-                        st.session_state.removed_rows = pd.DataFrame()
-
-                    # Add the removed row to 'removed_rows' session state
-                    st.session_state.removed_rows = pd.concat([st.session_state.removed_rows, st.session_state.df.loc[[row_to_delete]]])
-
-                    # Drop the selected row and reset the index
-                    st.session_state.df = st.session_state.df.drop(row_to_delete).reset_index(drop=True)
-                    edited_data = st.session_state.df  # Ensure the edited data is synchronized
+                    # Drop the selected row; the journal keeps it, so the removal can be undone
+                    journal.delete_row(st.session_state.df.index.get_loc(row_to_delete))
+                    edited_data = journal.frame()  # Ensure the edited data is synchronized
                     
                     # Recalculate values after the row is removed
                     total_cycle_time_recalc = edited_data['Process Cycle Time'].sum()
@@ -513,13 +632,13 @@ if existing_analysis:
             
             with col4:
                 if st.button("Save Removed Rows"):
-                    if 'removed_rows' in st.session_state and not st.session_state.removed_rows.empty:
+                    if not journal.removed_rows().empty:
                         # Use BytesIO to create an in-memory buffer
                         output = io.BytesIO()
 
-                        # Create a dictionary of the Excel file with updated data in `st.session_state.df`
-                        excel_file = pd.read_excel(uploaded_file, sheet_name=None)
-                        excel_file[sheet_name] = st.session_state.df
+                        # Create a dictionary of the Excel file with the current table of the edit journal
+                        excel_file = read_excel_cached(uploaded_file)
+                        excel_file[sheet_name] = journal.frame()
 
                         # Write all sheets to this in-memory buffer
                         with pd.ExcelWriter(output, engine="openpyxl") as writer:
@@ -1,35 +1,38 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.impute import SimpleImputer
 import numpy as np
 import os
 import io
+from core.edit_journal import journal_for
+from core.lazy_import import lazy_module
+from core.profiling import sidebar_panel
+from core.sheet_edits import SheetEdits
+from core.workbook_cache import load_data, original_sheets, read_excel_cached
+
+# Plotting libraries are imported when the first chart is drawn
+px = lazy_module("plotly.express")
 
 # App Title
 st.set_page_config(page_title="Process Yield Analysis!!!", page_icon=":bar_chart:", layout="wide")
 st.title("Process Yield Analysis")
 
+# Stage timings of this rerun; the sidebar waterfall shows the previous reruns
+sidebar_panel(st, "Process Yield Analysis")
+
 # File uploader for Excel/CSV/XLSM files
 uploaded_file = st.file_uploader("Choose an Excel/CSV/XLSM file", type=["xlsx", "csv", "xlsm"])
 
 if uploaded_file:
-    # Load data from the uploaded file
-    @st.cache_data
-    def load_data(file):
-        if file.name.endswith('.csv'):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file, sheet_name=None)
-        return df
-
+    # Load data from the uploaded file (parsed sheets are cached on disk by file hash)
     data = load_data(uploaded_file)
 
-    # Initialize session state to store edited data for each sheet
+    # Initialize session state to store edited data for each sheet, as patches on the cached original
     if 'edited_sheets' not in st.session_state:
-        st.session_state.edited_sheets = {}
+        st.session_state.edited_sheets = SheetEdits()
+    if isinstance(data, dict):
+        st.session_state.edited_sheets.track(original_sheets(uploaded_file))
+    for dropped_sheet in st.session_state.edited_sheets.pop_dropped():
+        st.warning(f"Edits to '{dropped_sheet}' were discarded to stay within the session memory limit")
 
     # Assuming 'data' is a dictionary of DataFrames loaded from an Excel file
     if isinstance(data, dict):
@@ -42,9 +45,29 @@ if uploaded_file:
             selected_data = data[sheet_name]
             st.session_state.df = pd.DataFrame(selected_data)  # Load original data from file
 
-    # Display data in a table
+    # Edit history of the selected sheet for undo/redo, on the shared cached original
+    # (counted against the session memory limit; selecting another sheet starts a new history)
+    journal = journal_for(st.session_state.edited_sheets, uploaded_file.file_id, sheet_name, st.session_state.df)
+    st.session_state.df = journal.frame()
+
+    # Display data in a table; the key changes whenever the journal rebuilds the table
     st.subheader("Data Table")
-    edited_data = st.data_editor(st.session_state.df)
+    editor_key = f"data_editor_{sheet_name}_{journal.version}"
+    edited_data = st.data_editor(st.session_state.df, key=editor_key)
+    journal.record_editor(st.session_state.get(editor_key))
+
+    # Undo / redo the last table edit (cell edits, added and removed rows)
+    undo_col, redo_col = st.columns([1, 1])
+    with undo_col:
+        if st.button("Undo", disabled=not journal.can_undo):
+            journal.undo()
+            st.session_state.edited_sheets[sheet_name] = journal.frame()
+            st.rerun()
+    with redo_col:
+        if st.button("Redo", disabled=not journal.can_redo):
+            journal.redo()
+            st.session_state.edited_sheets[sheet_name] = journal.frame()
+            st.rerun()
 
     # Create buttons side by side for adding new rows and saving the table
     col1, col2 = st.columns([1, 1])
@@ -91,11 +114,9 @@ if uploaded_file:
     
     with col2:
         if st.button("Add New Row"):
-            # Create a new row with NaN values
-            new_row = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-            # Append the new row to the DataFrame
-            st.session_state.df = pd.concat([st.session_state.df, new_row], ignore_index=True)
-            st.session_state.edited_sheets[sheet_name] = st.session_state.df  # Update session state with new row
+            # Append a new row with NaN values
+            journal.insert_row(len(st.session_state.df))
+            st.session_state.edited_sheets[sheet_name] = journal.frame()  # Update session state with new row
             st.rerun()  # Rerun the app to update the data editor with the new row
 
     # Create buttons side by side for removing rows and saving removed rows
@@ -104,22 +125,20 @@ if uploaded_file:
     with col3:
         row_to_delete = st.selectbox("Select row to delete", st.session_state.df.index)
         if st.button("Remove Row"):
-            if 'removed_rows' not in st.session_state:
-                st.session_state.removed_rows = pd.DataFrame()
-            st.session_state.removed_rows = pd.concat([st.session_state.removed_rows, st.session_state.df.loc[[row_to_delete]]])
-            st.session_state.df = st.session_state.df.drop(row_to_delete).reset_index(drop=True)
-            st.session_state.edited_sheets[sheet_name] = st.session_state.df  # Update session state with removed row
+            # The journal keeps the removed row, so the removal can be undone
+            journal.delete_row(st.session_state.df.index.get_loc(row_to_delete))
+            st.session_state.edited_sheets[sheet_name] = journal.frame()  # Update session state with removed row
             st.rerun()
 
     with col4:
         if st.button("Save Removed Rows"):
-            if 'removed_rows' in st.session_state and not st.session_state.removed_rows.empty:
+            if not journal.removed_rows().empty:
                 # Use BytesIO to create an in-memory buffer
                 output = io.BytesIO()
 
-                # Create a dictionary of the Excel file with updated data in `st.session_state.df`
-                excel_file = pd.read_excel(uploaded_file, sheet_name=None)
-                excel_file[sheet_name] = st.session_state.df
+                # Create a dictionary of the Excel file with the current table of the edit journal
+                excel_file = read_excel_cached(uploaded_file)
+                excel_file[sheet_name] = journal.frame()
 
                 # Write all sheets to this in-memory buffer
                 with pd.ExcelWriter(output, engine="openpyxl") as writer:
@@ -163,6 +182,11 @@ if uploaded_file:
     # Subheading for Prediction Model
     st.subheader("Prediction Model")
 
+    # scikit-learn is only imported once a sheet reaches the prediction model
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LinearRegression
+    from sklearn.model_selection import train_test_split
+
     # Input fields for OCC and Value Lookup
     st.subheader("Input Data for Prediction")
     occ_input = st.number_input("Enter OCC value")
@@ -3,13 +3,27 @@ import pandas as pd
 import numpy as np
 import io
 import os
-import plotly.express as px
+from core.alpha_fit import CHI2_1DF, fit_alpha, fitted_frame, histogram_from_frame
+from core.ieee_yield import CATEGORIES, CHAIN_POINTS, DATA_POINTS_COLUMN, result_row_label, score_boards, set_data_point, yield_chain
+from core.lazy_import import lazy_module
+from core.plot_data import cost_curves, line_chart
+from core.profiling import sidebar_panel, stage_timer
+from core.sheet_edits import SheetEdits
+from core.workbook_cache import load_data, original_sheets
+from core.yield_curves import alpha_curves, board_curves
+from core.yield_monte_carlo import DISTRIBUTION_PARAMS, DISTRIBUTIONS, SIMULATED_POINTS, histogram_frame, percentile_table, simulate_yield
+
+# Plotting libraries are imported when the first chart is drawn
+px = lazy_module("plotly.express")
 
 
 # App Title
 st.set_page_config(page_title="IEEE Yield Analysis!!!", page_icon=":bar_chart:", layout="wide")
 st.title("IEEE Yield Analysis")
 
+# Stage timings of this rerun; the sidebar waterfall shows the previous reruns
+sidebar_panel(st, "IEEE Yield Models")
+
 
 # Defect distribution Table
 st.subheader("Defect distribution per board")
@@ -19,6 +33,20 @@ no_of_boards = [
     9.8304, 7.86432, 6.291456, 5.0331648, 4.02653184, 2
 ]
 
+# Real defect data replaces the sample histogram above
+defects_file = st.file_uploader(
+    "Upload defects per board: a histogram ('No. of Defects', 'No. Of Boards') or one column of per-board defect counts",
+    type=["xlsx", "csv", "xlsm"], key="defects_file",
+)
+if defects_file:
+    try:
+        defects_data = load_data(defects_file)
+        if isinstance(defects_data, dict):
+            defects_data = defects_data[st.selectbox("Select the defects sheet", defects_data.keys())]
+        defects, no_of_boards = histogram_from_frame(defects_data)
+    except ValueError as e:
+        st.error(f"Error while reading the defect data: {e}")
+
 
 # Creating the DataFrame
 defects_df = pd.DataFrame({
@@ -33,32 +61,64 @@ st.dataframe(defects_tr_df)  # Display the transposed defects table
 
 st.subheader("Alpha Estimation")
 
+# Negative binomial maximum likelihood fit of alpha (memoized by histogram digest)
+alpha_fit = None
+try:
+    alpha_confidence = st.select_slider("Confidence level", options=list(CHI2_1DF), value=0.95)
+    alpha_fit = fit_alpha(defects, no_of_boards, alpha_confidence)
+except ValueError as e:
+    st.error(f"Alpha could not be fitted: {e}")
+
 
 # First row: col1 to col4 under defects_tr_df
 col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
 
 
 with col1:
-    # Calculating the average defects per board
-    mean_μ = sum(no_of_boards) / len(no_of_boards)
-    st.text_input("Average Number of Boards", mean_μ)
+    # Average defects per board
+    mean_μ = alpha_fit["mean"] if alpha_fit else float("nan")
+    st.text_input("Average Defects per Board", mean_μ)
 
 
 with col2:
-    # Calculating the std deviation defects per board
-    std_deviation_σ = pd.Series(no_of_boards).std()
+    # Std deviation of defects per board
+    std_deviation_σ = alpha_fit["variance"] ** 0.5 if alpha_fit else float("nan")
     st.text_input("Standard Deviation", std_deviation_σ)
 
 
-with col3:
-    # Input for Alpha (α) Assumed
-    alpha_α_assumed = st.text_input("Alpha (α) Assumed", value="0.4")
+with col4:
+    # Fitted Alpha (α) and its profile-likelihood interval
+    alpha_α = alpha_fit["alpha"] if alpha_fit else float("nan")
+    st.text_input("Alpha (α) MLE", alpha_α)
+    # A finite fit feeds Ycl by default; 0.4 is only the fallback without a fit or for Poisson data
+    alpha_is_fitted = bool(alpha_fit) and np.isfinite(alpha_α)
+    use_fitted_alpha = st.checkbox("Use fitted α for Ycl", value=alpha_is_fitted, disabled=not alpha_is_fitted)
 
 
-with col4:
-    # Calculating Alpha (α)
-    alpha_α = (mean_μ ** 2) / ((std_deviation_σ ** 2) - mean_μ)
-    st.text_input("Alpha (α)", alpha_α)
+with col3:
+    # Input for Alpha (α) Assumed; the fitted value feeds Ycl when selected
+    if use_fitted_alpha:
+        alpha_α_assumed = st.text_input("Alpha (α) Assumed", value=str(alpha_α), disabled=True)
+    else:
+        alpha_α_assumed = st.text_input("Alpha (α) Assumed", value="0.4")
+
+
+if alpha_fit:
+    with st.expander("Alpha fit details"):
+        fit_col1, fit_col2 = st.columns(2)
+        with fit_col1:
+            st.dataframe(pd.DataFrame({
+                "Value": [alpha_fit["alpha"], alpha_fit["alpha_low"], alpha_fit["alpha_high"], alpha_fit["alpha_moments"],
+                          alpha_fit["boards"], alpha_fit["defects"], alpha_fit["log_likelihood"], alpha_fit["poisson_log_likelihood"]],
+            }, index=["Alpha (α) MLE", f"Lower {alpha_confidence:.0%} bound", f"Upper {alpha_confidence:.0%} bound", "Alpha (α) method of moments",
+                      "Boards", "Defects", "Log-likelihood", "Log-likelihood (Poisson)"]))
+            if not np.isfinite(alpha_fit["alpha"]):
+                st.info("The defects are not over-dispersed (variance <= mean): the data fit Poisson, with no clustering")
+        with fit_col2:
+            fit_df = fitted_frame(defects, no_of_boards, alpha_fit["alpha"])
+            fig_fit = px.bar(fit_df, x="No. of Defects", y="Observed Boards", title="Observed vs. Fitted Defects per Board")
+            fig_fit.add_scatter(x=fit_df["No. of Defects"], y=fit_df["Fitted Boards"], mode="lines+markers", name="Fitted")
+            st.plotly_chart(fig_fit, use_container_width=True)
 
 
 # File uploader for Excel/CSV/XLSM files
@@ -66,22 +126,17 @@ uploaded_file = st.file_uploader("Choose an Excel/CSV/XLSM file", type=["xlsx",
 
 
 if uploaded_file:
-    # Load data from the uploaded file
-    @st.cache_data
-    def load_data(file):
-        if file.name.endswith('.csv'):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file, sheet_name=None)
-        return df
-
-
+    # Load data from the uploaded file (parsed sheets are cached on disk by file hash)
     data = load_data(uploaded_file)
 
 
-    # Initialize session state to store edited data for each sheet
+    # Initialize session state to store edited data for each sheet, as patches on the cached original
     if 'edited_sheets' not in st.session_state:
-        st.session_state.edited_sheets = {}
+        st.session_state.edited_sheets = SheetEdits()
+    if isinstance(data, dict):
+        st.session_state.edited_sheets.track(original_sheets(uploaded_file))
+    for dropped_sheet in st.session_state.edited_sheets.pop_dropped():
+        st.warning(f"Edits to '{dropped_sheet}' were discarded to stay within the session memory limit")
 
 
     # Second row: col5 to col10 under data = load_data(uploaded_file)
@@ -266,578 +321,42 @@ if uploaded_file:
                 st.error("Please enter a valid number for Defect Rate per Solder Joint (DR)")
 
         with col14:
-        # Overall yield_Soldering Calculations
+        # Overall yield Calculations for Soldering, Placement & Component
         # Button to trigger calculation of Pfi, Pfo, D, Ync, Ycl and Overall yield
             if st.button("Analyse Pfi, Pfo, D, Ync, Ycl and Overall yield"):
-                # Ensure both defect_rate_value and solder_joint_value are valid numbers
-                try:
-                    defect_rate_value = float(defect_rate) / 1000000  # Convert to defect rate per million
-                    solder_joint_value = float(solder_joint_value)    # Convert solder_joint_value to float
-
-                    # Calculate pfi_value using the given formula
-                    pfi_value = 1 - (1 - defect_rate_value) ** solder_joint_value   # Formula: 1-(1-(500/1000000))^F7
-
-                    # Update or insert "Pfi" value in the DataFrame for the selected stage
-                    pfi_value_row_idx = edited_data[edited_data['Data Points'] == "Pfi"].index
-
-                    if not pfi_value_row_idx.empty:
-                        # If "Pfi" already exists, update its value
-                        edited_data.at[pfi_value_row_idx[0], selected_stage] = pfi_value
-                    else:
-                        # If "Pfi" doesn't exist, create a new row for it
-                        new_row_pfi = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_pfi.at[0, 'Data Points'] = "Pfi"
-                        new_row_pfi.at[0, selected_stage] = pfi_value
-                        edited_data = pd.concat([edited_data, new_row_pfi], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Pfi value calculated and updated: {pfi_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Defect Rate and Solder Joints")
-
-                #"Pfo" calculation
-                try:
-                    test_efficiency_value = float(test_efficiency) / 100  # Convert percentage to decimal
-                    pfi_value = float(pfi_value)    # Convert pfi_value to float
-
-                    # Calculate Pfo using the given formula
-                    pfo_value = 1 - (1 - pfi_value) ** (1 - test_efficiency_value)   # Formula: =1-((1-K7)^(1-$F$3))
-
-                    # Update or insert "Pfo" value in the DataFrame for the selected stage
-                    pfo_value_row_idx = edited_data[edited_data['Data Points'] == "Pfo"].index
-
-                    if not pfo_value_row_idx.empty:
-                        # If "Pfo" already exists, update its value
-                        edited_data.at[pfo_value_row_idx[0], selected_stage] = pfo_value
-                    else:
-                        # If "Pfo" doesn't exist, create a new row for it
-                        new_row_pfo = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_pfo.at[0, 'Data Points'] = "Pfo"
-                        new_row_pfo.at[0, selected_stage] = pfo_value
-                        edited_data = pd.concat([edited_data, new_row_pfo], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Pfo value calculated and updated: {pfo_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Pfi and Test Efficiency")
-
-                #"D" calculation
-                try:
-                    pfi_value = float(pfi_value)    # Convert pfi_value to float
-                    pfo_value = float(pfo_value)    # Convert pfo_value to float
-                    test_efficiency_value = float(test_efficiency) / 100  # Convert percentage to decimal
-
-                    # Calculate D using the given formula
-                    avg_defects_per_brd_value = (pfi_value + pfo_value) * test_efficiency_value   # Formula: =SUM(K7:L7)*$F$3
-
-                    # Update or insert "D" value in the DataFrame for the selected stage
-                    avg_defects_per_brd_value_row_idx = edited_data[edited_data['Data Points'] == "D"].index
-
-                    if not avg_defects_per_brd_value_row_idx.empty:
-                        # If "Pfo" already exists, update its value
-                        edited_data.at[avg_defects_per_brd_value_row_idx[0], selected_stage] = avg_defects_per_brd_value
-                    else:
-                        # If "D" doesn't exist, create a new row for it
-                        new_row_avg_d = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_avg_d.at[0, 'Data Points'] = "D"
-                        new_row_avg_d.at[0, selected_stage] = avg_defects_per_brd_value
-                        edited_data = pd.concat([edited_data, new_row_avg_d], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Avg D value calculated and updated: {avg_defects_per_brd_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Pfi, Pfo and Test Efficiency")
-
-                #"Poisson Yield (Ync)" calculation
-                try:
-                    avg_defects_per_brd_value = float(avg_defects_per_brd_value)    # Convert avg_defects_per_brd_value to float
-                    # Calculate Poisson Yield (Ync) using the given formula
-                    non_clustered_yield_value = np.exp(-avg_defects_per_brd_value)   # Formula: =EXP(-M7)
-
-                    # Update or insert "Poisson Yield (Ync)" value in the DataFrame for the selected stage
-                    non_clustered_yield_value_row_idx = edited_data[edited_data['Data Points'] == "Poisson Yield (Ync)"].index
-
-                    if not non_clustered_yield_value_row_idx.empty:
-                        # If "Poisson Yield (Ync)" already exists, update its value
-                        edited_data.at[non_clustered_yield_value_row_idx[0], selected_stage] = non_clustered_yield_value
-                    else:
-                        # If "Poisson Yield (Ync)" doesn't exist, create a new row for it
-                        new_row_ync = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_ync.at[0, 'Data Points'] = "Poisson Yield (Ync)"
-                        new_row_ync.at[0, selected_stage] = non_clustered_yield_value
-                        edited_data = pd.concat([edited_data, new_row_ync], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Ync value calculated and updated: {non_clustered_yield_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Avg D")
-
-                #"Poisson Yield (Ycl)" calculation
-                try:
-                    avg_defects_per_brd_value = float(avg_defects_per_brd_value)    # Convert avg_defects_per_brd_value to float
-                    alpha_α_assumed = float(alpha_α_assumed)  # Convert alpha_α_assumed to float
-
-                    # Calculate Poisson Yield (Ycl) using the given formula
-                    clustered_yield_value = (1 + (avg_defects_per_brd_value / alpha_α_assumed)) ** (-alpha_α_assumed)   # Formula: =(1+(M7/$C$27))^-$C$27
-                    # clustered_yield_value = (1 + (avg_defects_per_brd_value / 0.4)) ** (-0.4)   # Formula: =(1+(M7/$C$27))^-$C$27
-                    # Update or insert "Poisson Yield (Ycl)" value in the DataFrame for the selected stage
-                    clustered_yield_value_row_idx = edited_data[edited_data['Data Points'] == "Clustered Yield (Ycl)"].index
-
-                    if not clustered_yield_value_row_idx.empty:
-                        # If "Clustered Yield (Ycl)" already exists, update its value
-                        edited_data.at[clustered_yield_value_row_idx[0], selected_stage] = clustered_yield_value
-                    else:
-                        # If "Clustered Yield (Ycl)" doesn't exist, create a new row for it
-                        new_row_ycl = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_ycl.at[0, 'Data Points'] = "Clustered Yield (Ycl)"
-                        new_row_ycl.at[0, selected_stage] = clustered_yield_value
-                        edited_data = pd.concat([edited_data, new_row_ycl], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Ycl value calculated and updated: {clustered_yield_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Avg D & mean_μ")
-
-                #"Overall yield_Soldering" calculation
-                try:
-                    non_clustered_yield_value = float(non_clustered_yield_value)   # Convert non_clustered_yield_value to float
-                    clustered_yield_value = float(clustered_yield_value)   # Convert clustered_yield_value to float
-
-                    # Calculate Overall yield_Soldering using the given formula
-                    overall_yield_s_value = non_clustered_yield_value * clustered_yield_value  # Formula: =H7*I7
-
-                    # Update or insert "Overall yield_Soldering" value in the DataFrame for the selected stage
-                    overall_yield_s_value_row_idx = edited_data[edited_data['Data Points'] == "Overall yield_Soldering"].index
-
-                    if not overall_yield_s_value_row_idx.empty:
-                        # If "Overall yield_Soldering" already exists, update its value
-                        edited_data.at[overall_yield_s_value_row_idx[0], selected_stage] = overall_yield_s_value
-                    else:
-                        # If "Overall yield_Soldering" doesn't exist, create a new row for it
-                        new_row_oy = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_oy.at[0, 'Data Points'] = "Overall yield_Soldering"
-                        new_row_oy.at[0, selected_stage] = overall_yield_s_value
-                        edited_data = pd.concat([edited_data, new_row_oy], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Overall yield_Soldering value calculated and updated: {overall_yield_s_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Ync & Ycl")
-# *****************************************************************************************************************
-# *****************************************************************************************************************
-# *****************************************************************************************************************
-# *****************************************************************************************************************
-# *****************************************************************************************************************
-# *****************************************************************************************************************
-
-        # Overall yield_Component Calculations
-        # Button to trigger calculation of Pfi, Pfo, D, Ync, Ycl and Overall yield            
-                try:
-                    defect_rate_value = float(defect_rate) / 1000000  # Convert to defect rate per million
-                    no_placement_value = float(no_placement_value)    # Convert solder_joint_value to float
-
-                    # Calculate pfi_value using the given formula
-                    pfi_value = 1 - (1 - defect_rate_value) ** no_placement_value   # Formula: =1-(1-(500/1000000))^F25
-
-                    # Update or insert "Pfi" value in the DataFrame for the selected stage
-                    pfi_value_row_idx = edited_data[edited_data['Data Points'] == "Pfi"].index
-
-                    if not pfi_value_row_idx.empty:
-                        # If "Pfi" already exists, update its value
-                        edited_data.at[pfi_value_row_idx[0], selected_stage] = pfi_value
-                    else:
-                        # If "Pfi" doesn't exist, create a new row for it
-                        new_row_pfi = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_pfi.at[0, 'Data Points'] = "Pfi"
-                        new_row_pfi.at[0, selected_stage] = pfi_value
-                        edited_data = pd.concat([edited_data, new_row_pfi], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Pfi value calculated and updated: {pfi_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Defect Rate and Solder Joints")
-
-                #"Pfo" calculation
-                try:
-                    test_efficiency_value = float(test_efficiency) / 100  # Convert percentage to decimal
-                    pfi_value = float(pfi_value)    # Convert pfi_value to float
-
-                    # Calculate Pfo using the given formula
-                    pfo_value = 1 - (1 - pfi_value) ** (1 - test_efficiency_value)   # Formula: =1-((1-K25)^(1-$F$3))
-
-                    # Update or insert "Pfo" value in the DataFrame for the selected stage
-                    pfo_value_row_idx = edited_data[edited_data['Data Points'] == "Pfo"].index
-
-                    if not pfo_value_row_idx.empty:
-                        # If "Pfo" already exists, update its value
-                        edited_data.at[pfo_value_row_idx[0], selected_stage] = pfo_value
-                    else:
-                        # If "Pfo" doesn't exist, create a new row for it
-                        new_row_pfo = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_pfo.at[0, 'Data Points'] = "Pfo"
-                        new_row_pfo.at[0, selected_stage] = pfo_value
-                        edited_data = pd.concat([edited_data, new_row_pfo], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Pfo value calculated and updated: {pfo_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Pfi and Test Efficiency")
-
-                #"D" calculation
-                try:
-                    pfi_value = float(pfi_value)    # Convert pfi_value to float
-                    pfo_value = float(pfo_value)    # Convert pfo_value to float
-                    test_efficiency_value = float(test_efficiency) / 100  # Convert percentage to decimal
-
-                    # Calculate D using the given formula
-                    avg_defects_per_brd_value = (pfi_value + pfo_value) * test_efficiency_value   # Formula: =SUM(K25:L25)*$F$3
-
-                    # Update or insert "D" value in the DataFrame for the selected stage
-                    avg_defects_per_brd_value_row_idx = edited_data[edited_data['Data Points'] == "D"].index
-
-                    if not avg_defects_per_brd_value_row_idx.empty:
-                        # If "Pfo" already exists, update its value
-                        edited_data.at[avg_defects_per_brd_value_row_idx[0], selected_stage] = avg_defects_per_brd_value
-                    else:
-                        # If "D" doesn't exist, create a new row for it
-                        new_row_avg_d = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_avg_d.at[0, 'Data Points'] = "D"
-                        new_row_avg_d.at[0, selected_stage] = avg_defects_per_brd_value
-                        edited_data = pd.concat([edited_data, new_row_avg_d], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Avg D value calculated and updated: {avg_defects_per_brd_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Pfi, Pfo and Test Efficiency")
-
-                #"Poisson Yield (Ync)" calculation
-                try:
-                    avg_defects_per_brd_value = float(avg_defects_per_brd_value)    # Convert avg_defects_per_brd_value to float
-                    # Calculate Poisson Yield (Ync) using the given formula
-                    non_clustered_yield_value = np.exp(-avg_defects_per_brd_value)   # Formula: =EXP(-M25)
-
-                    # Update or insert "Poisson Yield (Ync)" value in the DataFrame for the selected stage
-                    non_clustered_yield_value_row_idx = edited_data[edited_data['Data Points'] == "Poisson Yield (Ync)"].index
-
-                    if not non_clustered_yield_value_row_idx.empty:
-                        # If "Poisson Yield (Ync)" already exists, update its value
-                        edited_data.at[non_clustered_yield_value_row_idx[0], selected_stage] = non_clustered_yield_value
-                    else:
-                        # If "Poisson Yield (Ync)" doesn't exist, create a new row for it
-                        new_row_ync = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_ync.at[0, 'Data Points'] = "Poisson Yield (Ync)"
-                        new_row_ync.at[0, selected_stage] = non_clustered_yield_value
-                        edited_data = pd.concat([edited_data, new_row_ync], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Ync value calculated and updated: {non_clustered_yield_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Avg D")
-
-                #"Poisson Yield (Ycl)" calculation
-                try:
-                    avg_defects_per_brd_value = float(avg_defects_per_brd_value)    # Convert avg_defects_per_brd_value to float
-                    alpha_α_assumed = float(alpha_α_assumed)  # Convert alpha_α_assumed to float
-
-                    # Calculate Poisson Yield (Ycl) using the given formula
-                    clustered_yield_value = (1 + (avg_defects_per_brd_value / alpha_α_assumed)) ** (-alpha_α_assumed)   # Formula: =(1+(M25/$C$27))^-$C$27
-                    
-                    # Update or insert "Poisson Yield (Ycl)" value in the DataFrame for the selected stage
-                    clustered_yield_value_row_idx = edited_data[edited_data['Data Points'] == "Clustered Yield (Ycl)"].index
-
-                    if not clustered_yield_value_row_idx.empty:
-                        # If "Clustered Yield (Ycl)" already exists, update its value
-                        edited_data.at[clustered_yield_value_row_idx[0], selected_stage] = clustered_yield_value
-                    else:
-                        # If "Clustered Yield (Ycl)" doesn't exist, create a new row for it
-                        new_row_ycl = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_ycl.at[0, 'Data Points'] = "Clustered Yield (Ycl)"
-                        new_row_ycl.at[0, selected_stage] = clustered_yield_value
-                        edited_data = pd.concat([edited_data, new_row_ycl], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Ycl value calculated and updated: {clustered_yield_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Avg D & mean_μ")
-
-                #"Overall Overall yield_Placement" calculation
-                try:
-                    non_clustered_yield_value = float(non_clustered_yield_value)   # Convert non_clustered_yield_value to float
-                    clustered_yield_value = float(clustered_yield_value)   # Convert clustered_yield_value to float
-
-                    # Calculate Overall yield_Placement using the given formula
-                    overall_yield_p_value = non_clustered_yield_value * clustered_yield_value  # Formula: =H25*I25
-
-                    # Update or insert "Overall yield_Placement" value in the DataFrame for the selected stage
-                    overall_yield_p_value_row_idx = edited_data[edited_data['Data Points'] == "Overall yield_Placement"].index
-
-                    if not overall_yield_p_value_row_idx.empty:
-                        # If "Overall yield_Placement" already exists, update its value
-                        edited_data.at[overall_yield_p_value_row_idx[0], selected_stage] = overall_yield_p_value
-                    else:
-                        # If "Overall yield_Placement" doesn't exist, create a new row for it
-                        new_row_oy = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_oy.at[0, 'Data Points'] = "Overall yield_Placement"
-                        new_row_oy.at[0, selected_stage] = overall_yield_p_value
-                        edited_data = pd.concat([edited_data, new_row_oy], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Overall yield_Component value calculated and updated: {overall_yield_p_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Ync & Ycl")
-
-# *****************************************************************************************************************
-# *****************************************************************************************************************
-# *****************************************************************************************************************
-# *****************************************************************************************************************
-# *****************************************************************************************************************
-# *****************************************************************************************************************
-
-        # Overall yield_Placement Calculations
-        # Button to trigger calculation of Pfi, Pfo, D, Ync, Ycl and Overall yield            
                 try:
                     defect_rate_value = float(defect_rate) / 1000000  # Convert to defect rate per million
-                    no_component_value = float(no_component_value)    # Convert solder_joint_value to float
-
-                    # Calculate pfi_value using the given formula
-                    pfi_value = 1 - (1 - defect_rate_value) ** no_component_value   # Formula: =1-(1-(500/1000000))^F16
-
-                    # Update or insert "Pfi" value in the DataFrame for the selected stage
-                    pfi_value_row_idx = edited_data[edited_data['Data Points'] == "Pfi"].index
-
-                    if not pfi_value_row_idx.empty:
-                        # If "Pfi" already exists, update its value
-                        edited_data.at[pfi_value_row_idx[0], selected_stage] = pfi_value
-                    else:
-                        # If "Pfi" doesn't exist, create a new row for it
-                        new_row_pfi = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_pfi.at[0, 'Data Points'] = "Pfi"
-                        new_row_pfi.at[0, selected_stage] = pfi_value
-                        edited_data = pd.concat([edited_data, new_row_pfi], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Pfi value calculated and updated: {pfi_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Defect Rate and Solder Joints")
-
-                #"Pfo" calculation
-                try:
-                    test_efficiency_value = float(test_efficiency) / 100  # Convert percentage to decimal
-                    pfi_value = float(pfi_value)    # Convert pfi_value to float
-
-                    # Calculate Pfo using the given formula
-                    pfo_value = 1 - (1 - pfi_value) ** (1 - test_efficiency_value)   # Formula: =1-((1-K16)^(1-$F$3))
-
-                    # Update or insert "Pfo" value in the DataFrame for the selected stage
-                    pfo_value_row_idx = edited_data[edited_data['Data Points'] == "Pfo"].index
-
-                    if not pfo_value_row_idx.empty:
-                        # If "Pfo" already exists, update its value
-                        edited_data.at[pfo_value_row_idx[0], selected_stage] = pfo_value
-                    else:
-                        # If "Pfo" doesn't exist, create a new row for it
-                        new_row_pfo = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_pfo.at[0, 'Data Points'] = "Pfo"
-                        new_row_pfo.at[0, selected_stage] = pfo_value
-                        edited_data = pd.concat([edited_data, new_row_pfo], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Pfo value calculated and updated: {pfo_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Pfi and Test Efficiency")
-
-                #"D" calculation
-                try:
-                    pfi_value = float(pfi_value)    # Convert pfi_value to float
-                    pfo_value = float(pfo_value)    # Convert pfo_value to float
                     test_efficiency_value = float(test_efficiency) / 100  # Convert percentage to decimal
+                    alpha_value = float(alpha_α_assumed)
 
-                    # Calculate D using the given formula
-                    avg_defects_per_brd_value = (pfi_value + pfo_value) * test_efficiency_value   # Formula: =SUM(K7:L7)*$F$3
-
-                    # Update or insert "D" value in the DataFrame for the selected stage
-                    avg_defects_per_brd_value_row_idx = edited_data[edited_data['Data Points'] == "D"].index
-
-                    if not avg_defects_per_brd_value_row_idx.empty:
-                        # If "Pfo" already exists, update its value
-                        edited_data.at[avg_defects_per_brd_value_row_idx[0], selected_stage] = avg_defects_per_brd_value
-                    else:
-                        # If "D" doesn't exist, create a new row for it
-                        new_row_avg_d = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_avg_d.at[0, 'Data Points'] = "D"
-                        new_row_avg_d.at[0, selected_stage] = avg_defects_per_brd_value
-                        edited_data = pd.concat([edited_data, new_row_avg_d], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Avg D value calculated and updated: {avg_defects_per_brd_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Pfi, Pfo and Test Efficiency")
-
-                #"Poisson Yield (Ync)" calculation
-                try:
-                    avg_defects_per_brd_value = float(avg_defects_per_brd_value)    # Convert avg_defects_per_brd_value to float
-                    # Calculate Poisson Yield (Ync) using the given formula
-                    non_clustered_yield_value = np.exp(-avg_defects_per_brd_value)   # Formula: =EXP(-M16)
-
-                    # Update or insert "Poisson Yield (Ync)" value in the DataFrame for the selected stage
-                    non_clustered_yield_value_row_idx = edited_data[edited_data['Data Points'] == "Poisson Yield (Ync)"].index
-
-                    if not non_clustered_yield_value_row_idx.empty:
-                        # If "Poisson Yield (Ync)" already exists, update its value
-                        edited_data.at[non_clustered_yield_value_row_idx[0], selected_stage] = non_clustered_yield_value
-                    else:
-                        # If "Poisson Yield (Ync)" doesn't exist, create a new row for it
-                        new_row_ync = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_ync.at[0, 'Data Points'] = "Poisson Yield (Ync)"
-                        new_row_ync.at[0, selected_stage] = non_clustered_yield_value
-                        edited_data = pd.concat([edited_data, new_row_ync], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Ync value calculated and updated: {non_clustered_yield_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Avg D")
-
-                #"Poisson Yield (Ycl)" calculation
-                try:
-                    avg_defects_per_brd_value = float(avg_defects_per_brd_value)    # Convert avg_defects_per_brd_value to float
-                    alpha_α_assumed = float(alpha_α_assumed)  # Convert alpha_α_assumed to float
-
-                    # Calculate Poisson Yield (Ycl) using the given formula
-                    clustered_yield_value = (1 + (avg_defects_per_brd_value / alpha_α_assumed)) ** (-alpha_α_assumed)   # Formula: =(1+(M16/$C$27))^-$C$27
-                    
-                    # Update or insert "Poisson Yield (Ycl)" value in the DataFrame for the selected stage
-                    clustered_yield_value_row_idx = edited_data[edited_data['Data Points'] == "Clustered Yield (Ycl)"].index
-
-                    if not clustered_yield_value_row_idx.empty:
-                        # If "Clustered Yield (Ycl)" already exists, update its value
-                        edited_data.at[clustered_yield_value_row_idx[0], selected_stage] = clustered_yield_value
-                    else:
-                        # If "Clustered Yield (Ycl)" doesn't exist, create a new row for it
-                        new_row_ycl = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_ycl.at[0, 'Data Points'] = "Clustered Yield (Ycl)"
-                        new_row_ycl.at[0, selected_stage] = clustered_yield_value
-                        edited_data = pd.concat([edited_data, new_row_ycl], ignore_index=True)
-
-                    # Update session state with the modified DataFrame
-                    st.session_state.edited_sheets[sheet_name] = edited_data
-
-                    # Optionally show a success message after calculation
-                    # st.success(f"Ycl value calculated and updated: {clustered_yield_value}")
-
-                except ValueError:
-                    # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Avg D & mean_μ")
-
-                #"Overall Overall yield_Component" calculation
-                try:
-                    non_clustered_yield_value = float(non_clustered_yield_value)   # Convert non_clustered_yield_value to float
-                    clustered_yield_value = float(clustered_yield_value)   # Convert clustered_yield_value to float
-
-                    # Calculate Overall yield_Component using the given formula
-                    overall_yield_c_value = non_clustered_yield_value * clustered_yield_value  # Formula: =H7*I7
+                    # Opportunities per defect category; a blank input leaves that category out
+                    opportunity_inputs = {
+                        "Soldering": solder_joint_value,
+                        "Placement": no_placement_value,
+                        "Component": no_component_value,
+                    }
+                    opportunities = np.array([float(value) if str(value).strip() else np.nan for value in opportunity_inputs.values()])
 
-                    # Update or insert "Overall yield_Component" value in the DataFrame for the selected stage
-                    overall_yield_c_value_row_idx = edited_data[edited_data['Data Points'] == "Overall yield_Component"].index
+                    # Whole chain for all three categories in one pass
+                    chain = yield_chain(opportunities, defect_rate_value, test_efficiency_value, alpha_value)
 
-                    if not overall_yield_c_value_row_idx.empty:
-                        # If "Overall yield_Component" already exists, update its value
-                        edited_data.at[overall_yield_c_value_row_idx[0], selected_stage] = overall_yield_c_value
-                    else:
-                        # If "Overall yield_Component" doesn't exist, create a new row for it
-                        new_row_oy = pd.DataFrame({col: [np.nan] for col in edited_data.columns})
-                        new_row_oy.at[0, 'Data Points'] = "Overall yield_Component"
-                        new_row_oy.at[0, selected_stage] = overall_yield_c_value
-                        edited_data = pd.concat([edited_data, new_row_oy], ignore_index=True)
+                    # Update or insert one row per (value, category) for the selected stage
+                    for point in CHAIN_POINTS:
+                        for i, category in enumerate(CATEGORIES):
+                            if np.isfinite(chain[point][i]):
+                                edited_data = set_data_point(edited_data, result_row_label(point, category), selected_stage, chain[point][i])
 
                     # Update session state with the modified DataFrame
                     st.session_state.edited_sheets[sheet_name] = edited_data
 
-                    # Optionally show a success message after calculation
+                    missing_categories = [category for category, value in zip(opportunity_inputs, opportunities) if not np.isfinite(value)]
+                    if missing_categories:
+                        st.warning(f"No opportunities entered for: {', '.join(missing_categories)}")
                     st.success("Calculation for (Analyse Pfi, Pfo, D, Ync, Ycl and Overall yield) done successfully!!!")
 
                 except ValueError:
                     # Show error if the inputs are not valid numbers
-                    st.error("Please enter valid numbers for Ync & Ycl")
+                    st.error("Please enter valid numbers for Defect Rate, Test Efficiency, Alpha and the opportunity counts")
 
 
     # Third row: col11 to col14 under col5 to col10
@@ -878,6 +397,83 @@ if uploaded_file:
             )
             st.success("Table saved and download ready!")
 
+    # Portfolio screening: every Data Points sheet of the workbook scored in one pass
+    if isinstance(data, dict):
+        with st.expander("Portfolio Yield Screening (all sheets)"):
+            portfolio_sheets = {name: st.session_state.edited_sheets.get(name, sheet) for name, sheet in data.items() if DATA_POINTS_COLUMN in sheet.columns}
+            if not portfolio_sheets:
+                st.info("No sheet with a 'Data Points' column found in this workbook.")
+            else:
+                try:
+                    portfolio_scores = score_boards(portfolio_sheets, float(alpha_α_assumed))
+                    st.dataframe(portfolio_scores.pivot_table(index=["Board", "Category"], columns="Stage", values="Overall yield", sort=False))
+                    st.download_button(
+                        label="Download Portfolio Scores (CSV)",
+                        data=portfolio_scores.to_csv(index=False),
+                        file_name="portfolio_yield_scores.csv",
+                        mime="text/csv"
+                    )
+                except ValueError:
+                    st.error("Please enter a valid number for Alpha (α) Assumed")
+
+        # Monte Carlo mode: sample DR, TE and alpha instead of using the point values above
+        with st.expander("Monte Carlo Yield Simulation (risk bands)"):
+            st.write("Opportunities come from the No. Solder Joints / No. Placement / No. Component inputs above.")
+
+            # Distribution picker; `scale` converts the displayed unit (ppm, %) to the model unit
+            def distribution_input(label, key, default, scale):
+                dist_cols = st.columns(4)
+                with dist_cols[0]:
+                    kind = st.selectbox(f"{label} distribution", DISTRIBUTIONS, index=3, key=f"mc_{key}_dist")
+                spec = {"distribution": kind}
+                for i, param in enumerate(DISTRIBUTION_PARAMS[kind]):
+                    param_default = {"sd": default * 0.1, "low": default * 0.8, "high": default * 1.2}.get(param, default)
+                    with dist_cols[i + 1]:
+                        spec[param] = st.number_input(f"{label} {param}", value=float(param_default), format="%g", key=f"mc_{key}_{param}") * scale
+                return spec
+
+            # Start from the point values entered above when they are valid numbers
+            mc_defaults = {"dr": (defect_rate, 50.0), "te": (test_efficiency, 90.0), "alpha": (alpha_α_assumed, 0.4)}
+            for key, (entered, fallback) in mc_defaults.items():
+                try:
+                    mc_defaults[key] = float(entered)
+                except ValueError:
+                    mc_defaults[key] = fallback
+
+            defect_rate_spec = distribution_input("DR (ppm)", "dr", mc_defaults["dr"], 1 / 1000000)
+            test_efficiency_spec = distribution_input("Test Efficiency %", "te", mc_defaults["te"], 1 / 100)
+            alpha_spec = distribution_input("Alpha (α)", "alpha", mc_defaults["alpha"], 1)
+
+            mc_col1, mc_col2 = st.columns(2)
+            with mc_col1:
+                mc_trials = st.number_input("Trials", min_value=10000, max_value=50000000, value=1000000, step=100000)
+            with mc_col2:
+                mc_seed = st.number_input("Random seed", min_value=0, value=42, step=1)
+
+            if st.button("Run Monte Carlo"):
+                try:
+                    mc_opportunities = [float(value) if str(value).strip() else np.nan for value in (solder_joint_value, no_placement_value, no_component_value)]
+                except ValueError:
+                    st.error("Please enter valid numbers for No. Solder Joints (N), No. Placement and No. Component")
+                else:
+                    if not np.isfinite(mc_opportunities).any():
+                        st.warning("Enter at least one of No. Solder Joints (N), No. Placement or No. Component above")
+                    else:
+                        try:
+                            with st.spinner("Simulating..."):
+                                mc_result = simulate_yield(mc_opportunities, defect_rate_spec, test_efficiency_spec, alpha_spec, trials=mc_trials, seed=int(mc_seed))
+                        except ValueError as e:
+                            st.error(f"Monte Carlo could not run: {e}")
+                        else:
+                            st.dataframe(percentile_table(mc_result))
+
+                            mc_hist_cols = st.columns(len(SIMULATED_POINTS))
+                            for mc_hist_col, point in zip(mc_hist_cols, SIMULATED_POINTS):
+                                hist_df = pd.concat([histogram_frame(mc_result, point, category).assign(Category=category) for category in CATEGORIES], ignore_index=True)
+                                fig_mc = px.bar(hist_df, x="Yield", y="Trials", color="Category", barmode="overlay", title=point)
+                                with mc_hist_col:
+                                    st.plotly_chart(fig_mc, use_container_width=True)
+
 
 ###############################################################################
 ###############################################################################
@@ -899,31 +495,12 @@ if uploaded_file:
             solder_joint_row = edited_data.loc[edited_data["Data Points"] == "No. Solder Joints (N)"].squeeze()
             solder_joints = {board: solder_joint_row[board] for board in board_names}
 
-            # Defect rate scaling values (logarithmic range for better visualization)
-            defect_rate_scaling = np.logspace(-1, 2, 50)  # From 0.1 to 100 in logarithmic scale
-
-            # Define function to calculate yield based on defect rate scaling
-            def calculate_yield(solder_joints, defect_rate_scaling, defect_rate_per_joint):
-                overall_defect_rate = defect_rate_scaling * defect_rate_per_joint
-                yield_percentage = 100 * np.exp(-overall_defect_rate * solder_joints)
-                return yield_percentage
-
             # Get defect rate per joint from the edited_data DataFrame
             defect_rate_per_joint_row = edited_data.loc[edited_data["Data Points"] == "Defect Rate per Solder Joint (DR)"].squeeze()
             defect_rates = {board: defect_rate_per_joint_row[board] for board in board_names}
 
-            # Calculate yields for each board
-            yield_data = []
-            for board in board_names:
-                yield_percentage = calculate_yield(solder_joints[board], defect_rate_scaling, defect_rates[board])
-                yield_data.append(pd.DataFrame({
-                    "Defect Rate Scaling": defect_rate_scaling,
-                    "Yield (%)": yield_percentage,
-                    "Board": board
-                }))
-
-            # Concatenate all yield data into a single DataFrame
-            df = pd.concat(yield_data, ignore_index=True)
+            # Yield over the 0.1 .. 100 log-scaled defect rate scaling for all boards in one broadcast (LRU cached)
+            df = board_curves(board_names, [solder_joints[board] for board in board_names], [defect_rates[board] for board in board_names])
 
             # Plotting the yield vs defect rate scaling
             fig = px.line(
@@ -984,9 +561,6 @@ if uploaded_file:
                 solder_joint_row = edited_data.loc[edited_data["Data Points"] == "No. Solder Joints (N)"].squeeze()
                 solder_joints = {board: solder_joint_row[board] for board in board_names}
 
-                # Defect rate scaling values (logarithmic range for better visualization)
-                defect_rate_scaling = np.logspace(-1, 2, 10)  # From 0.1 to 100 in logarithmic scale
-                
                 # Allow user to input alpha values
                 st.sidebar.write("### Set Alpha Values")
                 alpha_1 = st.sidebar.number_input("Alpha = 1.0", min_value=0.1, max_value=5.0, value=1.0, step=0.05)
@@ -996,25 +570,9 @@ if uploaded_file:
                 # Get defect rate per joint from the edited_data DataFrame for the selected stage
                 defect_rate_per_joint = defect_rate_per_joint_row[selected_stage]
 
-                # Define function to calculate yield based on defect rate scaling and alpha
-                def calculate_yield(solder_joints, defect_rate_scaling, defect_rate_per_joint, alpha):
-                    overall_defect_rate = defect_rate_scaling * defect_rate_per_joint
-                    yield_percentage = 100 * np.exp(-alpha * overall_defect_rate * solder_joints)
-                    return yield_percentage
-
-                # Calculate yields for each alpha value for a specific board, say "MK1"
-                yield_data = []
-                for alpha_value, alpha_label in zip([alpha_1, alpha_2, alpha_3], ["1.0", "0.45", "0.2"]):
-                    board = selected_stage  # Example board, replace or make dynamic if needed
-                    yield_percentage = calculate_yield(solder_joints[board], defect_rate_scaling, defect_rates[board], alpha_value)
-                    yield_data.append(pd.DataFrame({
-                        "Defect Rate Scaling": defect_rate_scaling,
-                        "Yield (%)": yield_percentage,
-                        "Alpha": f"alpha = {alpha_label}"
-                    }))
-
-                # Concatenate all yield data into a single DataFrame
-                df = pd.concat(yield_data, ignore_index=True)
+                # Yield curves of the selected board for all three alphas in one broadcast (LRU cached)
+                board = selected_stage
+                df = alpha_curves(solder_joints[board], defect_rates[board], [alpha_1, alpha_2, alpha_3], ["alpha = 1.0", "alpha = 0.45", "alpha = 0.2"])
 
                 # Plotting the yield vs defect rate scaling
                 fig1 = px.line(
@@ -1072,32 +630,12 @@ if uploaded_file:
             solder_joint_row = edited_data.loc[edited_data["Data Points"] == "No. Solder Joints (N)"].squeeze()
             defect_rate_row = edited_data.loc[edited_data["Data Points"] == "Defect Rate per Solder Joint (DR)"].squeeze()
 
-            scaling_factors = np.linspace(0.1, 100, 50)  # Scaling factors from 0.1 to 100
-
-            # Initialize a DataFrame to store results for all boards
-            plot_df = pd.DataFrame()
-
-            for board in board_names:
-                # Extract defect rate and solder joint values for the current board
-                solder_joints = solder_joint_row[board]
-                defect_rate = defect_rate_row[board]
+            # One curve per board over scaling factors 0.1 to 100, decimated to a fixed point budget
+            plot_df = cost_curves(board_names, solder_joint_row[board_names], defect_rate_row[board_names],
+                                  "Solder Def Rate Scaling", log_x=True)
 
-                # Calculate costs and cost percentages
-                costs = [defect_rate * solder_joints * scale for scale in scaling_factors]
-                cost_percentages = [scale * 100 for scale in scaling_factors]
-
-                # Create a temporary DataFrame for the current board
-                temp_df = pd.DataFrame({
-                    "Solder Def Rate Scaling": scaling_factors,
-                    "Cost % Change": costs,
-                    "Board": board
-                })
-
-                # Append to the main DataFrame
-                plot_df = pd.concat([plot_df, temp_df], ignore_index=True)
-            
             # Graph 1: Cost vs Solder Def Rate (Full Scale)
-            fig1 = px.line(
+            fig1 = line_chart(
                 plot_df,
                 x="Solder Def Rate Scaling",
                 y="Cost % Change",
@@ -1108,15 +646,17 @@ if uploaded_file:
                 log_x=True
             )
 
-            st.plotly_chart(fig1, use_container_width=True)
+            with stage_timer("cost chart render"):
+                st.plotly_chart(fig1, use_container_width=True)
 
 
         with col_graph3_3:
-            # Filter the DataFrame to focus on scaling factors <= 10
-            detail_df = plot_df[plot_df["Solder Def Rate Scaling"] <= 10]
+            # Focus on scaling factors <= 10, decimated on its own so the detail keeps its resolution
+            detail_df = cost_curves(board_names, solder_joint_row[board_names], defect_rate_row[board_names],
+                                    "Solder Def Rate Scaling", x_max=10)
 
-            # Create the line chart using Plotly Express
-            fig2 = px.line(
+            # Line chart with one trace per board
+            fig2 = line_chart(
                 detail_df,
                 x="Solder Def Rate Scaling",
                 y="Cost % Change",
@@ -1130,7 +670,8 @@ if uploaded_file:
             )
 
             # Display the chart in the second column
-            st.plotly_chart(fig2, use_container_width=True)
+            with stage_timer("cost chart render"):
+                st.plotly_chart(fig2, use_container_width=True)
 
 
         st.write("""
@@ -1,16 +1,24 @@
 import streamlit as st
 import pandas as pd
-import openpyxl
 import numpy as np
-from openpyxl.utils.dataframe import dataframe_to_rows
-import matplotlib
 import os
 import tempfile
 import io
-import plotly.graph_objects as go
 import uuid  # Add this import at the top of your script
-import math
-import plotly.express as px
+from core.cost_model import CostModel, VOLUME_TIERS
+from core.conversion_cost import COST_COLUMNS, cost_process_map, variant_costs
+from core.cost_sweep import break_even_volumes, sweep_frame, sweep_total_cost
+from core.excel_export import write_sheets
+from core.lazy_import import lazy_module
+from core.master_data import load_master_data
+from core.nre import extended_prices, nre_items, nre_scenarios
+from core.profiling import sidebar_panel
+from core.sheet_edits import SheetEdits
+from core.workbook_cache import load_data
+
+# Plotting libraries are imported when the first chart is drawn
+go = lazy_module("plotly.graph_objects")
+px = lazy_module("plotly.express")
 
 # Set the page layout to wide
 st.set_page_config(layout="wide")
@@ -18,6 +26,9 @@ st.set_page_config(layout="wide")
 # Title of the app
 st.title(":bar_chart: Should Costing Analysis")
 
+# Stage timings of this rerun; the sidebar waterfall shows the previous reruns
+sidebar_panel(st, "Should Costing Analysis")
+
 # Sidebar configuration
 st.sidebar.header("Category")
 
@@ -27,6 +38,282 @@ with st.sidebar.expander("Analysis"):
     new_analysis = st.checkbox("New")
     existing_analysis = st.checkbox("Existing")
 
+def cost_chain_section(cost_model, sheet_name, factory_data, nre_per_unit):
+    """Consumable costing, RM & conversion cost summary and its save button, shared by both analyses."""
+    st.header("Consumable Costing")
+
+    # Create one row with 4 columns for headings
+    rtv_col, solder_top_col, solder_bar_col = st.columns(3)
+
+    # RTV Glue
+    with rtv_col:
+        st.subheader("RTV Glue")
+        rtv_1_col, rtv_2_col = st.columns(2)
+        with rtv_1_col:
+        # Input Fields
+            glue_wt_per_board = st.text_input('RTV Wt/Brd Est', value="", key="glue_wt_per_board")
+            rtv_glue_cost = st.text_input('RTV Cost/ml', value="4.472", key="rtv_glue_cost", disabled=True)
+        
+        with rtv_2_col:
+            wastage_percentage_per_board = st.text_input('RTV Wastage %', value="", key="wastage_percentage_per_board")
+            rtv_specific_gravity = st.text_input('RTV SG', value="1.09", key="rtv_specific_gravity", disabled=True)
+
+        try:
+            # Safely convert inputs to float
+            cost_model.set_inputs({
+                'RTV Wt/Brd Est': float(glue_wt_per_board) if glue_wt_per_board else 0.0,
+                'RTV Wastage %': float(wastage_percentage_per_board) if wastage_percentage_per_board else 0.0,
+                'RTV Cost/ml': float(rtv_glue_cost) if rtv_glue_cost else 0.0,
+                'RTV SG': float(rtv_specific_gravity) if rtv_specific_gravity else 0.0,
+            })
+        except ValueError:
+            st.error("Please enter valid numeric values for all inputs.")
+
+        # Display results
+        with rtv_1_col:
+            st.text_input('RTV Wt/Brd', value=f"{cost_model['Wt per Board (Incl Wastage %)']:.2f}", key="wt_per_board_incl_wastage", disabled=True)
+        st.text_input('RTV Cost Per Board', value=f"{cost_model['RTV Cost Per Board']:.2f}", key="rtv_cost_per_board", disabled=True)
+
+    # Solder Paste - Top
+    with solder_top_col:
+        st.subheader("Solder Paste - Top & Bot")
+        # Board dimensions (Board Length and Board Width in the same line)
+        board_dim_col1, board_dim_col2 = st.columns(2)
+        with board_dim_col1:
+            board_length = st.text_input('Board Length(mm)', value="", key="board_length")
+        with board_dim_col2:
+            board_width = st.text_input('Board Width(mm)', value="", key="board_width")
+
+        sp_sg_col, sp_cost_col = st.columns(2)
+        with sp_sg_col:
+            paste_specific_gravity = st.text_input('Solder Paste SG (g/cc)', value="7.31", key="paste_specific_gravity", disabled=True)
+        with sp_cost_col:
+            cost_of_solder_paste = st.text_input('Solder Paste Cost(₹/g)', value="5.59", key="cost_of_solder_paste", disabled=True)
+
+        sp_top_col1, sp_bot_col2 = st.columns(2)
+        with sp_top_col1:
+            top_weight_estimate_percentage = st.text_input('Top Wt Estimate %', value="", key="top_weight_estimate_percentage")
+            top_sp_wastage_percentage = st.text_input('Top Wastage %', value="", key="top_sp_wastage_percentage")
+            solder_paste_thickness = st.text_input('Top SP Thick(mm)', value="", key="solder_paste_thickness")
+
+        try:
+            # Safely convert inputs to float
+            cost_model.set_inputs({
+                'Board Length(mm)': float(board_length) if board_length else 0.0,
+                'Board Width(mm)': float(board_width) if board_width else 0.0,
+                'Top Wt Estimate %': float(top_weight_estimate_percentage) if top_weight_estimate_percentage else 0.0,
+                'Top Wastage %': float(top_sp_wastage_percentage) if top_sp_wastage_percentage else 0.0,
+                'Solder Paste SG (g/cc)': float(paste_specific_gravity) if paste_specific_gravity else 7.31,
+                'Solder Paste Cost(₹/g)': float(cost_of_solder_paste) if cost_of_solder_paste else 5.59,
+                'Top SP Thick(mm)': float(solder_paste_thickness) if solder_paste_thickness else 0.0,
+            })
+        except ValueError:
+            st.error("Please enter valid numeric values for all inputs.")
+        with sp_top_col1:
+            # Display results
+            st.text_input('Top SP Wt (100%)(g)', value=f"{cost_model['Top SP Wt (100%)(g)']:.2f}", key="weight_of_solder_paste_for_100percentage_wt", disabled=True)
+            st.text_input('Top SP Wt Estimate(g)', value=f"{cost_model['Top SP Wt Estimate(g)']:.2f}", key="top_solder_paste_weight_estimate", disabled=True)
+            st.text_input('Top SP Cost/Brd(₹)', value=f"{cost_model['Top SP Cost/Brd(₹)']:.2f}", key="top_side_cost_per_board", disabled=True)
+
+    # Solder Paste - Bottom
+    with solder_top_col:
+        # Input Fields
+        with sp_bot_col2:
+            bot_weight_estimate_percentage = st.text_input('Bot Wt Estimate %', value="", key="bot_weight_estimate_percentage")
+            bot_sp_wastage_percentage = st.text_input('Bot Wastage %', value="", key="bot_sp_wastage_percentage")
+            bot_solder_paste_thickness = st.text_input('Bot SP Thick(mm)', value="", key="bot_solder_paste_thickness")
+
+        try:
+            # Safely convert inputs to float
+            cost_model.set_inputs({
+                'Bot Wt Estimate %': float(bot_weight_estimate_percentage) if bot_weight_estimate_percentage else 0.0,
+                'Bot Wastage %': float(bot_sp_wastage_percentage) if bot_sp_wastage_percentage else 0.0,
+                'Bot SP Thick(mm)': float(bot_solder_paste_thickness) if bot_solder_paste_thickness else 0.0,
+            })
+        except ValueError:
+            st.error("Please enter valid numeric values for all inputs.")
+        with sp_bot_col2:
+            # Display results
+            st.text_input('Bot SP Wt (100%)(g)', value=f"{cost_model['Bot SP Wt (100%)(g)']:.2f}", key="bot_weight_of_solder_paste_for_100percentage_wt_value", disabled=True)
+            st.text_input('Bot SP Wt Estimate(g)', value=f"{cost_model['Bot SP Wt Estimate(g)']:.2f}", key="bot_solder_paste_weight_estimate", disabled=True)
+            st.text_input('Bot SP Cost/Brd(₹)', value=f"{cost_model['Bot SP Cost/Brd(₹)']:.2f}", key="bot_side_cost_per_board", disabled=True)
+
+    # Flux Wave Soldering
+    with rtv_col:
+        st.subheader("Flux Wave Soldering")
+        rtv_3_col, rtv_4_col = st.columns(2)
+
+        # Input Fields
+        with rtv_3_col:
+            flux_wastage_percentage = st.text_input('Flux Wastage %', value="", key="flux_wastage_percentage")
+        with rtv_4_col:
+            flux_cost = st.text_input('Flux Cost(₹/ml)', value="0.473", key="flux_cost", disabled=True)
+
+        try:
+            # Safely convert inputs to float
+            cost_model.set_inputs({
+                'Flux Wastage %': float(flux_wastage_percentage) if flux_wastage_percentage else 0.0,
+                'Flux Cost(₹/ml)': float(flux_cost) if flux_cost else 0.473,
+            })
+        except ValueError:
+            st.error("Please enter valid numeric values for all inputs.")
+
+        # Display results
+        with rtv_3_col:
+            st.text_input('Flux Area/Brd(mm^2)', value=f"{cost_model['Flux Area/Brd(mm^2)']:.2f}", key="flux_board_area", disabled=True)
+        with rtv_4_col:
+            st.text_input('Flux Spray Area(mm^2)', value=f"{cost_model['Flux Spray Area(mm^2)']:.2f}", key="flux_spread_area", disabled=True)
+        st.text_input('Flux Cost Per Board(₹)', value=cost_model['Flux Cost Per Board(₹)'], key="flux_cost_per_board", disabled=True)
+
+    # Solder bar
+    with solder_bar_col:
+        circumferential_col, barrel1_col, barrel2_col = st.columns(3)
+        with circumferential_col:
+            st.subheader("Solder Bar")
+            # Input Fields
+            outer_dia_of_pad = st.text_input('Pad OD (mm)', value="", key="outer_dia_of_pad", disabled=False)
+            inner_dia_of_pad = st.text_input('Pad ID (mm)', value="", key="inner_dia_of_pad", disabled=False)
+            no_of_solder_joints = st.text_input('Solder Joints', value="", key="no_of_solder_joints", disabled=False)
+            thickness_of_solder = st.text_input('Solder Thick (mm)', value="0.6", key="thickness_of_solder", disabled=True)
+
+            try:
+                # Safely convert inputs to float
+                cost_model.set_inputs({
+                    'Pad OD (mm)': float(outer_dia_of_pad) if outer_dia_of_pad else 0.0,
+                    'Pad ID (mm)': float(inner_dia_of_pad) if inner_dia_of_pad else 0.0,
+                    'Solder Joints': float(no_of_solder_joints) if no_of_solder_joints else 0.0,
+                    'Solder Thick (mm)': float(thickness_of_solder) if thickness_of_solder else 0.0,
+                })
+            except ValueError:
+                st.error("Please enter valid numeric values for all inputs.")
+
+            # Display the calculated value - Circumferential Fill
+            st.text_input('Solder Vol(mm^3)', value=f"{cost_model['Solder Vol(mm^3)']:.2f}", key="volume_of_solder_per_joint", disabled=True) 
+            st.text_input('Solder Wt/Joint(g)', value=f"{cost_model['Solder Wt/Joint(g)']:.2f}", key="weight_of_Solder_per_joint", disabled=True) 
+            st.text_input('Solder Wt/Brd(g)', value=f"{cost_model['Solder Wt/Brd(g)']:.2f}", key="weight_of_Solder_per_board", disabled=True) 
+
+        with barrel1_col:
+            st.subheader("")
+            # Input Fields                  
+            barrel_dia = st.text_input('Barrel Dia(mm)', value="", key="barrel_dia", disabled=False)
+            board_thick = st.text_input('Board Thick(mm)', value="", key="board_thick", disabled=False)
+            barrel_joints = st.text_input('Barrel Joints', value="", key="barrel_joints", disabled=False)
+
+        try:
+            # Safely convert inputs to float
+            cost_model.set_inputs({
+                'Barrel Dia(mm)': float(barrel_dia) if barrel_dia else 0.0,
+                'Board Thick(mm)': float(board_thick) if board_thick else 0.0,
+                'Barrel Joints': float(barrel_joints) if barrel_joints else 0.0,
+            })
+        except ValueError:
+            st.error("Please enter valid numeric values for all inputs.")
+
+        with barrel1_col:
+            # Display the calculated value - Barrel Fill
+            st.text_input('Lead Thickness(mm)', value=f"{cost_model['Lead Thickness(mm)']:.2f}", key="lead_thickness", disabled=True)
+            st.text_input('Barrel Solder Vol(mm^3)', value=f"{cost_model['Barrel Solder Vol(mm^3)']:.2f}", key="barrel_solder_vol", disabled=True) 
+            st.text_input('Barrel Solder Wt/Joint(g)', value=f"{cost_model['Barrel Solder Wt/Joint(g)']:.4f}", key="barrel_solder_wt_per_joint", disabled=True) 
+            st.text_input('Barrel Solder Wt/Brd(g)', value=f"{cost_model['Barrel Solder Wt/Brd(g)']:.2f}", key="barrel_solder_wt_per_board", disabled=True) 
+        with barrel2_col:  
+            st.subheader("")                    
+            st.text_input('Total Solder Wt(g)', value=f"{cost_model['Total Solder Wt(g)']:.2f}", key="circumferential_plus_barrel_fill_solder_wt", disabled=True) 
+            st.text_input('Solder Bar Cost(₹/g)', value=cost_model['Solder Bar Cost(₹/g)'], key="solder_bar_cost", disabled=True)
+            st.text_input('Solder Bar Cost/Brd(₹)', value=f"{cost_model['Solder Bar Cost/Brd(₹)']:.2f}", key="solderbar_cost_per_brd", disabled=True) 
+
+
+    st.header("RM & Conversion Cost Summary")                
+    # Create one row with 4 columns for headings
+    input_cost_col, ohpandother_percentage_col, ohpandother_cost_col, placeholder2_col = st.columns(4)
+    
+    with input_cost_col:
+        st.subheader("Input Cost")
+        cost_pcb = st.text_input('PCB (₹)', value="", key="cost_pcb")
+        cost_electronics_components = st.text_input('Electronics Component (₹)', value="", key="cost_electronics_components")
+        cost_mech_components = st.text_input('Mechanical Component (₹)', value="", key="cost_mech_components")
+        cost_nre = st.text_input('NRE (₹)', value=nre_per_unit, key="cost_nre", disabled=True)
+        st.text_input('Consumables (₹)', value=cost_model['Consumables (₹)'], key="cost_consumables", disabled=True)
+        # Safely convert inputs to float; invalid entries cost 0
+        try:
+            cost_model.set_inputs({
+                'PCB (₹)': float(cost_pcb) if cost_pcb else 0.0,
+                'Electronics Component (₹)': float(cost_electronics_components) if cost_electronics_components else 0.0,
+                'Mechanical Component (₹)': float(cost_mech_components) if cost_mech_components else 0.0,
+                'NRE (₹)': float(cost_nre) if cost_nre else 0.0,
+            })
+        except ValueError:
+            st.error("Please enter valid numeric values for all cost fields.")
+            cost_model.set_inputs({'PCB (₹)': 0.0, 'Electronics Component (₹)': 0.0, 'Mechanical Component (₹)': 0.0, 'NRE (₹)': 0.0})
+
+
+    with ohpandother_percentage_col:
+        st.subheader("OHP% Model Vs. Ann. Volume", )
+        # Annual volume selection dropdown
+        annual_volume = st.selectbox("Select Annual Volume", options=list(VOLUME_TIERS))
+        cost_model.set_input('Select Annual Volume', annual_volume)
+
+        # Display the percentages dynamically in a single column
+        st.subheader(f"Percentages for {annual_volume}")
+
+        # Use st.columns to arrange the inputs in rows
+        percentage_labels_grouped = [
+            ["MOH %", "FOH %"],
+            ["Profit on RM %", "Profit on VA %"],
+            ["R&D %","Warranty %","SG&A %"],
+        ]
+        # Display percentage inputs dynamically in rows
+        for row_labels in percentage_labels_grouped:
+            cols = st.columns(len(row_labels))
+            for i, label in enumerate(row_labels):
+                # Show the value of the selected annual volume in a disabled text input
+                cols[i].text_input(label, value=str(cost_model[label]), disabled=True)
+
+        # Aggregate the conversion cost of the process map
+        cost_model.set_inputs({
+            'Total Batch Set up Cost': sum(factory_data["Batch Set up Cost"]),
+            'Total VA MC Cost': sum(factory_data["VA MC Cost"]),
+            'Total Labour cost/Hr': sum(factory_data["Labour cost/Hr"]),
+        })
+
+    with ohpandother_cost_col:
+        st.subheader("Cost Computation")
+        ohpandother_cost_col1, ohpandother_cost_col2 = st.columns(2)
+
+        with ohpandother_cost_col1:
+            for label in ["MOH (₹)", "Profit on RM (₹)", "Material Cost (₹)", "OH&P (₹)", "Warranty (₹)"]:
+                st.text_input(label, value=f"{cost_model[label]:.2f}", disabled=True)
+        with ohpandother_cost_col2:
+            for label in ["FOH (₹)", "Profit on VA (₹)", "Manufacturing Cost (₹)", "R&D (₹)", "SG&A (₹)"]:
+                st.text_input(label, value=f"{cost_model[label]:.2f}", disabled=True)
+
+    with placeholder2_col:
+        st.subheader("Cost Summary")
+        st.text_input('Total Cost (₹)', value=cost_model['Total Cost (₹)'], disabled=True)
+        st.text_input('RM Cost (₹)', value=cost_model['RM Cost (₹)'], disabled=True)
+        st.text_input('Conversion Cost (₹)', value=cost_model['Conversion Cost (₹)'], disabled=True)
+
+        if st.button("Save Consumable, RM & Conversion Costing Details"):
+            if sheet_name in st.session_state.edited_sheets:
+                # Retrieve the current edited_data
+                current_data = st.session_state.edited_sheets[sheet_name].copy()
+
+                # Add the cost model's inputs and results as new columns if they don't exist
+                saved_row = cost_model.row()
+                for column in saved_row:
+                    if column not in current_data.columns:
+                        current_data[column] = np.nan
+
+                # Assign values to the first row of respective columns
+                for column, value in saved_row.items():
+                    current_data.loc[0, column] = value
+
+            if sheet_name:  # Check if the sheet_name is not empty
+                # Update the session state
+                st.session_state.edited_sheets[sheet_name] = current_data
+                st.success("Consumable, RM & Conversion Costing Details saved successfully.")
+            else:
+                st.error("No data available to save Consumable, RM & Conversion Costing Details.")
+
 # Display selected analysis
 if new_analysis:
     st.subheader("New Analysis")
@@ -37,7 +324,9 @@ if new_analysis:
     # Load data if the file is uploaded
     if uploaded_file_simulation_db:        
         try:
-            df = pd.read_excel(uploaded_file_simulation_db, sheet_name='Process_CT')
+            # Process_CT, NRE, MMR-EMS and Assumptions all come from one parse of the workbook
+            master_data = load_master_data(uploaded_file_simulation_db, ['Process_CT', 'NRE', 'MMR-EMS', 'Assumptions'])
+            df = master_data['Process_CT']
             # st.write("File successfully read. Preview below:")
             # st.dataframe(df.head())
         except Exception as e:
@@ -66,7 +355,7 @@ if new_analysis:
             overall_labor_efficiency_input = st.text_input('Overall Labor Efficiency', value=overall_labor_efficiency, disabled=True)
 
         # Load the specific sheet from simulation_db.xlsx for 'NRE'
-        df2 = pd.read_excel(uploaded_file_simulation_db, sheet_name='NRE')
+        df2 = master_data['NRE']
 
         st.write("-------------------")
         st.markdown("## NRE Mapping")
@@ -197,6 +486,18 @@ if new_analysis:
                 # Increment the key to reset the select boxes
                 st.session_state['reset_selectbox'] += 1
 
+        # Bulk mode: amortize many NRE master items in one pass instead of one Save per item
+        with st.expander("Bulk NRE Mapping"):
+            bulk_items = st.multiselect("Items to add", list(df2['Item'].unique()), default=list(df2['Item'].unique()))
+            if st.button('Add Selected Items'):
+                bulk_rows = nre_items(df2, product_volume, bulk_items)
+                bulk_rows = bulk_rows[~bulk_rows['Item'].isin(st.session_state['filtered_data']['Item'])]
+                if bulk_rows.empty:
+                    st.warning("All selected items already exist in the table")
+                else:
+                    st.session_state['filtered_data'] = pd.concat([st.session_state['filtered_data'], bulk_rows], ignore_index=True)
+                    st.success(f"{len(bulk_rows)} records added successfully.")
+
         # Display the updated dataframe with a header
         st.dataframe(st.session_state['filtered_data'], use_container_width=True)
 
@@ -223,6 +524,28 @@ if new_analysis:
             nre_per_unit = tool_maintenance_cost_value / product_volume if product_volume else 0
             st.text_input('NRE per Unit (₹)', value=nre_per_unit, disabled=True)
 
+        # NRE per unit of the mapped items under several product-volume scenarios
+        with st.expander("NRE per Unit by Product Volume"):
+            scenario_text = st.text_input('Product Volume scenarios (comma separated)', value="10000, 50000, 100000, 250000, 500000, 1000000")
+            try:
+                scenario_volumes = sorted({float(value) for value in scenario_text.split(",") if value.strip()})
+            except ValueError:
+                scenario_volumes = []
+                st.warning("Invalid input for 'Product Volume scenarios'. Please enter numbers separated by commas.")
+            mapped_items = st.session_state['filtered_data']['Item'].dropna().unique()
+            scenario_items = st.multiselect("Items", list(df2['Item'].unique()), default=[item for item in mapped_items if item in set(df2['Item'])],
+                                            help="Defaults to the items in the table above")
+            if scenario_volumes and scenario_items:
+                scenario_df = nre_scenarios(df2, scenario_volumes, scenario_items, tool_maintenance_rate_value)
+                scenario_col1, scenario_col2 = st.columns(2)
+                with scenario_col1:
+                    st.dataframe(scenario_df, use_container_width=True)
+                with scenario_col2:
+                    fig_nre = px.line(scenario_df, x="Product Volume", y="NRE Per Unit (₹)", markers=True, log_x=True, title="NRE per Unit vs. Product Volume")
+                    st.plotly_chart(fig_nre, use_container_width=True)
+                st.write("Extended Price (₹) per item and product volume")
+                st.dataframe(extended_prices(df2, scenario_volumes, scenario_items), use_container_width=True)
+
         # Provide inputs for file name, sheet name, and path
         st.markdown("### Save Data to Excel")
 
@@ -260,27 +583,19 @@ if new_analysis:
         st.write("-------------------")
 
         # Load the specific sheet from simulation_db.xlsx for 'MMR-EMS'
-        df3 = pd.read_excel(uploaded_file_simulation_db, sheet_name='MMR-EMS')
-        df4 = pd.read_excel(uploaded_file_simulation_db, sheet_name='Assumptions')
+        df3 = master_data['MMR-EMS']
+        df4 = master_data['Assumptions']
 
         # File uploader for Excel/CSV/XLSM files
         uploaded_file = st.file_uploader("Choose Process Mapping Excel/CSV/XLSM file", type=["xlsx", "csv", "xlsm"])
 
         if uploaded_file:
-            # Load data from the uploaded file
-            @st.cache_data
-            def load_data(file):
-                if file.name.endswith('.csv'):
-                    df = pd.read_csv(file)
-                else:
-                    df = pd.read_excel(file, sheet_name=None)
-                return df
-
+            # Load data from the uploaded file (parsed sheets are cached on disk by file hash)
             df6 = load_data(uploaded_file)  # Load the Process Mapping data
 
             # Initialize session state to store edited data for each sheet
             if 'edited_sheets' not in st.session_state:
-                st.session_state.edited_sheets = {}
+                st.session_state.edited_sheets = SheetEdits()
 
             processmapping_col1, processmapping_col2 = st.columns(2)
 
@@ -299,551 +614,33 @@ if new_analysis:
                 if 'MMR' not in df3.columns:
                     st.error("'MMR' column not found in 'MMR-EMS' sheet. Please check the input file.")
                 else:
-                    # Merge the data, keeping df5 (selected sheet) as left and matching with df3
-                    edited_data = st.session_state.df.merge(
-                        df3, left_on='Stage', right_on='Process Name', how='inner'
-                    )
-
-                    # Display only matching rows after the merge
-                    if edited_data.empty:
-                        st.warning("No matching content found between the Process Mapping and MMR-EMS datasets.")
-                    else:
-                        # Fill NaN values with 0
-                        edited_data.fillna(0, inplace=True)
-
-                    # Fill NaN values in 'MMR' with 0
-                    edited_data['MMR'] = edited_data['MMR'].fillna(0)
-
-                    # Add necessary columns with default values
-                    edited_data['VA MC Cost'] = np.nan
-                    edited_data['Batch Set up Cost'] = np.nan
-                    edited_data['Labour cost/Hr'] = np.nan
-
-                    # Calculate VA MC Cost
-                    edited_data['VA MC Cost'] = edited_data['Process Cycle Time'] * edited_data['MMR']
-                    edited_data['VA MC Cost'] = edited_data['VA MC Cost'].fillna(0)
-
                     try:
                         labour_cost_hr = df4.loc[0, 'Labour cost/Hr']
                         idl_cost_hr = df4.loc[0, 'Idl Cost/Hr']
-                        months_per_year = 12
-                        batch_qty = annual_volume / months_per_year if annual_volume > 0 else 1  # Avoid division by zero
-
-                        # Calculate Batch Set up Cost
-                        edited_data['Batch Set up Cost'] = (
-                            (((edited_data['Batch Set up Time'] * labour_cost_hr) / 3600) * 1.15) / batch_qty
-                        ) * edited_data['FTE for Batch Set up']
-                        
-                        # Calculate Labour Cost
-                        edited_data['Labour cost/Hr'] = (
-                            ((((edited_data['Process Cycle Time'] * labour_cost_hr) / 3600) * 1.15) * edited_data['DL FTE']) + 
-                            ((((edited_data['Process Cycle Time'] * idl_cost_hr) / 3600) * 1.15) * edited_data['IDL FTE'])
-                        )
 
-                        # Fill NaN values with 0
-                        edited_data['Batch Set up Cost'] = edited_data['Batch Set up Cost'].fillna(0)
-                        edited_data['Labour cost/Hr'] = edited_data['Labour cost/Hr'].fillna(0)
+                        # Merge the selected sheet with df3 on Stage and cost each matching stage
+                        edited_data = cost_process_map(st.session_state.df, df3, labour_cost_hr, idl_cost_hr, annual_volume)
+
+                        # Display only matching rows after the merge
+                        if edited_data.empty:
+                            st.warning("No matching content found between the Process Mapping and MMR-EMS datasets.")
 
                         # Update session state
                         st.session_state.edited_sheets[sheet_name] = edited_data
 
                     except KeyError as e:
                         st.error(f"Error in calculation: Missing column {e}. Please check the input data.")
+                        edited_data = st.session_state.df.merge(df3, left_on='Stage', right_on='Process Name', how='inner')
+                        for column in COST_COLUMNS:
+                            edited_data[column] = np.nan
                 # Display the updated DataFrame
                 st.data_editor(edited_data, key=f"data_editor_{sheet_name}_updated")
 
-                st.header("Consumable Costing")
-
-                # Create one row with 4 columns for headings
-                rtv_col, solder_top_col, solder_bar_col = st.columns(3)
-
-                # RTV Glue
-                with rtv_col:
-                    st.subheader("RTV Glue")
-                    rtv_1_col, rtv_2_col = st.columns(2)
-                    with rtv_1_col:
-                    # Input Fields
-                        glue_wt_per_board = st.text_input('RTV Wt/Brd Est', value="", key="glue_wt_per_board")
-                        rtv_glue_cost = st.text_input('RTV Cost/ml', value="4.472", key="rtv_glue_cost", disabled=True)
-                    
-                    with rtv_2_col:
-                        wastage_percentage_per_board = st.text_input('RTV Wastage %', value="", key="wastage_percentage_per_board")
-                        rtv_specific_gravity = st.text_input('RTV SG', value="1.09", key="rtv_specific_gravity", disabled=True)
-
-                    # Initialize the output variables
-                    wt_per_board_incl_wastage = 0.0
-                    rtv_cost_per_board = 0.0
-
-                    try:
-                        # Safely convert inputs to float
-                        glue_wt_per_board = float(glue_wt_per_board) if glue_wt_per_board else 0.0
-                        wastage_percentage_per_board = float(wastage_percentage_per_board) if wastage_percentage_per_board else 0.0
-                        rtv_glue_cost = float(rtv_glue_cost) if rtv_glue_cost else 0.0
-                        rtv_specific_gravity = float(rtv_specific_gravity) if rtv_specific_gravity else 0.0
-
-                        # Calculate wt_per_board_incl_wastage
-                        wt_per_board_incl_wastage = (
-                            (glue_wt_per_board * rtv_specific_gravity) * (1 + (wastage_percentage_per_board / 100))
-                        )
-
-                        # Calculate rtv_cost_per_board
-                        rtv_cost_per_board = wt_per_board_incl_wastage * rtv_glue_cost
-
-                    except ValueError:
-                        st.error("Please enter valid numeric values for all inputs.")
-
-                    # Display results
-                    with rtv_1_col:
-                        st.text_input('RTV Wt/Brd', value=f"{wt_per_board_incl_wastage:.2f}", key="wt_per_board_incl_wastage", disabled=True)
-                    # with rtv_2_col:
-                    st.text_input('RTV Cost Per Board', value=f"{rtv_cost_per_board:.2f}", key="rtv_cost_per_board", disabled=True)
-
-                # Solder Paste - Top
-                with solder_top_col:
-                    st.subheader("Solder Paste - Top & Bot")
-                    # Board dimensions (Board Length and Board Width in the same line)
-                    board_dim_col1, board_dim_col2 = st.columns(2)
-                    with board_dim_col1:
-                        board_length = st.text_input('Board Length(mm)', value="", key="board_length")
-                    with board_dim_col2:
-                        # st.write("Solder Paste - Bot")
-                        board_width = st.text_input('Board Width(mm)', value="", key="board_width")
-
-                    sp_sg_col, sp_cost_col = st.columns(2)
-                    with sp_sg_col:
-                        paste_specific_gravity = st.text_input('Solder Paste SG (g/cc)', value="7.31", key="paste_specific_gravity", disabled=True)
-                    with sp_cost_col:
-                        cost_of_solder_paste = st.text_input('Solder Paste Cost(₹/g)', value="5.59", key="cost_of_solder_paste", disabled=True)
-
-                    sp_top_col1, sp_bot_col2 = st.columns(2)
-                    with sp_top_col1:
-                        top_weight_estimate_percentage = st.text_input('Top Wt Estimate %', value="", key="top_weight_estimate_percentage")
-                        top_sp_wastage_percentage = st.text_input('Top Wastage %', value="", key="top_sp_wastage_percentage")
-                        solder_paste_thickness = st.text_input('Top SP Thick(mm)', value="", key="solder_paste_thickness")
-
-                    try:
-                        # Safely convert inputs to float
-                        board_length = float(board_length) if board_length else 0.0
-                        board_width = float(board_width) if board_width else 0.0
-                        top_weight_estimate_percentage = float(top_weight_estimate_percentage) if top_weight_estimate_percentage else 0.0
-                        top_sp_wastage_percentage = float(top_sp_wastage_percentage) if top_sp_wastage_percentage else 0.0
-                        paste_specific_gravity = float(paste_specific_gravity) if paste_specific_gravity else 7.31
-                        cost_of_solder_paste = float(cost_of_solder_paste) if cost_of_solder_paste else 5.59
-                        solder_paste_thickness = float(solder_paste_thickness) if solder_paste_thickness else 0.0
-
-                        # Calculate weight_of_solder_paste_for_100percentage_wt
-                        weight_of_solder_paste_for_100percentage_wt_value = (
-                            (board_length * board_width * solder_paste_thickness * paste_specific_gravity) / 1000
-                        )
-
-                        # Convert percentages to fractions
-                        top_weight_estimate_percentage /= 100
-                        top_sp_wastage_percentage /= 100
-
-                        # Calculate top_solder_paste_weight_estimate
-                        top_weight_of_solder_paste_for_wt_estimate_value = (
-                            weight_of_solder_paste_for_100percentage_wt_value
-                            * top_weight_estimate_percentage
-                            * (1 + top_sp_wastage_percentage)
-                        )
-
-                        # Calculate top_side_cost_per_board
-                        top_side_cost_per_board_value = top_weight_of_solder_paste_for_wt_estimate_value * cost_of_solder_paste
-
-                    except ValueError:
-                        st.error("Please enter valid numeric values for all inputs.")
-                    with sp_top_col1:
-                        # Display results
-                        st.text_input('Top SP Wt (100%)(g)', value=f"{weight_of_solder_paste_for_100percentage_wt_value:.2f}", key="weight_of_solder_paste_for_100percentage_wt", disabled=True)
-                        st.text_input('Top SP Wt Estimate(g)', value=f"{top_weight_of_solder_paste_for_wt_estimate_value:.2f}", key="top_solder_paste_weight_estimate", disabled=True)
-                        st.text_input('Top SP Cost/Brd(₹)', value=f"{top_side_cost_per_board_value:.2f}", key="top_side_cost_per_board", disabled=True)                # Solder Paste - Bottom
-
-
-                # Solder Paste - Bottom
-                # with solder_bottom_col:
-                with solder_top_col:
-                    # st.subheader("Solder Paste - Bottom")
-                    # Input Fields
-                    with sp_bot_col2:
-                        bot_weight_estimate_percentage = st.text_input('Bot Wt Estimate %', value="", key="bot_weight_estimate_percentage")
-                        bot_sp_wastage_percentage = st.text_input('Bot Wastage %', value="", key="bot_sp_wastage_percentage")
-                        bot_solder_paste_thickness = st.text_input('Bot SP Thick(mm)', value="", key="bot_solder_paste_thickness")
-
-                    try:
-                        # Safely convert inputs to float
-                        bot_weight_estimate_percentage = float(bot_weight_estimate_percentage) if bot_weight_estimate_percentage else 0.0
-                        bot_sp_wastage_percentage = float(bot_sp_wastage_percentage) if bot_sp_wastage_percentage else 0.0
-                        bot_solder_paste_thickness = float(bot_solder_paste_thickness) if bot_solder_paste_thickness else 0.0
-
-                        # Calculate weight_of_solder_paste_for_100percentage_wt
-                        bot_weight_of_solder_paste_for_100percentage_wt_value = (
-                            (board_length * board_width * bot_solder_paste_thickness * paste_specific_gravity) / 1000
-                        )
-
-                        # Convert percentages to fractions
-                        bot_weight_estimate_percentage /= 100
-                        bot_sp_wastage_percentage /= 100
-
-                        # Compute bot_weight_of_solder_paste_for_wt_estimate_value
-                        bot_weight_of_solder_paste_for_wt_estimate_value = (
-                            bot_weight_of_solder_paste_for_100percentage_wt_value
-                            * bot_weight_estimate_percentage
-                            * (1 + bot_sp_wastage_percentage)
-                        )
-
-                        # Compute bot_side_cost_per_board
-                        bot_side_cost_per_board_value = bot_weight_of_solder_paste_for_wt_estimate_value * cost_of_solder_paste
-
-                    except ValueError:
-                        st.error("Please enter valid numeric values for all inputs.")
-                    with sp_bot_col2:
-                        # Display results
-                        st.text_input('Bot SP Wt (100%)(g)', value=f"{bot_weight_of_solder_paste_for_100percentage_wt_value:.2f}", key="bot_weight_of_solder_paste_for_100percentage_wt_value", disabled=True)
-                        st.text_input('Bot SP Wt Estimate(g)', value=f"{bot_weight_of_solder_paste_for_wt_estimate_value:.2f}", key="bot_solder_paste_weight_estimate", disabled=True)
-                        st.text_input('Bot SP Cost/Brd(₹)', value=f"{bot_side_cost_per_board_value:.2f}", key="bot_side_cost_per_board", disabled=True)
-
-                # Flux Wave Soldering
-                with rtv_col:
-                    st.subheader("Flux Wave Soldering")
-                    rtv_3_col, rtv_4_col = st.columns(2)
-
-                    # Input Fields
-                    with rtv_3_col:
-                        flux_wastage_percentage = st.text_input('Flux Wastage %', value="", key="flux_wastage_percentage")
-                    with rtv_4_col:
-                        flux_cost = st.text_input('Flux Cost(₹/ml)', value="0.473", key="flux_cost", disabled=True)
-
-                    try:
-                        # Safely convert inputs to float
-                        flux_wastage_percentage = float(flux_wastage_percentage) if flux_wastage_percentage else 0.0
-                        flux_cost = float(flux_cost) if flux_cost else 0.473
-
-                        # Compute flux_board_area
-                        flux_board_area_value = board_length * board_width
-
-                        # Convert percentage to fraction
-                        flux_wastage_percentage /= 100
-
-                        # Compute flux_spread_area
-                        flux_spread_area_value = ((flux_board_area_value / 100) * 0.1) * (1 + flux_wastage_percentage)
-
-                    except ValueError:
-                        st.error("Please enter valid numeric values for all inputs.")
-
-                    # Display results
-                    with rtv_3_col:
-                        st.text_input('Flux Area/Brd(mm^2)', value=f"{flux_board_area_value:.2f}", key="flux_board_area", disabled=True)
-                    with rtv_4_col:
-                        st.text_input('Flux Spray Area(mm^2)', value=f"{flux_spread_area_value:.2f}", key="flux_spread_area", disabled=True)
-                    flux_cost_per_board_value = flux_spread_area_value * flux_cost
-                    flux_cost_per_board = st.text_input('Flux Cost Per Board(₹)', value=flux_cost_per_board_value, key="flux_cost_per_board", disabled=True)
-
-                # Solder bar
-                with solder_bar_col:
-                    circumferential_col, barrel1_col, barrel2_col = st.columns(3)
-                    with circumferential_col:
-                        st.subheader("Solder Bar")
-                        # Input Fields
-                        outer_dia_of_pad = st.text_input('Pad OD (mm)', value="", key="outer_dia_of_pad", disabled=False)
-                        inner_dia_of_pad = st.text_input('Pad ID (mm)', value="", key="inner_dia_of_pad", disabled=False)
-                        no_of_solder_joints = st.text_input('Solder Joints', value="", key="no_of_solder_joints", disabled=False)
-                        thickness_of_solder = st.text_input('Solder Thick (mm)', value="0.6", key="thickness_of_solder", disabled=True)
-
-                        try:
-                            # Safely convert inputs to float
-                            outer_dia_of_pad = float(outer_dia_of_pad) if outer_dia_of_pad else 0.0
-                            inner_dia_of_pad = float(inner_dia_of_pad) if inner_dia_of_pad else 0.0
-                            no_of_solder_joints = float(no_of_solder_joints) if no_of_solder_joints else 0.0
-                            thickness_of_solder = float(thickness_of_solder) if thickness_of_solder else 0.0
-
-                            # Calculate the area of the annular ring
-                            area_of_ring = math.pi * ((outer_dia_of_pad/2)**2 - (inner_dia_of_pad/2)**2)
-
-                            # Calculate the volume of solder per joint - Circumferential Fill
-                            volume_of_solder_per_joint = area_of_ring * thickness_of_solder
-                            weight_of_Solder_per_joint = (volume_of_solder_per_joint/1000) * paste_specific_gravity
-                            weight_of_Solder_per_board = weight_of_Solder_per_joint * no_of_solder_joints
-
-                        except ValueError:
-                            st.error("Please enter valid numeric values for all inputs.")
-
-                        # Display the calculated value - Circumferential Fill
-                        st.text_input('Solder Vol(mm^3)', value=f"{volume_of_solder_per_joint:.2f}", key="volume_of_solder_per_joint", disabled=True) 
-                        st.text_input('Solder Wt/Joint(g)', value=f"{weight_of_Solder_per_joint:.2f}", key="weight_of_Solder_per_joint", disabled=True) 
-                        st.text_input('Solder Wt/Brd(g)', value=f"{weight_of_Solder_per_board:.2f}", key="weight_of_Solder_per_board", disabled=True) 
-
-                    with barrel1_col:
-                        st.subheader("")
-                        # Input Fields                  
-                        barrel_dia = st.text_input('Barrel Dia(mm)', value="", key="barrel_dia", disabled=False)
-                        board_thick = st.text_input('Board Thick(mm)', value="", key="board_thick", disabled=False)
-                        barrel_joints = st.text_input('Barrel Joints', value="", key="barrel_joints", disabled=False)
-
-                    solder_bar_cost_value = 2.064
-                    specific_gravity_of_solder = 7.3
-
-                    try:
-                        # Safely convert inputs to float
-                        barrel_dia = float(barrel_dia) if barrel_dia else 0.0
-                        board_thick = float(board_thick) if board_thick else 0.0
-                        barrel_joints = float(barrel_joints) if barrel_joints else 0.0
-                        # barrel_solder_thick = float(barrel_solder_thick) if barrel_solder_thick else 0.0
-                        solder_bar_cost_value = float(solder_bar_cost_value) if solder_bar_cost_value else 0.0
-
-                        # Calculate the volume of solder per joint - Barrel Fill
-
-                        # Calculate the Barrel Solder Vol
-                        lead_thickness = barrel_dia - 0.4 # as per Ather guidelines
-                                                
-                        comp_lead_volume_in_the_barrel = math.pi * (((barrel_dia/2) ** 2) - ((lead_thickness/2) ** 2)) * board_thick
-
-                        barrel_volume_without_lead = math.pi * ((barrel_dia/2) ** 2) * board_thick
-
-                        barrel_solder_vol = barrel_volume_without_lead - comp_lead_volume_in_the_barrel
-
-                        # Calculation of Barrel Solder Weight per Joint
-                        barrel_solder_wt_per_joint = (barrel_solder_vol / 1000) * specific_gravity_of_solder  # Convert mm³ to cm³
-
-                        # Calculation of Barrel Solder Weight per Board
-                        barrel_solder_wt_per_board = barrel_solder_wt_per_joint * barrel_joints
-
-                        circumferential_plus_barrel_fill_solder_wt = weight_of_Solder_per_board + barrel_solder_wt_per_board
-                        solderbar_cost_per_brd = circumferential_plus_barrel_fill_solder_wt * solder_bar_cost_value
-
-                    except ValueError:
-                        st.error("Please enter valid numeric values for all inputs.")
-
-                    with barrel1_col:
-                        # Display the calculated value - Barrel Fill
-                        st.text_input('Lead Thickness(mm)', value=f"{lead_thickness:.2f}", key="lead_thickness", disabled=True)
-                        st.text_input('Barrel Solder Vol(mm^3)', value=f"{barrel_solder_vol:.2f}", key="barrel_solder_vol", disabled=True) 
-                        st.text_input('Barrel Solder Wt/Joint(g)', value=f"{barrel_solder_wt_per_joint:.4f}", key="barrel_solder_wt_per_joint", disabled=True) 
-                        st.text_input('Barrel Solder Wt/Brd(g)', value=f"{barrel_solder_wt_per_board:.2f}", key="barrel_solder_wt_per_board", disabled=True) 
-                    with barrel2_col:  
-                        st.subheader("")                    
-                        st.text_input('Total Solder Wt(g)', value=f"{circumferential_plus_barrel_fill_solder_wt:.2f}", key="circumferential_plus_barrel_fill_solder_wt", disabled=True) 
-                        solder_bar_cost = st.text_input('Solder Bar Cost(₹/g)', value=solder_bar_cost_value, key="solder_bar_cost", disabled=True)
-                        st.text_input('Solder Bar Cost/Brd(₹)', value=f"{solderbar_cost_per_brd:.2f}", key="solderbar_cost_per_brd", disabled=True) 
-
-                    cost_consumables_value = (rtv_cost_per_board + top_side_cost_per_board_value + bot_side_cost_per_board_value + flux_cost_per_board_value + solderbar_cost_per_brd)
-
-
-                st.header("RM & Conversion Cost Summary")                
-                # Create one row with 4 columns for headings
-                input_cost_col, ohpandother_percentage_col, ohpandother_cost_col, placeholder2_col = st.columns(4)
-                
-                with input_cost_col:
-                    st.subheader("Input Cost")
-                    cost_pcb = st.text_input('PCB (₹)', value="", key="cost_pcb")
-                    cost_electronics_components = st.text_input('Electronics Component (₹)', value="", key="cost_electronics_components")
-                    cost_mech_components = st.text_input('Mechanical Component (₹)', value="", key="cost_mech_components")
-                    cost_nre = st.text_input('NRE (₹)', value=nre_per_unit, key="cost_nre", disabled=True)
-                    # cost_consumables_value = (rtv_cost_per_board + top_side_cost_per_board_value + bot_side_cost_per_board_value + flux_cost_per_board_value + solderbar_cost_per_brd)
-                    cost_consumables = st.text_input('Consumables (₹)', value=cost_consumables_value, key="cost_consumables", disabled=True)
-                    # Safely convert inputs to float
-                    try:
-                        cost_pcb = float(cost_pcb) if cost_pcb else 0.0
-                        cost_electronics_components = float(cost_electronics_components) if cost_electronics_components else 0.0
-                        cost_mech_components = float(cost_mech_components) if cost_mech_components else 0.0
-                        cost_nre = float(cost_nre) if cost_nre else 0.0
-                        cost_consumables = float(cost_consumables) if cost_consumables else 0.0
-                    except ValueError:
-                        st.error("Please enter valid numeric values for all cost fields.")
-                        cost_pcb = 0.0
-                        cost_electronics_components = 0.0
-                        cost_mech_components = 0.0
-                        cost_nre = 0.0
-                        cost_consumables = 0.0
-
-
-                with ohpandother_percentage_col:
-                    st.subheader("OHP% Model Vs. Ann. Volume", )
-                    # Define the predefined percentages as a dictionary
-                    percentages = {
-                        "<100K": {"MOH %": 1, "FOH %": 12.5, "Profit on RM %": 1.5, "Profit on VA %": 8, "R&D %": 1, "Warranty %": 1, "SG&A %": 3},
-                        ">100K": {"MOH %": 1, "FOH %": 12.5, "Profit on RM %": 1, "Profit on VA %": 8, "R&D %": 2, "Warranty %": 1, "SG&A %": 2},
-                        "5K/10K": {"MOH %": 1, "FOH %": 20, "Profit on RM %": 1, "Profit on VA %": 8, "R&D %": 3, "Warranty %": 1, "SG&A %": 4},
-                    }
-
-                    # Annual volume selection dropdown
-                    annual_volume = st.selectbox("Select Annual Volume", options=["<100K", ">100K", "5K/10K"])
-
-                    # Get the percentages for the selected annual volume
-                    selected_percentages = percentages.get(annual_volume, {})
-
-                    # Display the percentages dynamically in a single column
-                    st.subheader(f"Percentages for {annual_volume}")
-
-                    # Use st.columns to arrange the inputs in rows
-                    percentage_labels_grouped = [
-                        ["MOH %", "FOH %"],
-                        ["Profit on RM %", "Profit on VA %"],
-                        ["R&D %","Warranty %","SG&A %"],
-                    ]
-                    # Display percentage inputs dynamically in rows
-                    percentage_values = {}
-                    for row_labels in percentage_labels_grouped:
-                        cols = st.columns(len(row_labels))
-                        for i, label in enumerate(row_labels):
-                            # Fetch the value for this label from selected_percentages, default to ""
-                            value = selected_percentages.get(label, "")
-                            # Show the value in a disabled text input
-                            percentage_values[label] = cols[i].text_input(label, value=str(value), disabled=True)
-
-                    # Aggregate dummy data
-                    total_factory_overheads_batchsetup = sum(edited_data["Batch Set up Cost"])
-                    total_factory_overheads_vamachine = sum(edited_data["VA MC Cost"])
-                    total_factory_overheads_labour = sum(edited_data["Labour cost/Hr"])
-
-                    # Convert percentages to fractions and compute costs
-                    pcb_comp_mech_cost = cost_pcb + cost_electronics_components + cost_mech_components
-
-                    moh_cost_value = pcb_comp_mech_cost * (selected_percentages["MOH %"] / 100)
-                    foh_cost_value = (total_factory_overheads_batchsetup + total_factory_overheads_vamachine + total_factory_overheads_labour) * (selected_percentages["FOH %"] / 100)
-                    profit_on_rm_cost_value = pcb_comp_mech_cost * (selected_percentages["Profit on RM %"] / 100)
-                    profit_on_va_cost_value = (total_factory_overheads_batchsetup + total_factory_overheads_vamachine + total_factory_overheads_labour) * (selected_percentages["Profit on VA %"] / 100)
-
-                    total_material_cost_value = pcb_comp_mech_cost + nre_per_unit
-                    total_manufacturing_cost_value = total_factory_overheads_batchsetup + total_factory_overheads_vamachine + total_factory_overheads_labour
-                    total_ohp_cost_value = moh_cost_value + foh_cost_value + profit_on_rm_cost_value + profit_on_va_cost_value
-
-                    r_n_d_cost_value = (total_material_cost_value + total_manufacturing_cost_value) * (selected_percentages["R&D %"] / 100)
-                    warranty_cost_value = (total_material_cost_value + total_manufacturing_cost_value) * (selected_percentages["Warranty %"] / 100)
-                    sg_and_a_cost_value = (total_material_cost_value + total_manufacturing_cost_value) * (selected_percentages["SG&A %"] / 100)
-
-                with ohpandother_cost_col:
-                    st.subheader("Cost Computation")
-                    ohpandother_cost_col1, ohpandother_cost_col2 = st.columns(2)
-
-                    with ohpandother_cost_col1:
-                        st.text_input("MOH (₹)", value=f"{moh_cost_value:.2f}", disabled=True)
-                        st.text_input("Profit on RM (₹)", value=f"{profit_on_rm_cost_value:.2f}", disabled=True)
-                        st.text_input("Material Cost (₹)", value=f"{total_material_cost_value:.2f}", disabled=True)
-                        st.text_input("OH&P (₹)", value=f"{total_ohp_cost_value:.2f}", disabled=True)
-                        st.text_input("Warranty (₹)", value=f"{warranty_cost_value:.2f}", disabled=True)
-                    with ohpandother_cost_col2:
-                        st.text_input("FOH (₹)", value=f"{foh_cost_value:.2f}", disabled=True)
-                        st.text_input("Profit on VA (₹)", value=f"{profit_on_va_cost_value:.2f}", disabled=True)
-                        st.text_input("Manufacturing Cost (₹)", value=f"{total_manufacturing_cost_value:.2f}", disabled=True)
-                        st.text_input("R&D (₹)", value=f"{r_n_d_cost_value:.2f}", disabled=True)
-                        st.text_input("SG&A (₹)", value=f"{sg_and_a_cost_value:.2f}", disabled=True)
-
-                with placeholder2_col:
-                    st.subheader("Cost Summary")
-                    grand_total_cost_value = ((total_material_cost_value + total_manufacturing_cost_value) + moh_cost_value + 
-                                                    foh_cost_value + profit_on_rm_cost_value + profit_on_va_cost_value +
-                                                    r_n_d_cost_value + warranty_cost_value + sg_and_a_cost_value )
-                    st.text_input('Total Cost (₹)', value=grand_total_cost_value, disabled=True)
-
-                    rm_cost_value = total_material_cost_value
-                    st.text_input('RM Cost (₹)', value=rm_cost_value, disabled=True)
-
-                    conversion_cost_value = grand_total_cost_value - total_material_cost_value
-                    st.text_input('Conversion Cost (₹)', value=conversion_cost_value, disabled=True)
-
-                    if st.button("Save Consumable, RM & Conversion Costing Details"):
-                        if sheet_name in st.session_state.edited_sheets:
-                            # Retrieve the current edited_data
-                            current_data = st.session_state.edited_sheets[sheet_name].copy()
-
-                            # Add new columns if they don't exist
-                            columns_to_add = [
-                                'RTV Wt/Brd Est','RTV Wastage %','RTV Cost/ml','RTV SG','Wt per Board (Incl Wastage %)','RTV Cost Per Board', #RTV Glue section
-                                "Board Length(mm)","Board Width(mm)","Top Wt Estimate %","Top Wastage %","Solder Paste SG (g/cc)","Solder Paste Cost(₹/g)","Top SP Thick(mm)","Top SP Wt (100%)(g)", "Top SP Wt Estimate(g)","Top SP Cost/Brd(₹)", #Solder Paste - Top section
-                                "Bot Wt Estimate %","Bot Wastage %","Bot SP Thick(mm)","Bot SP Wt (100%)(g)","Bot SP Wt Estimate(g)","Bot SP Cost/Brd(₹)",  #Solder Paste - Bottom section
-                                "Flux Wastage %","Flux Cost(₹/ml)","Flux Area/Brd(mm^2)","Flux Spray Area(mm^2)","Flux Cost Per Board(₹)", #Flux Wave Soldering section
-                                "Pad OD (mm)","Pad ID (mm)","Solder Joints","Solder Thick (mm)","Solder Vol(mm^3)","Solder Wt/Joint(g)","Solder Wt/Brd(g)", # Circumferential Fill Solder Bar
-                                "Barrel Dia(mm)","Board Thick(mm)","Barrel Joints","Lead Thickness(mm)","Solder Bar Cost(₹/g)","Barrel Solder Vol(mm^3)","Barrel Solder Wt/Joint(g)","Barrel Solder Wt/Brd(g)","Solder Bar Cost(₹/g)","Total Solder Wt(g)","Solder Bar Cost/Brd(₹)", # Barrel Fill Solder Bar
-                                "PCB (₹)","Electronics Component (₹)","Mechanical Component (₹)","NRE (₹)","Consumables (₹)", #Input Cost section
-                                "Select Annual Volume","MOH %","FOH %","Profit on RM %","Profit on VA %","R&D %","Warranty %","SG&A %", #OHP% Model Vs. Ann. Volume section
-                                "MOH (₹)","Profit on RM (₹)","FOH (₹)","Profit on VA (₹)","Material Cost (₹)","Manufacturing Cost (₹)","OH&P (₹)","R&D (₹)","Warranty (₹)","SG&A (₹)", #Cost Computation section
-                                "Total Cost (₹)","RM Cost (₹)","Conversion Cost (₹)" # Cost Summary section
-                            ]
-                            for column in columns_to_add:
-                                if column not in current_data.columns:
-                                    current_data[column] = np.nan
-
-                            # Assign values to the first row of respective columns
-                            current_data.loc[0, 'RTV Wt/Brd Est'] = glue_wt_per_board
-                            current_data.loc[0, 'RTV Wastage %'] = wastage_percentage_per_board
-                            current_data.loc[0, 'RTV Cost/ml'] = rtv_glue_cost
-                            current_data.loc[0, 'RTV SG'] = rtv_specific_gravity
-                            current_data.loc[0, 'Wt per Board (Incl Wastage %)'] = wt_per_board_incl_wastage
-                            current_data.loc[0, 'RTV Cost Per Board'] = rtv_cost_per_board
-                            current_data.loc[0, "Board Length(mm)"] = board_length  
-                            current_data.loc[0, "Board Width(mm)"] = board_width  
-                            current_data.loc[0, "Top Wt Estimate %"] = top_weight_estimate_percentage
-                            current_data.loc[0, "Top Wastage %"] = top_sp_wastage_percentage
-                            current_data.loc[0, "Solder Paste SG (g/cc)"] = paste_specific_gravity
-                            current_data.loc[0, "Solder Paste Cost(₹/g)"] = cost_of_solder_paste
-                            current_data.loc[0, "Top SP Thick(mm)"] = solder_paste_thickness
-                            current_data.loc[0, "Top SP Wt (100%)(g)"] = weight_of_solder_paste_for_100percentage_wt_value
-                            current_data.loc[0, "Top SP Wt Estimate(g)"] = top_weight_of_solder_paste_for_wt_estimate_value
-                            current_data.loc[0, "Top SP Cost/Brd(₹)"] = top_side_cost_per_board_value
-                            current_data.loc[0, "Bot Wt Estimate %"] = bot_weight_estimate_percentage
-                            current_data.loc[0, "Bot Wastage %"] = bot_sp_wastage_percentage
-                            current_data.loc[0, "Bot SP Thick(mm)"] = bot_solder_paste_thickness
-                            current_data.loc[0, "Bot SP Wt (100%)(g)"] = bot_weight_of_solder_paste_for_100percentage_wt_value
-                            current_data.loc[0, "Bot SP Wt Estimate(g)"] = bot_weight_of_solder_paste_for_wt_estimate_value
-                            current_data.loc[0, "Bot SP Cost/Brd(₹)"] = bot_side_cost_per_board_value
-                            current_data.loc[0, "Flux Wastage %"] = flux_wastage_percentage
-                            current_data.loc[0, "Flux Cost(₹/ml)"] = flux_cost
-                            current_data.loc[0, "Flux Area/Brd(mm^2)"] = flux_board_area_value
-                            current_data.loc[0, "Flux Spray Area(mm^2)"] = flux_spread_area_value
-                            current_data.loc[0, "Flux Cost Per Board(₹)"] = flux_cost_per_board
-                            current_data.loc[0, "Pad OD (mm)"] = outer_dia_of_pad
-                            current_data.loc[0, "Pad ID (mm)"] = inner_dia_of_pad
-                            current_data.loc[0, "Solder Joints"] = no_of_solder_joints
-                            current_data.loc[0, "Solder Thick (mm)"] = thickness_of_solder
-                            current_data.loc[0, "Solder Vol(mm^3)"] = volume_of_solder_per_joint
-                            current_data.loc[0, "Solder Wt/Joint(g)"] = weight_of_Solder_per_joint
-                            current_data.loc[0, "Solder Wt/Brd(g)"] = weight_of_Solder_per_board
-                            current_data.loc[0, "Barrel Dia(mm)"] = barrel_dia
-                            current_data.loc[0, "Board Thick(mm)"] = board_thick
-                            current_data.loc[0, "Barrel Joints"] = barrel_joints
-                            current_data.loc[0, "Lead Thickness(mm)"] = lead_thickness
-                            current_data.loc[0, "Solder Bar Cost(₹/g)"] = solder_bar_cost_value
-                            current_data.loc[0, "Barrel Solder Vol(mm^3)"] = barrel_solder_vol
-                            current_data.loc[0, "Barrel Solder Wt/Joint(g)"] = barrel_solder_wt_per_joint
-                            current_data.loc[0, "Barrel Solder Wt/Brd(g)"] = barrel_solder_wt_per_board
-                            current_data.loc[0, "Solder Bar Cost(₹/g)"] = solder_bar_cost
-                            current_data.loc[0, "Total Solder Wt(g)"] = circumferential_plus_barrel_fill_solder_wt
-                            current_data.loc[0, "Solder Bar Cost/Brd(₹)"] = solderbar_cost_per_brd
-                            current_data.loc[0, "PCB (₹)"] = cost_pcb
-                            current_data.loc[0, "Electronics Component (₹)"] = cost_electronics_components
-                            current_data.loc[0, "Mechanical Component (₹)"] = cost_mech_components
-                            current_data.loc[0, "NRE (₹)"] = cost_nre
-                            current_data.loc[0, "Consumables (₹)"] = cost_consumables
-                            current_data.loc[0, "Select Annual Volume"] = annual_volume
-
-                            # Update the values in `edited_data` (current_data) for these headers
-                            for label, value in percentage_values.items():
-                                try:
-                                    # Convert value to float and update the data
-                                    current_data.loc[0, label] = float(value)
-                                except ValueError:
-                                    st.warning(f"Invalid value for {label}. Please check the input.")
-
-                            current_data.loc[0, "MOH (₹)"] = moh_cost_value
-                            current_data.loc[0, "FOH (₹)"] = foh_cost_value
-                            current_data.loc[0, "Profit on RM (₹)"] = profit_on_rm_cost_value
-                            current_data.loc[0, "Profit on VA (₹)"] = profit_on_va_cost_value
-                            current_data.loc[0, "Material Cost (₹)"] = total_material_cost_value
-                            current_data.loc[0, "Manufacturing Cost (₹)"] = total_manufacturing_cost_value
-                            current_data.loc[0, "OH&P (₹)"] = total_ohp_cost_value
-                            current_data.loc[0, "R&D (₹)"] = r_n_d_cost_value
-                            current_data.loc[0, "Warranty (₹)"] = warranty_cost_value
-                            current_data.loc[0, "SG&A (₹)"] = sg_and_a_cost_value
-                            current_data.loc[0, "Total Cost (₹)"] = grand_total_cost_value
-                            current_data.loc[0, "RM Cost (₹)"] = rm_cost_value
-                            current_data.loc[0, "Conversion Cost (₹)"] = conversion_cost_value
-
-                        if sheet_name:  # Check if the sheet_name is not empty
-                            # Update the session state
-                            st.session_state.edited_sheets[sheet_name] = current_data
-                            st.success("Consumable, RM & Conversion Costing Details saved successfully.")
-                        else:
-                            st.error("No data available to save Consumable, RM & Conversion Costing Details.")
+                # The cost chain is memoized across reruns: a widget change only re-evaluates the nodes that depend on it
+                if 'cost_models' not in st.session_state:
+                    st.session_state.cost_models = {}
+                cost_model = st.session_state.cost_models.setdefault('New', CostModel())
+                cost_chain_section(cost_model, sheet_name, edited_data, nre_per_unit)
                 
                 # Update the data editor with the latest data
                 edited_data2 = st.session_state.edited_sheets.get(sheet_name, pd.DataFrame())
@@ -879,7 +676,7 @@ if new_analysis:
 
                 # Data for the pie chart
                 labels = ['RM Cost', 'Conversion Cost']
-                values = [rm_cost_value, conversion_cost_value]
+                values = [cost_model['RM Cost (₹)'], cost_model['Conversion Cost (₹)']]
 
                 # Create the pie chart
                 fig = go.Figure(data=[go.Pie(labels=labels, values=values, hole=0.4)])
@@ -910,13 +707,13 @@ if new_analysis:
                         "Total Cost (₹)"
                     ],
                     "Amount": [
-                        total_material_cost_value,
-                        total_manufacturing_cost_value,
-                        total_ohp_cost_value,
-                        r_n_d_cost_value,
-                        warranty_cost_value,
-                        sg_and_a_cost_value,
-                        grand_total_cost_value
+                        cost_model['Material Cost (₹)'],
+                        cost_model['Manufacturing Cost (₹)'],
+                        cost_model['OH&P (₹)'],
+                        cost_model['R&D (₹)'],
+                        cost_model['Warranty (₹)'],
+                        cost_model['SG&A (₹)'],
+                        cost_model['Total Cost (₹)']
                     ]
                 }
 
@@ -945,6 +742,124 @@ if new_analysis:
                 with graph_col1:
                     st.plotly_chart(fig)
 
+                # Sweep mode: Total Cost over a grid of annual volume x product life x labour rate x OHP tier
+                with st.expander("Cost Sweep (price-volume curves)"):
+                    st.write("PCB, component and NRE inputs above are kept; the process map totals are re-costed at every grid point.")
+                    base_labour_rate = float(df4.loc[0, 'Labour cost/Hr'])
+
+                    sweep_col1, sweep_col2, sweep_col3, sweep_col4 = st.columns(4)
+                    with sweep_col1:
+                        sweep_volume_min = st.number_input("Min Annual Volume", min_value=1.0, value=max(annual_volume / 10, 1000.0), step=1000.0, format="%g")
+                        sweep_volume_max = st.number_input("Max Annual Volume", min_value=1.0, value=max(annual_volume * 10, 1000000.0), step=1000.0, format="%g")
+                        sweep_volume_points = st.number_input("Volume points", min_value=2, max_value=2000, value=200, step=10)
+                    with sweep_col2:
+                        sweep_lives = st.multiselect("Product Life (years)", options=list(range(1, 16)), default=list(range(1, 11)))
+                    with sweep_col3:
+                        sweep_labour_min = st.number_input("Min Labour cost/Hr", min_value=0.0, value=base_labour_rate * 0.5, format="%g")
+                        sweep_labour_max = st.number_input("Max Labour cost/Hr", min_value=0.0, value=base_labour_rate * 1.5, format="%g")
+                        sweep_labour_points = st.number_input("Labour rate points", min_value=1, max_value=200, value=25, step=1)
+                    with sweep_col4:
+                        sweep_tiers = st.multiselect("OHP Tiers", options=list(VOLUME_TIERS), default=list(VOLUME_TIERS))
+                        target_price = st.number_input("Target Price (₹)", min_value=0.0, value=float(round(cost_model['Total Cost (₹)'], 2)), format="%g")
+
+                    if not sweep_lives or not sweep_tiers or sweep_volume_max <= sweep_volume_min:
+                        st.warning("Select at least one product life and OHP tier, and a volume range with Max above Min")
+                    else:
+                        # Volumes on a log scale: the cost curve bends hardest at low volume
+                        sweep_volumes = np.geomspace(sweep_volume_min, sweep_volume_max, int(sweep_volume_points))
+                        sweep_labour_rates = np.linspace(sweep_labour_min, sweep_labour_max, int(sweep_labour_points))
+                        selected_nre = st.session_state['filtered_data']
+                        sweep_result = sweep_total_cost(
+                            edited_data, sweep_volumes, sorted(sweep_lives), sweep_labour_rates,
+                            idl_cost_hr=float(df4.loc[0, 'Idl Cost/Hr']),
+                            rm_cost=cost_model['PCB & Component Cost (₹)'],
+                            tiers=sweep_tiers,
+                            nre_unit_prices=pd.to_numeric(selected_nre['Unit Price (₹)'], errors='coerce').to_numpy(dtype=float),
+                            nre_life_cycles=pd.to_numeric(selected_nre['Life Cycle (Boards)'], errors='coerce').to_numpy(dtype=float),
+                            tool_maintenance_rate=tool_maintenance_rate_value,
+                        )
+                        st.write(f"Evaluated {sweep_result['total'].size:,} grid points")
+
+                        view_col1, view_col2 = st.columns(2)
+                        with view_col1:
+                            view_labour = st.select_slider("Labour cost/Hr to display", options=[round(rate, 2) for rate in sweep_labour_rates],
+                                                           value=round(sweep_labour_rates[np.abs(sweep_labour_rates - base_labour_rate).argmin()], 2))
+                        with view_col2:
+                            view_tier = st.selectbox("OHP Tier to display", sweep_tiers)
+                        labour_index = int(np.abs(sweep_labour_rates - view_labour).argmin())
+                        tier_index = sweep_tiers.index(view_tier)
+
+                        # Cost surface: Total Cost over annual volume x product life
+                        fig_surface = go.Figure(data=[go.Surface(
+                            x=sweep_result["annual_volumes"], y=sweep_result["product_lives"],
+                            z=sweep_result["total"][:, :, labour_index, tier_index].T, colorscale="Viridis",
+                        )])
+                        fig_surface.update_layout(
+                            title="Total Cost Surface",
+                            scene=dict(xaxis=dict(title="Annual Volume", type="log"), yaxis_title="Product Life", zaxis_title="Total Cost (₹)"),
+                            height=600, margin=dict(t=50, b=50, l=50, r=50),
+                        )
+
+                        # Price-volume curves per product life, with the break-even volume at the target price
+                        curve_df = pd.DataFrame(
+                            sweep_result["total"][:, :, labour_index, tier_index],
+                            index=pd.Index(sweep_result["annual_volumes"], name="Annual Volume"),
+                            columns=[f"{life:g} yr" for life in sweep_result["product_lives"]],
+                        ).reset_index().melt(id_vars="Annual Volume", var_name="Product Life", value_name="Total Cost (₹)")
+                        fig_curve = px.line(curve_df, x="Annual Volume", y="Total Cost (₹)", color="Product Life", log_x=True, title="Price-Volume Curves")
+                        fig_curve.add_hline(y=target_price, line_dash="dash", annotation_text="Target Price")
+
+                        surface_col, curve_col = st.columns(2)
+                        with surface_col:
+                            st.plotly_chart(fig_surface, use_container_width=True)
+                        with curve_col:
+                            st.plotly_chart(fig_curve, use_container_width=True)
+
+                        # Break-even curve: smallest annual volume that meets the target price, by product life
+                        break_even_df = break_even_volumes(sweep_result, target_price)
+                        break_even_view = break_even_df[np.isclose(break_even_df["Labour cost/Hr"], sweep_labour_rates[labour_index])]
+                        fig_break_even = px.line(break_even_view, x="Product Life", y="Break-even Annual Volume", color="OHP Tier", markers=True,
+                                                 title=f"Break-even Annual Volume at ₹{target_price:g}")
+                        st.plotly_chart(fig_break_even, use_container_width=True)
+                        if break_even_view["Break-even Annual Volume"].isna().any():
+                            st.info("Missing points: the total cost stays above the target price over the whole volume range")
+
+                        st.download_button(
+                            label="Download sweep (CSV)",
+                            data=sweep_frame(sweep_result).to_csv(index=False),
+                            file_name="cost_sweep.csv",
+                            mime="text/csv",
+                        )
+
+                # Batch mode: cost every process-mapping sheet of the workbook against MMR-EMS in one stacked pass
+                with st.expander("Conversion Cost of All Process Mapping Variants"):
+                    st.write("Each sheet is costed with the rates, annual volume, input cost and OHP tier used above.")
+                    variant_summary = None
+                    if st.button("Cost All Variants"):
+                        try:
+                            variant_summary, variant_stages = variant_costs(
+                                df6, df3, df4.loc[0, 'Labour cost/Hr'], df4.loc[0, 'Idl Cost/Hr'], annual_volume,
+                                cost_inputs={name: cost_model[name] for name in ['PCB (₹)', 'Electronics Component (₹)', 'Mechanical Component (₹)', 'NRE (₹)', 'Select Annual Volume']},
+                            )
+                        except Exception as e:
+                            st.error(f"Error costing the process mapping variants: {e}")
+                    if variant_summary is not None:
+                        st.dataframe(variant_summary, use_container_width=True)
+
+                        costed = variant_summary.dropna(subset=["Manufacturing Cost (₹)"])
+                        fig_variants = px.bar(costed, x="Variant", y=COST_COLUMNS, title="Manufacturing Cost by Variant")
+                        fig_variants.update_layout(yaxis_title="Cost (₹)", legend_title="Cost Component")
+                        st.plotly_chart(fig_variants, use_container_width=True)
+
+                        variant_output = io.BytesIO()
+                        write_sheets({'Variant Summary': variant_summary, 'Variant Stages': variant_stages}, variant_output)
+                        st.download_button(
+                            label="Download variant costing (Excel)",
+                            data=variant_output.getvalue(),
+                            file_name="variant_conversion_cost.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        )
+
 
 # Example to show how the existing_analysis would be implemented
 if existing_analysis:
@@ -957,20 +872,12 @@ if existing_analysis:
         uploaded_file = st.file_uploader("Choose NRE Costing Excel/CSV/XLSM file", type=["xlsx", "csv", "xlsm"])
 
         if uploaded_file:
-            # Load data from the uploaded file
-            @st.cache_data
-            def load_data(file):
-                if file.name.endswith('.csv'):
-                    df = pd.read_csv(file)
-                else:
-                    df = pd.read_excel(file, sheet_name=None)
-                return df
-
+            # Load data from the uploaded file (parsed sheets are cached on disk by file hash)
             df7 = load_data(uploaded_file)  # Load the Process Mapping data
 
             # Initialize session state to store edited data for each sheet
             if 'edited_sheets' not in st.session_state:
-                st.session_state.edited_sheets = {}
+                st.session_state.edited_sheets = SheetEdits()
 
             processmapping_col1, _ = st.columns(2)
 
@@ -992,20 +899,12 @@ if existing_analysis:
         uploaded_file = st.file_uploader("Choose Should Costing Excel/CSV/XLSM file", type=["xlsx", "csv", "xlsm"])
 
         if uploaded_file:
-            # Load data from the uploaded file
-            @st.cache_data
-            def load_data(file):
-                if file.name.endswith('.csv'):
-                    df = pd.read_csv(file)
-                else:
-                    df = pd.read_excel(file, sheet_name=None)
-                return df
-
+            # Load data from the uploaded file (parsed sheets are cached on disk by file hash)
             df8 = load_data(uploaded_file)  # Load the Process Mapping data
 
             # Initialize session state to store edited data for each sheet
             if 'edited_sheets' not in st.session_state:
-                st.session_state.edited_sheets = {}
+                st.session_state.edited_sheets = SheetEdits()
 
             processmapping_col2, _ = st.columns(2)
 
@@ -1023,499 +922,13 @@ if existing_analysis:
         st.data_editor(selected_data, key=f"data_editor_{sheet_name}_shc_updated")
     st.session_state.edited_sheets[sheet_name] = selected_data
 
-    st.header("Consumable Costing")
-    
-
-    # Create one row with 4 columns for headings
-    rtv_col, solder_top_col, solder_bar_col = st.columns(3)
-
-    # RTV Glue
-    with rtv_col:
-        st.subheader("RTV Glue")
-        rtv_1_col, rtv_2_col = st.columns(2)
-        with rtv_1_col:
-        # Input Fields
-            glue_wt_per_board = st.text_input('RTV Wt/Brd Est', value="", key="glue_wt_per_board")
-            rtv_glue_cost = st.text_input('RTV Cost/ml', value="4.472", key="rtv_glue_cost", disabled=True)
-        
-        with rtv_2_col:
-            wastage_percentage_per_board = st.text_input('RTV Wastage %', value="", key="wastage_percentage_per_board")
-            rtv_specific_gravity = st.text_input('RTV SG', value="1.09", key="rtv_specific_gravity", disabled=True)
-
-        # Initialize the output variables
-        wt_per_board_incl_wastage = 0.0
-        rtv_cost_per_board = 0.0
-
-        try:
-            # Safely convert inputs to float
-            glue_wt_per_board = float(glue_wt_per_board) if glue_wt_per_board else 0.0
-            wastage_percentage_per_board = float(wastage_percentage_per_board) if wastage_percentage_per_board else 0.0
-            rtv_glue_cost = float(rtv_glue_cost) if rtv_glue_cost else 0.0
-            rtv_specific_gravity = float(rtv_specific_gravity) if rtv_specific_gravity else 0.0
-
-            # Calculate wt_per_board_incl_wastage
-            wt_per_board_incl_wastage = (
-                (glue_wt_per_board * rtv_specific_gravity) * (1 + (wastage_percentage_per_board / 100))
-            )
-
-            # Calculate rtv_cost_per_board
-            rtv_cost_per_board = wt_per_board_incl_wastage * rtv_glue_cost
-
-        except ValueError:
-            st.error("Please enter valid numeric values for all inputs.")
-
-        # Display results
-        with rtv_1_col:
-            st.text_input('RTV Wt/Brd', value=f"{wt_per_board_incl_wastage:.2f}", key="wt_per_board_incl_wastage", disabled=True)
-        # with rtv_2_col:
-        st.text_input('RTV Cost Per Board', value=f"{rtv_cost_per_board:.2f}", key="rtv_cost_per_board", disabled=True)
-
-    # Solder Paste - Top
-    with solder_top_col:
-        st.subheader("Solder Paste - Top & Bot")
-        # Board dimensions (Board Length and Board Width in the same line)
-        board_dim_col1, board_dim_col2 = st.columns(2)
-        with board_dim_col1:
-            board_length = st.text_input('Board Length(mm)', value="", key="board_length")
-        with board_dim_col2:
-            # st.write("Solder Paste - Bot")
-            board_width = st.text_input('Board Width(mm)', value="", key="board_width")
-
-        sp_sg_col, sp_cost_col = st.columns(2)
-        with sp_sg_col:
-            paste_specific_gravity = st.text_input('Solder Paste SG (g/cc)', value="7.31", key="paste_specific_gravity", disabled=True)
-        with sp_cost_col:
-            cost_of_solder_paste = st.text_input('Solder Paste Cost(₹/g)', value="5.59", key="cost_of_solder_paste", disabled=True)
-
-        sp_top_col1, sp_bot_col2 = st.columns(2)
-        with sp_top_col1:
-            top_weight_estimate_percentage = st.text_input('Top Wt Estimate %', value="", key="top_weight_estimate_percentage")
-            top_sp_wastage_percentage = st.text_input('Top Wastage %', value="", key="top_sp_wastage_percentage")
-            solder_paste_thickness = st.text_input('Top SP Thick(mm)', value="", key="solder_paste_thickness")
-
-        try:
-            # Safely convert inputs to float
-            board_length = float(board_length) if board_length else 0.0
-            board_width = float(board_width) if board_width else 0.0
-            top_weight_estimate_percentage = float(top_weight_estimate_percentage) if top_weight_estimate_percentage else 0.0
-            top_sp_wastage_percentage = float(top_sp_wastage_percentage) if top_sp_wastage_percentage else 0.0
-            paste_specific_gravity = float(paste_specific_gravity) if paste_specific_gravity else 7.31
-            cost_of_solder_paste = float(cost_of_solder_paste) if cost_of_solder_paste else 5.59
-            solder_paste_thickness = float(solder_paste_thickness) if solder_paste_thickness else 0.0
-
-            # Calculate weight_of_solder_paste_for_100percentage_wt
-            weight_of_solder_paste_for_100percentage_wt_value = (
-                (board_length * board_width * solder_paste_thickness * paste_specific_gravity) / 1000
-            )
-
-            # Convert percentages to fractions
-            top_weight_estimate_percentage /= 100
-            top_sp_wastage_percentage /= 100
-
-            # Calculate top_solder_paste_weight_estimate
-            top_weight_of_solder_paste_for_wt_estimate_value = (
-                weight_of_solder_paste_for_100percentage_wt_value
-                * top_weight_estimate_percentage
-                * (1 + top_sp_wastage_percentage)
-            )
-
-            # Calculate top_side_cost_per_board
-            top_side_cost_per_board_value = top_weight_of_solder_paste_for_wt_estimate_value * cost_of_solder_paste
-
-        except ValueError:
-            st.error("Please enter valid numeric values for all inputs.")
-        with sp_top_col1:
-            # Display results
-            st.text_input('Top SP Wt (100%)(g)', value=f"{weight_of_solder_paste_for_100percentage_wt_value:.2f}", key="weight_of_solder_paste_for_100percentage_wt", disabled=True)
-            st.text_input('Top SP Wt Estimate(g)', value=f"{top_weight_of_solder_paste_for_wt_estimate_value:.2f}", key="top_solder_paste_weight_estimate", disabled=True)
-            st.text_input('Top SP Cost/Brd(₹)', value=f"{top_side_cost_per_board_value:.2f}", key="top_side_cost_per_board", disabled=True)                # Solder Paste - Bottom
-
-
-    # Solder Paste - Bottom
-    # with solder_bottom_col:
-    with solder_top_col:
-        # st.subheader("Solder Paste - Bottom")
-        # Input Fields
-        with sp_bot_col2:
-            bot_weight_estimate_percentage = st.text_input('Bot Wt Estimate %', value="", key="bot_weight_estimate_percentage")
-            bot_sp_wastage_percentage = st.text_input('Bot Wastage %', value="", key="bot_sp_wastage_percentage")
-            bot_solder_paste_thickness = st.text_input('Bot SP Thick(mm)', value="", key="bot_solder_paste_thickness")
-
-        try:
-            # Safely convert inputs to float
-            bot_weight_estimate_percentage = float(bot_weight_estimate_percentage) if bot_weight_estimate_percentage else 0.0
-            bot_sp_wastage_percentage = float(bot_sp_wastage_percentage) if bot_sp_wastage_percentage else 0.0
-            bot_solder_paste_thickness = float(bot_solder_paste_thickness) if bot_solder_paste_thickness else 0.0
-
-            # Calculate weight_of_solder_paste_for_100percentage_wt
-            bot_weight_of_solder_paste_for_100percentage_wt_value = (
-                (board_length * board_width * bot_solder_paste_thickness * paste_specific_gravity) / 1000
-            )
-
-            # Convert percentages to fractions
-            bot_weight_estimate_percentage /= 100
-            bot_sp_wastage_percentage /= 100
-
-            # Compute bot_weight_of_solder_paste_for_wt_estimate_value
-            bot_weight_of_solder_paste_for_wt_estimate_value = (
-                bot_weight_of_solder_paste_for_100percentage_wt_value
-                * bot_weight_estimate_percentage
-                * (1 + bot_sp_wastage_percentage)
-            )
-
-            # Compute bot_side_cost_per_board
-            bot_side_cost_per_board_value = bot_weight_of_solder_paste_for_wt_estimate_value * cost_of_solder_paste
-
-        except ValueError:
-            st.error("Please enter valid numeric values for all inputs.")
-        with sp_bot_col2:
-            # Display results
-            st.text_input('Bot SP Wt (100%)(g)', value=f"{bot_weight_of_solder_paste_for_100percentage_wt_value:.2f}", key="bot_weight_of_solder_paste_for_100percentage_wt_value", disabled=True)
-            st.text_input('Bot SP Wt Estimate(g)', value=f"{bot_weight_of_solder_paste_for_wt_estimate_value:.2f}", key="bot_solder_paste_weight_estimate", disabled=True)
-            st.text_input('Bot SP Cost/Brd(₹)', value=f"{bot_side_cost_per_board_value:.2f}", key="bot_side_cost_per_board", disabled=True)
+    nre_per_unit = nre_selected_data.at[0, "NRE Per Unit (₹)"]
 
-    # Flux Wave Soldering
-    with rtv_col:
-        st.subheader("Flux Wave Soldering")
-        rtv_3_col, rtv_4_col = st.columns(2)
-
-        # Input Fields
-        with rtv_3_col:
-            flux_wastage_percentage = st.text_input('Flux Wastage %', value="", key="flux_wastage_percentage")
-        with rtv_4_col:
-            flux_cost = st.text_input('Flux Cost(₹/ml)', value="0.473", key="flux_cost", disabled=True)
-
-        try:
-            # Safely convert inputs to float
-            flux_wastage_percentage = float(flux_wastage_percentage) if flux_wastage_percentage else 0.0
-            flux_cost = float(flux_cost) if flux_cost else 0.473
-
-            # Compute flux_board_area
-            flux_board_area_value = board_length * board_width
-
-            # Convert percentage to fraction
-            flux_wastage_percentage /= 100
-
-            # Compute flux_spread_area
-            flux_spread_area_value = ((flux_board_area_value / 100) * 0.1) * (1 + flux_wastage_percentage)
-
-        except ValueError:
-            st.error("Please enter valid numeric values for all inputs.")
-
-        # Display results
-        with rtv_3_col:
-            st.text_input('Flux Area/Brd(mm^2)', value=f"{flux_board_area_value:.2f}", key="flux_board_area", disabled=True)
-        with rtv_4_col:
-            st.text_input('Flux Spray Area(mm^2)', value=f"{flux_spread_area_value:.2f}", key="flux_spread_area", disabled=True)
-        flux_cost_per_board_value = flux_spread_area_value * flux_cost
-        flux_cost_per_board = st.text_input('Flux Cost Per Board(₹)', value=flux_cost_per_board_value, key="flux_cost_per_board", disabled=True)
-
-    # Solder bar
-    with solder_bar_col:
-        circumferential_col, barrel1_col, barrel2_col = st.columns(3)
-        with circumferential_col:
-            st.subheader("Solder Bar")
-            # Input Fields
-            outer_dia_of_pad = st.text_input('Pad OD (mm)', value="", key="outer_dia_of_pad", disabled=False)
-            inner_dia_of_pad = st.text_input('Pad ID (mm)', value="", key="inner_dia_of_pad", disabled=False)
-            no_of_solder_joints = st.text_input('Solder Joints', value="", key="no_of_solder_joints", disabled=False)
-            thickness_of_solder = st.text_input('Solder Thick (mm)', value="0.6", key="thickness_of_solder", disabled=True)
-
-            try:
-                # Safely convert inputs to float
-                outer_dia_of_pad = float(outer_dia_of_pad) if outer_dia_of_pad else 0.0
-                inner_dia_of_pad = float(inner_dia_of_pad) if inner_dia_of_pad else 0.0
-                no_of_solder_joints = float(no_of_solder_joints) if no_of_solder_joints else 0.0
-                thickness_of_solder = float(thickness_of_solder) if thickness_of_solder else 0.0
-
-                # Calculate the area of the annular ring
-                area_of_ring = math.pi * ((outer_dia_of_pad/2)**2 - (inner_dia_of_pad/2)**2)
-
-                # Calculate the volume of solder per joint - Circumferential Fill
-                volume_of_solder_per_joint = area_of_ring * thickness_of_solder
-                weight_of_Solder_per_joint = (volume_of_solder_per_joint/1000) * paste_specific_gravity
-                weight_of_Solder_per_board = weight_of_Solder_per_joint * no_of_solder_joints
-
-            except ValueError:
-                st.error("Please enter valid numeric values for all inputs.")
-
-            # Display the calculated value - Circumferential Fill
-            st.text_input('Solder Vol(mm^3)', value=f"{volume_of_solder_per_joint:.2f}", key="volume_of_solder_per_joint", disabled=True) 
-            st.text_input('Solder Wt/Joint(g)', value=f"{weight_of_Solder_per_joint:.2f}", key="weight_of_Solder_per_joint", disabled=True) 
-            st.text_input('Solder Wt/Brd(g)', value=f"{weight_of_Solder_per_board:.2f}", key="weight_of_Solder_per_board", disabled=True) 
-
-        with barrel1_col:
-            st.subheader("")
-            # Input Fields                  
-            barrel_dia = st.text_input('Barrel Dia(mm)', value="", key="barrel_dia", disabled=False)
-            board_thick = st.text_input('Board Thick(mm)', value="", key="board_thick", disabled=False)
-            barrel_joints = st.text_input('Barrel Joints', value="", key="barrel_joints", disabled=False)
-
-        solder_bar_cost_value = 2.064
-        specific_gravity_of_solder = 7.3
-
-        try:
-            # Safely convert inputs to float
-            barrel_dia = float(barrel_dia) if barrel_dia else 0.0
-            board_thick = float(board_thick) if board_thick else 0.0
-            barrel_joints = float(barrel_joints) if barrel_joints else 0.0
-            # barrel_solder_thick = float(barrel_solder_thick) if barrel_solder_thick else 0.0
-            solder_bar_cost_value = float(solder_bar_cost_value) if solder_bar_cost_value else 0.0
-
-            # Calculate the volume of solder per joint - Barrel Fill
-
-            # Calculate the Barrel Solder Vol
-            lead_thickness = barrel_dia - 0.4 # as per Ather guidelines
-                                    
-            comp_lead_volume_in_the_barrel = math.pi * ((((barrel_dia/2) ** 2) - ((lead_thickness/2) ** 2)) * board_thick)
-
-            barrel_volume_without_lead = math.pi * ((barrel_dia/2) ** 2) * board_thick
-
-            barrel_solder_vol = barrel_volume_without_lead - comp_lead_volume_in_the_barrel
-
-            # Calculation of Barrel Solder Weight per Joint
-            barrel_solder_wt_per_joint = (barrel_solder_vol / 1000) * specific_gravity_of_solder  # Convert mm³ to cm³
-
-            # Calculation of Barrel Solder Weight per Board
-            barrel_solder_wt_per_board = barrel_solder_wt_per_joint * barrel_joints
-
-            circumferential_plus_barrel_fill_solder_wt = weight_of_Solder_per_board + barrel_solder_wt_per_board
-            solderbar_cost_per_brd = circumferential_plus_barrel_fill_solder_wt * solder_bar_cost_value
-
-        except ValueError:
-            st.error("Please enter valid numeric values for all inputs.")
-
-        with barrel1_col:
-            # Display the calculated value - Barrel Fill
-            st.text_input('Lead Thickness(mm)', value=f"{lead_thickness:.2f}", key="lead_thickness", disabled=True)
-            st.text_input('Barrel Solder Vol(mm^3)', value=f"{barrel_solder_vol:.2f}", key="barrel_solder_vol", disabled=True) 
-            st.text_input('Barrel Solder Wt/Joint(g)', value=f"{barrel_solder_wt_per_joint:.4f}", key="barrel_solder_wt_per_joint", disabled=True) 
-            st.text_input('Barrel Solder Wt/Brd(g)', value=f"{barrel_solder_wt_per_board:.2f}", key="barrel_solder_wt_per_board", disabled=True) 
-        with barrel2_col:  
-            st.subheader("")                    
-            st.text_input('Total Solder Wt(g)', value=f"{circumferential_plus_barrel_fill_solder_wt:.2f}", key="circumferential_plus_barrel_fill_solder_wt", disabled=True) 
-            solder_bar_cost = st.text_input('Solder Bar Cost(₹/g)', value=solder_bar_cost_value, key="solder_bar_cost", disabled=True)
-            st.text_input('Solder Bar Cost/Brd(₹)', value=f"{solderbar_cost_per_brd:.2f}", key="solderbar_cost_per_brd", disabled=True) 
-
-        nre_per_unit = nre_selected_data.at[0, "NRE Per Unit (₹)"]
-
-
-    st.header("RM & Conversion Cost Summary")                
-    # Create one row with 4 columns for headings
-    input_cost_col, ohpandother_percentage_col, ohpandother_cost_col, placeholder2_col = st.columns(4)
-    
-    with input_cost_col:
-        st.subheader("Input Cost")
-        cost_pcb = st.text_input('PCB (₹)', value="", key="cost_pcb")
-        cost_electronics_components = st.text_input('Electronics Component (₹)', value="", key="cost_electronics_components")
-        cost_mech_components = st.text_input('Mechanical Component (₹)', value="", key="cost_mech_components")
-        cost_nre = st.text_input('NRE (₹)', value=nre_per_unit, key="cost_nre", disabled=True)
-        cost_consumables_value = (rtv_cost_per_board + top_side_cost_per_board_value + bot_side_cost_per_board_value + flux_cost_per_board_value)
-        cost_consumables = st.text_input('Consumables (₹)', value=cost_consumables_value, key="cost_consumables", disabled=True)
-        # Safely convert inputs to float
-        try:
-            cost_pcb = float(cost_pcb) if cost_pcb else 0.0
-            cost_electronics_components = float(cost_electronics_components) if cost_electronics_components else 0.0
-            cost_mech_components = float(cost_mech_components) if cost_mech_components else 0.0
-            cost_nre = float(cost_nre) if cost_nre else 0.0
-            cost_consumables = float(cost_consumables) if cost_consumables else 0.0
-        except ValueError:
-            st.error("Please enter valid numeric values for all cost fields.")
-            cost_pcb = 0.0
-            cost_electronics_components = 0.0
-            cost_mech_components = 0.0
-            cost_nre = 0.0
-            cost_consumables = 0.0
-
-
-    with ohpandother_percentage_col:
-        st.subheader("OHP% Model Vs. Ann. Volume", )
-        # Define the predefined percentages as a dictionary
-        percentages = {
-            "<100K": {"MOH %": 1, "FOH %": 12.5, "Profit on RM %": 1.5, "Profit on VA %": 8, "R&D %": 1, "Warranty %": 1, "SG&A %": 3},
-            ">100K": {"MOH %": 1, "FOH %": 12.5, "Profit on RM %": 1, "Profit on VA %": 8, "R&D %": 2, "Warranty %": 1, "SG&A %": 2},
-            "5K/10K": {"MOH %": 1, "FOH %": 20, "Profit on RM %": 1, "Profit on VA %": 8, "R&D %": 3, "Warranty %": 1, "SG&A %": 4},
-        }
-
-        # Annual volume selection dropdown
-        annual_volume = st.selectbox("Select Annual Volume", options=["<100K", ">100K", "5K/10K"])
-
-        # Get the percentages for the selected annual volume
-        selected_percentages = percentages.get(annual_volume, {})
-
-        # Display the percentages dynamically in a single column
-        st.subheader(f"Percentages for {annual_volume}")
-
-        # Use st.columns to arrange the inputs in rows
-        percentage_labels_grouped = [
-            ["MOH %", "FOH %"],
-            ["Profit on RM %", "Profit on VA %"],
-            ["R&D %","Warranty %","SG&A %"],
-        ]
-        # Display percentage inputs dynamically in rows
-        percentage_values = {}
-        for row_labels in percentage_labels_grouped:
-            cols = st.columns(len(row_labels))
-            for i, label in enumerate(row_labels):
-                # Fetch the value for this label from selected_percentages, default to ""
-                value = selected_percentages.get(label, "")
-                # Show the value in a disabled text input
-                percentage_values[label] = cols[i].text_input(label, value=str(value), disabled=True)
-
-        # Aggregate dummy data
-        total_factory_overheads_batchsetup = sum(selected_data["Batch Set up Cost"])
-        total_factory_overheads_vamachine = sum(selected_data["VA MC Cost"])
-        total_factory_overheads_labour = sum(selected_data["Labour cost/Hr"])
-
-        # Convert percentages to fractions and compute costs
-        pcb_comp_mech_cost = cost_pcb + cost_electronics_components + cost_mech_components
-
-        moh_cost_value = pcb_comp_mech_cost * (selected_percentages["MOH %"] / 100)
-        foh_cost_value = (total_factory_overheads_batchsetup + total_factory_overheads_vamachine + total_factory_overheads_labour) * (selected_percentages["FOH %"] / 100)
-        profit_on_rm_cost_value = pcb_comp_mech_cost * (selected_percentages["Profit on RM %"] / 100)
-        profit_on_va_cost_value = (total_factory_overheads_batchsetup + total_factory_overheads_vamachine + total_factory_overheads_labour) * (selected_percentages["Profit on VA %"] / 100)
-
-        total_material_cost_value = pcb_comp_mech_cost + nre_per_unit
-        total_manufacturing_cost_value = total_factory_overheads_batchsetup + total_factory_overheads_vamachine + total_factory_overheads_labour
-        total_ohp_cost_value = moh_cost_value + foh_cost_value + profit_on_rm_cost_value + profit_on_va_cost_value
-
-        r_n_d_cost_value = (total_material_cost_value + total_manufacturing_cost_value) * (selected_percentages["R&D %"] / 100)
-        warranty_cost_value = (total_material_cost_value + total_manufacturing_cost_value) * (selected_percentages["Warranty %"] / 100)
-        sg_and_a_cost_value = (total_material_cost_value + total_manufacturing_cost_value) * (selected_percentages["SG&A %"] / 100)
-
-    with ohpandother_cost_col:
-        st.subheader("Cost Computation")
-        ohpandother_cost_col1, ohpandother_cost_col2 = st.columns(2)
-
-        with ohpandother_cost_col1:
-            st.text_input("MOH (₹)", value=f"{moh_cost_value:.2f}", disabled=True)
-            st.text_input("Profit on RM (₹)", value=f"{profit_on_rm_cost_value:.2f}", disabled=True)
-            st.text_input("Material Cost (₹)", value=f"{total_material_cost_value:.2f}", disabled=True)
-            st.text_input("OH&P (₹)", value=f"{total_ohp_cost_value:.2f}", disabled=True)
-            st.text_input("Warranty (₹)", value=f"{warranty_cost_value:.2f}", disabled=True)
-        with ohpandother_cost_col2:
-            st.text_input("FOH (₹)", value=f"{foh_cost_value:.2f}", disabled=True)
-            st.text_input("Profit on VA (₹)", value=f"{profit_on_va_cost_value:.2f}", disabled=True)
-            st.text_input("Manufacturing Cost (₹)", value=f"{total_manufacturing_cost_value:.2f}", disabled=True)
-            st.text_input("R&D (₹)", value=f"{r_n_d_cost_value:.2f}", disabled=True)
-            st.text_input("SG&A (₹)", value=f"{sg_and_a_cost_value:.2f}", disabled=True)
-
-    with placeholder2_col:
-        st.subheader("Cost Summary")
-        grand_total_cost_value = ((total_material_cost_value + total_manufacturing_cost_value) + moh_cost_value + 
-                                        foh_cost_value + profit_on_rm_cost_value + profit_on_va_cost_value +
-                                        r_n_d_cost_value + warranty_cost_value + sg_and_a_cost_value )
-        st.text_input('Total Cost (₹)', value=grand_total_cost_value, disabled=True)
-
-        rm_cost_value = total_material_cost_value
-        st.text_input('RM Cost (₹)', value=rm_cost_value, disabled=True)
-
-        conversion_cost_value = grand_total_cost_value - total_material_cost_value
-        st.text_input('Conversion Cost (₹)', value=conversion_cost_value, disabled=True)
-
-        if st.button("Save Consumable, RM & Conversion Costing Details"):
-            if sheet_name in st.session_state.edited_sheets:
-                # Retrieve the current edited_data
-                current_data = st.session_state.edited_sheets[sheet_name].copy()
-
-                # Add new columns if they don't exist
-                columns_to_add = [
-                    'RTV Wt/Brd Est','RTV Wastage %','RTV Cost/ml','RTV SG','Wt per Board (Incl Wastage %)','RTV Cost Per Board', #RTV Glue section
-                    "Board Length(mm)","Board Width(mm)","Top Wt Estimate %","Top Wastage %","Solder Paste SG (g/cc)","Solder Paste Cost(₹/g)","Top SP Thick(mm)","Top SP Wt (100%)(g)", "Top SP Wt Estimate(g)","Top SP Cost/Brd(₹)", #Solder Paste - Top section
-                    "Bot Wt Estimate %","Bot Wastage %","Bot SP Thick(mm)","Bot SP Wt (100%)(g)","Bot SP Wt Estimate(g)","Bot SP Cost/Brd(₹)",  #Solder Paste - Bottom section
-                    "Flux Wastage %","Flux Cost(₹/ml)","Flux Area/Brd(mm^2)","Flux Spray Area(mm^2)","Flux Cost Per Board(₹)", #Flux Wave Soldering section
-                    "Pad OD (mm)","Pad ID (mm)","Solder Joints","Solder Thick (mm)","Solder Vol(mm^3)","Solder Wt/Joint(g)","Solder Wt/Brd(g)", # Circumferential Fill Solder Bar
-                    "Barrel Dia(mm)","Board Thick(mm)","Barrel Joints","Lead Thickness(mm)","Solder Bar Cost(₹/g)","Barrel Solder Vol(mm^3)","Barrel Solder Wt/Joint(g)","Barrel Solder Wt/Brd(g)","Solder Bar Cost(₹/g)","Total Solder Wt(g)","Solder Bar Cost/Brd(₹)", # Barrel Fill Solder Bar
-                    "PCB (₹)","Electronics Component (₹)","Mechanical Component (₹)","NRE (₹)","Consumables (₹)", #Input Cost section
-                    "Select Annual Volume","MOH %","FOH %","Profit on RM %","Profit on VA %","R&D %","Warranty %","SG&A %", #OHP% Model Vs. Ann. Volume section
-                    "MOH (₹)","Profit on RM (₹)","FOH (₹)","Profit on VA (₹)","Material Cost (₹)","Manufacturing Cost (₹)","OH&P (₹)","R&D (₹)","Warranty (₹)","SG&A (₹)", #Cost Computation section
-                    "Total Cost (₹)","RM Cost (₹)","Conversion Cost (₹)" # Cost Summary section
-                ]
-                for column in columns_to_add:
-                    if column not in current_data.columns:
-                        current_data[column] = np.nan
-
-                # Assign values to the first row of respective columns
-                current_data.loc[0, 'RTV Wt/Brd Est'] = glue_wt_per_board
-                current_data.loc[0, 'RTV Wastage %'] = wastage_percentage_per_board
-                current_data.loc[0, 'RTV Cost/ml'] = rtv_glue_cost
-                current_data.loc[0, 'RTV SG'] = rtv_specific_gravity
-                current_data.loc[0, 'Wt per Board (Incl Wastage %)'] = wt_per_board_incl_wastage
-                current_data.loc[0, 'RTV Cost Per Board'] = rtv_cost_per_board
-                current_data.loc[0, "Board Length(mm)"] = board_length  
-                current_data.loc[0, "Board Width(mm)"] = board_width  
-                current_data.loc[0, "Top Wt Estimate %"] = top_weight_estimate_percentage
-                current_data.loc[0, "Top Wastage %"] = top_sp_wastage_percentage
-                current_data.loc[0, "Solder Paste SG (g/cc)"] = paste_specific_gravity
-                current_data.loc[0, "Solder Paste Cost(₹/g)"] = cost_of_solder_paste
-                current_data.loc[0, "Top SP Thick(mm)"] = solder_paste_thickness
-                current_data.loc[0, "Top SP Wt (100%)(g)"] = weight_of_solder_paste_for_100percentage_wt_value
-                current_data.loc[0, "Top SP Wt Estimate(g)"] = top_weight_of_solder_paste_for_wt_estimate_value
-                current_data.loc[0, "Top SP Cost/Brd(₹)"] = top_side_cost_per_board_value
-                current_data.loc[0, "Bot Wt Estimate %"] = bot_weight_estimate_percentage
-                current_data.loc[0, "Bot Wastage %"] = bot_sp_wastage_percentage
-                current_data.loc[0, "Bot SP Thick(mm)"] = bot_solder_paste_thickness
-                current_data.loc[0, "Bot SP Wt (100%)(g)"] = bot_weight_of_solder_paste_for_100percentage_wt_value
-                current_data.loc[0, "Bot SP Wt Estimate(g)"] = bot_weight_of_solder_paste_for_wt_estimate_value
-                current_data.loc[0, "Bot SP Cost/Brd(₹)"] = bot_side_cost_per_board_value
-                current_data.loc[0, "Flux Wastage %"] = flux_wastage_percentage
-                current_data.loc[0, "Flux Cost(₹/ml)"] = flux_cost
-                current_data.loc[0, "Flux Area/Brd(mm^2)"] = flux_board_area_value
-                current_data.loc[0, "Flux Spray Area(mm^2)"] = flux_spread_area_value
-                current_data.loc[0, "Flux Cost Per Board(₹)"] = flux_cost_per_board
-                current_data.loc[0, "Pad OD (mm)"] = outer_dia_of_pad
-                current_data.loc[0, "Pad ID (mm)"] = inner_dia_of_pad
-                current_data.loc[0, "Solder Joints"] = no_of_solder_joints
-                current_data.loc[0, "Solder Thick (mm)"] = thickness_of_solder
-                current_data.loc[0, "Solder Vol(mm^3)"] = volume_of_solder_per_joint
-                current_data.loc[0, "Solder Wt/Joint(g)"] = weight_of_Solder_per_joint
-                current_data.loc[0, "Solder Wt/Brd(g)"] = weight_of_Solder_per_board
-                current_data.loc[0, "Barrel Dia(mm)"] = barrel_dia
-                current_data.loc[0, "Board Thick(mm)"] = board_thick
-                current_data.loc[0, "Barrel Joints"] = barrel_joints
-                current_data.loc[0, "Lead Thickness(mm)"] = lead_thickness
-                current_data.loc[0, "Solder Bar Cost(₹/g)"] = solder_bar_cost_value
-                current_data.loc[0, "Barrel Solder Vol(mm^3)"] = barrel_solder_vol
-                current_data.loc[0, "Barrel Solder Wt/Joint(g)"] = barrel_solder_wt_per_joint
-                current_data.loc[0, "Barrel Solder Wt/Brd(g)"] = barrel_solder_wt_per_board
-                current_data.loc[0, "Solder Bar Cost(₹/g)"] = solder_bar_cost
-                current_data.loc[0, "Total Solder Wt(g)"] = circumferential_plus_barrel_fill_solder_wt
-                current_data.loc[0, "Solder Bar Cost/Brd(₹)"] = solderbar_cost_per_brd
-                current_data.loc[0, "PCB (₹)"] = cost_pcb
-                current_data.loc[0, "Electronics Component (₹)"] = cost_electronics_components
-                current_data.loc[0, "Mechanical Component (₹)"] = cost_mech_components
-                current_data.loc[0, "NRE (₹)"] = cost_nre
-                current_data.loc[0, "Consumables (₹)"] = cost_consumables
-                current_data.loc[0, "Select Annual Volume"] = annual_volume
-
-                # Update the values in `edited_data` (current_data) for these headers
-                for label, value in percentage_values.items():
-                    try:
-                        # Convert value to float and update the data
-                        current_data.loc[0, label] = float(value)
-                    except ValueError:
-                        st.warning(f"Invalid value for {label}. Please check the input.")
-
-                current_data.loc[0, "MOH (₹)"] = moh_cost_value
-                current_data.loc[0, "FOH (₹)"] = foh_cost_value
-                current_data.loc[0, "Profit on RM (₹)"] = profit_on_rm_cost_value
-                current_data.loc[0, "Profit on VA (₹)"] = profit_on_va_cost_value
-                current_data.loc[0, "Material Cost (₹)"] = total_material_cost_value
-                current_data.loc[0, "Manufacturing Cost (₹)"] = total_manufacturing_cost_value
-                current_data.loc[0, "OH&P (₹)"] = total_ohp_cost_value
-                current_data.loc[0, "R&D (₹)"] = r_n_d_cost_value
-                current_data.loc[0, "Warranty (₹)"] = warranty_cost_value
-                current_data.loc[0, "SG&A (₹)"] = sg_and_a_cost_value
-                current_data.loc[0, "Total Cost (₹)"] = grand_total_cost_value
-                current_data.loc[0, "RM Cost (₹)"] = rm_cost_value
-                current_data.loc[0, "Conversion Cost (₹)"] = conversion_cost_value
-
-            if sheet_name:  # Check if the sheet_name is not empty
-                # Update the session state
-                st.session_state.edited_sheets[sheet_name] = current_data
-                st.success("Consumable, RM & Conversion Costing Details saved successfully.")
-            else:
-                st.error("No data available to save Consumable, RM & Conversion Costing Details.")
+    # Same cost chain as the new analysis, with its own memoized state
+    if 'cost_models' not in st.session_state:
+        st.session_state.cost_models = {}
+    cost_model = st.session_state.cost_models.setdefault('Existing', CostModel())
+    cost_chain_section(cost_model, sheet_name, selected_data, nre_per_unit)
     
     # Update the data editor with the latest data
     edited_data2 = st.session_state.edited_sheets.get(sheet_name, pd.DataFrame())